@@ -4,15 +4,9 @@ Model Train Protocol (MTP) - A Python package for creating custom Language Model
 MTP is an open-source protocol for training custom Language Models on Databiomes. 
 MTP contains all the data that a model is trained on.
 """
-from .common.instructions.input.InstructionInput import InstructionInput
-from .common.instructions.input.StateMachineInput import StateMachineInput
-from .common.tokens import Token, NumToken, NumListToken, FinalToken, Snippet, TokenSet, FinalNumToken
-from .common.instructions.output import InstructionOutput, ExtendedResponse
-from .common.instructions import Instruction, ExtendedInstruction
-from .common.instructions.StateMachineInstruction import StateMachineInstruction
-from .common.instructions.output.StateMachineOutput import StateMachineOutput
-from .common.guardrails import Guardrail
-from model_train_protocol.v1.protocol.protocol_v1 import ProtocolV1 as Protocol
+import importlib
+from typing import TYPE_CHECKING, Any, Dict, List, Tuple
+
 from .errors import (
     MTPError,
     MTPValueError,
@@ -42,6 +36,7 @@ from .errors import (
 
 __all__ = [
     "Protocol",
+    "ProtocolReader",
     "Token",
     "FinalToken",
     "FinalNumToken",
@@ -83,3 +78,53 @@ __all__ = [
     "ProviderError",
     "StateMachineError",
 ]
+
+# The public API is imported on first access, so importing the package stays cheap for callers that only need part
+# of it. Maps each public name to the module that defines it and its name in that module.
+_LAZY_IMPORTS: Dict[str, Tuple[str, str]] = {
+    "Protocol": ("model_train_protocol.v1.protocol.protocol_v1", "ProtocolV1"),
+    "ProtocolReader": ("model_train_protocol.v1.protocol_file.protocol_reader", "ProtocolReader"),
+    "Token": ("model_train_protocol.common.tokens", "Token"),
+    "FinalToken": ("model_train_protocol.common.tokens", "FinalToken"),
+    "FinalNumToken": ("model_train_protocol.common.tokens", "FinalNumToken"),
+    "NumToken": ("model_train_protocol.common.tokens", "NumToken"),
+    "NumListToken": ("model_train_protocol.common.tokens", "NumListToken"),
+    "TokenSet": ("model_train_protocol.common.tokens", "TokenSet"),
+    "Snippet": ("model_train_protocol.common.tokens", "Snippet"),
+    "Instruction": ("model_train_protocol.common.instructions", "Instruction"),
+    "InstructionInput": ("model_train_protocol.common.instructions.input.InstructionInput", "InstructionInput"),
+    "StateMachineInput": ("model_train_protocol.common.instructions.input.StateMachineInput", "StateMachineInput"),
+    "ExtendedInstruction": ("model_train_protocol.common.instructions", "ExtendedInstruction"),
+    "InstructionOutput": ("model_train_protocol.common.instructions.output", "InstructionOutput"),
+    "StateMachineInstruction": ("model_train_protocol.common.instructions.StateMachineInstruction",
+                                "StateMachineInstruction"),
+    "StateMachineOutput": ("model_train_protocol.common.instructions.output.StateMachineOutput", "StateMachineOutput"),
+    "ExtendedResponse": ("model_train_protocol.common.instructions.output", "ExtendedResponse"),
+    "Guardrail": ("model_train_protocol.common.guardrails", "Guardrail"),
+}
+
+if TYPE_CHECKING:
+    from .common.instructions.input.InstructionInput import InstructionInput
+    from .common.instructions.input.StateMachineInput import StateMachineInput
+    from .common.tokens import Token, NumToken, NumListToken, FinalToken, Snippet, TokenSet, FinalNumToken
+    from .common.instructions.output import InstructionOutput, ExtendedResponse
+    from .common.instructions import Instruction, ExtendedInstruction
+    from .common.instructions.StateMachineInstruction import StateMachineInstruction
+    from .common.instructions.output.StateMachineOutput import StateMachineOutput
+    from .common.guardrails import Guardrail
+    from model_train_protocol.v1.protocol.protocol_v1 import ProtocolV1 as Protocol
+    from model_train_protocol.v1.protocol_file.protocol_reader import ProtocolReader
+
+
+def __getattr__(name: str) -> Any:
+    """Imports a public class on first access."""
+    if name not in _LAZY_IMPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    module_name, attribute = _LAZY_IMPORTS[name]
+    value: Any = getattr(importlib.import_module(module_name), attribute)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(__all__))
@@ -1,7 +1,12 @@
 import abc
+import hashlib
+import json
 from abc import ABC
-from typing import List, Optional, Union
+from typing import TYPE_CHECKING, Any, Iterable, List, Optional, Sequence, Tuple, Union
 
+from .Sample import Sample
+from .SampleList import SampleList
+from .SampleStore import SampleStore
 from .input.BaseInput import BaseInput
 from .output.BaseOutput import BaseOutput
 from ..constants import MAXIMUM_CONTEXT_LINES_PER_INSTRUCTION, MAXIMUM_CHARACTERS_PER_INSTRUCTION_CONTEXT_LINE, \
@@ -12,43 +17,11 @@ from ..tokens.Token import Token
 from ..tokens.TokenSet import TokenSet, Snippet
 from model_train_protocol.errors import InstructionError, InstructionTypeError
 
+if TYPE_CHECKING:
+    from model_train_protocol.v1.protocol.journal import ProtocolJournal
 
-class Sample:
-    """A Sample is a single example of input and output for an Instruction."""
-
-    def __init__(self, input: List[str], output: str, prompt: Optional[str], numbers: List[List[int]],
-                 number_lists: List[List[List[int]]],
-                 result: FinalToken,
-                 value: Union[int, float, None]):
-        self.input: List[str] = input
-        self.output: str = output
-        self.prompt: Optional[str] = prompt
-        self.numbers: List[List[int]] = numbers
-        self.number_lists: List[List[List[int]]] = number_lists
-        self.result: FinalToken = result
-        self.value: Union[int, float, None] = value
-
-    @property
-    def strings(self) -> List[str]:
-        """Returns all strings in the sample as a list."""
-        return self.input + [self.output]
-
-    def to_dict(self) -> dict:
-        return {
-            'strings': self.strings,
-            'prompt': self.prompt,
-            'numbers': self.numbers,
-            'number_lists': self.number_lists,
-            'result': self.result.value,  # We only need the value of the result token
-            'value': self.value
-        }
-
-    def __repr__(self):
-        """String representation of the Sample."""
-        result_str = self.result.value
-        if self.value is not None:
-            result_str += f"{self.value}"
-        return f"Sample(Context: {self.input}, Output: {self.output}, Result: {result_str})"
+# Number of consecutive samples hashed together in a leaf of the content fingerprint
+_FINGERPRINT_CHUNK_SIZE: int = 1024
 
 
 class BaseInstruction(ABC):
@@ -86,8 +59,15 @@ class BaseInstruction(ABC):
         if context is None:
             context = []
         self.context: List[str] = context
-        self.samples: List[Sample] = []
-        self.samples: list[Sample] = []
+        self.samples: SampleList | SampleStore = SampleList()
+        self._fingerprint: Optional[str] = None
+        # Digests of the complete sample chunks of the content fingerprint, the samples they were computed from, and
+        # the changes count of those samples at the time
+        self._sample_digests: List[bytes] = []
+        self._digested_samples: Optional[Union[SampleList, SampleStore]] = None
+        self._digested_changes: int = 0
+        self._revision: int = 0  # Incremented whenever samples, guardrails or context are added
+        self._journal: Optional[ProtocolJournal] = None  # Set while the Instruction belongs to a journaled Protocol
         if not isinstance(input, BaseInput):
             raise InstructionTypeError("Context must be a sequence of TokenSet instances.")
         if not all(isinstance(ts, TokenSet) for ts in input.tokensets):
@@ -104,6 +84,69 @@ class BaseInstruction(ABC):
         """Returns all tokens in the instruction as a list of tuples."""
         raise NotImplementedError("Subclasses must implement get_token_sets method.")
 
+    @property
+    def samples(self) -> SampleList | SampleStore:
+        """The samples of the Instruction. Lists of samples assigned to it are copied into a SampleList."""
+        return self._samples
+
+    @samples.setter
+    def samples(self, samples: Iterable[Sample]):
+        if not isinstance(samples, (SampleList, SampleStore)):
+            samples = SampleList(samples)
+        self._samples: SampleList | SampleStore = samples
+
+    @property
+    def fingerprint(self) -> str:
+        """
+        Returns the structural fingerprint of the Instruction: the keys of its TokenSets, in order.
+
+        The fingerprint does not depend on the samples and is computed once, so it is cheap to hash and compare.
+        """
+        if self._fingerprint is None:
+            self._fingerprint = str(self.get_token_sets())
+        return self._fingerprint
+
+    def get_content_fingerprint(self) -> str:
+        """
+        Returns a fingerprint of everything written to protocol files for the Instruction: its name, TokenSets,
+        context, guardrails and samples.
+
+        The fingerprint is the root of a Merkle tree whose leaves are the settings of the Instruction and chunks of
+        consecutive samples. Digests of complete chunks are kept, so after samples are appended only the new samples
+        are hashed. Replacing the samples, or any other change counted by their changes attribute, such as removing
+        or replacing samples, rehashes every sample. As with get_validation_state(), changes made inside existing
+        samples are not detected.
+        """
+        settings: str = json.dumps([self.name, self.serialize_memory_set(), self.context, self.serialize_guardrails(),
+                                    self.serialize_ppo()], ensure_ascii=False)
+        sample_count: int = len(self.samples)
+        if self._digested_samples is not self.samples or self._digested_changes != self.samples.changes:
+            self._digested_samples = self.samples
+            self._digested_changes = self.samples.changes
+            self._sample_digests = []
+
+        partial_digest: bytes = b""
+        for start in range(len(self._sample_digests) * _FINGERPRINT_CHUNK_SIZE, sample_count, _FINGERPRINT_CHUNK_SIZE):
+            digest: bytes = self._get_samples_digest(self.samples[start:start + _FINGERPRINT_CHUNK_SIZE])
+            if start + _FINGERPRINT_CHUNK_SIZE <= sample_count:
+                self._sample_digests.append(digest)
+            else:
+                partial_digest = digest
+
+        root = hashlib.sha256(hashlib.sha256(settings.encode("utf-8")).digest())
+        root.update(b"".join(self._sample_digests))
+        root.update(partial_digest)
+        return root.hexdigest()
+
+    @classmethod
+    def _get_samples_digest(cls, samples: Iterable[Sample]) -> bytes:
+        """Returns the digest of a chunk of samples."""
+        digest = hashlib.sha256()
+        for sample in samples:
+            digest.update(repr((sample.input, sample.output, sample.prompt, sample.numbers, sample.number_lists,
+                                sample.result.value, sample.value)).encode("utf-8"))
+        return digest.digest()
+
     @property
     def example_final_token(self) -> FinalToken:
         """Returns an example final token from the response."""
@@ -137,10 +180,54 @@ class BaseInstruction(ABC):
             all_snippet_strings: List[str] = sample.strings
             self.___enforce_max_chars(all_snippet_strings)
 
+    def get_validation_state(self) -> tuple:
+        """
+        Returns a snapshot of everything validate_instruction() checks that can change after construction.
+
+        The snapshot changes whenever samples, guardrails or context are added through the Instruction's methods, and
+        also when the samples or context lists are replaced or resized directly. Changes made inside existing samples
+        are not detected.
+        """
+        guardrails: list[Guardrail] = self.get_guardrails()
+        return (self._revision, id(self.samples), len(self.samples), id(self.context), len(self.context),
+                tuple((id(guardrail), len(guardrail.samples)) for guardrail in guardrails))
+
+    def use_sample_store(self):
+        """
+        Switches the Instruction to a columnar SampleStore for its samples.
+
+        The store keeps each sample field in a flat column instead of one Sample object per sample, which greatly
+        reduces memory for instructions with very large numbers of samples. Existing samples are moved into the store.
+        Samples read from the store are snapshots; modifying them does not change the stored samples.
+        """
+        if not isinstance(self.samples, SampleStore):
+            self.samples = SampleStore(self.samples)
+            self._revision += 1
+
     def add_context(self, context: str):
         """Adds context to the Instruction."""
         if context not in self.context:
             self.context.append(context)
+            self._revision += 1
+            if self._journal is not None:
+                self._journal.record_instruction_context(instruction=self, contexts=[context])
+
+    def add_contexts(self, contexts: Iterable[str]):
+        """
+        Adds many lines of context to the Instruction, skipping lines that are already present.
+
+        :param contexts: The lines of context, in order.
+        """
+        seen: set[str] = set(self.context)
+        added: List[str] = []
+        for context in contexts:
+            if context not in seen:
+                seen.add(context)
+                added.append(context)
+        self.context.extend(added)
+        self._revision += 1
+        if self._journal is not None and added:
+            self._journal.record_instruction_context(instruction=self, contexts=added)
 
     @classmethod
     def _validate_snippet_length(cls, inputs: List[Snippet], response_snippet: Snippet):
@@ -235,6 +322,20 @@ class BaseInstruction(ABC):
             value=value
         )
 
+    def _append_sample(self, sample: Sample):
+        """Adds a validated sample to the Instruction."""
+        self.samples.append(sample)
+        self._revision += 1
+        if self._journal is not None:
+            self._journal.record_samples(instruction=self, samples=[sample])
+
+    def _add_guardrail_to_input(self, guardrail: Guardrail, tokenset_index: int):
+        """Adds a guardrail to the input TokenSet at tokenset_index."""
+        self.input.add_guardrail(guardrail=guardrail, tokenset_index=tokenset_index)
+        self._revision += 1
+        if self._journal is not None:
+            self._journal.record_guardrail(instruction=self, guardrail=guardrail, tokenset_index=tokenset_index)
+
     def _validate_context(self):
         """Validates the total context lines and the length of each context line."""
         if len(self.context) > MAXIMUM_CONTEXT_LINES_PER_INSTRUCTION:
@@ -295,6 +396,146 @@ class BaseInstruction(ABC):
 
         return inputs
 
+    @classmethod
+    def _as_column(cls, column: Iterable[Any]) -> List[Any]:
+        """Converts a column of sample data, given as a list, tuple or array, to a list."""
+        if hasattr(column, "tolist"):  # NumPy arrays and similar
+            return column.tolist()
+        return list(column)
+
+    def _enforce_snippet_column(self, column: List[Union[str, Snippet]], token_set: TokenSet) -> Tuple[
+            List[str], List[List[Union[int, float]]], List[List[List[Union[int, float]]]]]:
+        """
+        Validates a column of strings or Snippets for a single TokenSet in one pass, including the snippet lengths.
+
+        Strings are only accepted if the TokenSet requires no numbers, in which case they are used directly instead of
+        creating a Snippet for each one.
+        :param column: The strings or Snippets of one line across many samples.
+        :param token_set: The TokenSet the line must match.
+        :return: The strings, numbers and number lists of the column.
+        """
+        if all(type(item) is str for item in column):
+            self._enforce_plain_string_snippets(column=column, token_set=token_set)
+            self.___enforce_max_chars(column)
+            return column, [[] for _ in column], [[] for _ in column]
+
+        strings: List[str] = []
+        numbers: List[List[Union[int, float]]] = []
+        number_lists: List[List[List[Union[int, float]]]] = []
+        for item in column:
+            if isinstance(item, str):
+                self._enforce_plain_string_snippets(column=[item], token_set=token_set)
+                strings.append(item)
+                numbers.append([])
+                number_lists.append([])
+            elif isinstance(item, Snippet):
+                self._validate_snippet_matches_set(snippet=item, expected_token_set=token_set)
+                strings.append(item.string)
+                numbers.append(item.numbers)
+                number_lists.append(item.number_lists)
+            else:
+                raise InstructionTypeError(f"Samples must be given as strings or Snippets. Got: {type(item)}")
+        self.___enforce_max_chars(strings)
+        return strings, numbers, number_lists
+
+    def _enforce_sample_columns(self, inputs_columns: Sequence[Sequence[Union[str, Snippet]]],
+                                outputs: List[Union[str, Snippet]]) -> Tuple[
+            List[List[str]], List[List[List[Union[int, float]]]], List[List[List[List[Union[int, float]]]]]]:
+        """
+        Validates the input columns and the output column of many samples against the Instruction's TokenSets.
+
+        :param inputs_columns: One column per input TokenSet, each holding the input snippet or string of every sample.
+        :param outputs: The output snippet or string of every sample.
+        :return: The strings, numbers and number lists of every column, with the output column last.
+        """
+        inputs_columns: List[List[Union[str, Snippet]]] = [self._as_column(column) for column in inputs_columns]
+        if len(inputs_columns) != len(self.input.tokensets):
+            raise InstructionError(
+                f"Number of input columns ({len(inputs_columns)}) must match number of context token sets ({len(self.input.tokensets)}).")
+        self._enforce_column_lengths(columns=inputs_columns, sample_count=len(outputs))
+
+        string_columns: List[List[str]] = []
+        numbers_columns: List[List[List[Union[int, float]]]] = []
+        number_lists_columns: List[List[List[List[Union[int, float]]]]] = []
+        for column, token_set in zip(inputs_columns + [outputs], self.get_token_sets()):
+            strings, numbers, number_lists = self._enforce_snippet_column(column=column, token_set=token_set)
+            string_columns.append(strings)
+            numbers_columns.append(numbers)
+            number_lists_columns.append(number_lists)
+        return string_columns, numbers_columns, number_lists_columns
+
+    def _extend_samples(self, string_columns: List[List[str]], numbers_columns: List[List[List[Union[int, float]]]],
+                        number_lists_columns: List[List[List[List[Union[int, float]]]]], finals: List[FinalToken],
+                        values: List[Union[int, float, List[Union[int, float]], None]]):
+        """
+        Adds validated samples given as columns, as returned by _enforce_sample_columns().
+
+        :param string_columns: The strings of every column, with the output column last.
+        :param numbers_columns: The numbers of every column, with the output column last.
+        :param number_lists_columns: The number lists of every column, with the output column last.
+        :param finals: The final token of every sample.
+        :param values: The value of every sample.
+        """
+        input_columns: List[List[str]] = string_columns[:-1]
+        output_strings: List[str] = string_columns[-1]
+        sample_count: int = len(output_strings)
+        start: int = len(self.samples)
+        self._revision += 1
+        if isinstance(self.samples, SampleStore):
+            self.samples.extend_columns(inputs=input_columns, outputs=output_strings, prompts=[None] * sample_count,
+                                        numbers=numbers_columns, number_lists=number_lists_columns,
+                                        results=finals, values=values)
+        else:
+            self.samples.extend(
+                Sample(input=list(input_strings), output=output_string, prompt=None, numbers=list(numbers),
+                       number_lists=list(number_lists), result=final, value=value)
+                for input_strings, output_string, numbers, number_lists, final, value in zip(
+                    zip(*input_columns) if input_columns else ([] for _ in range(sample_count)), output_strings,
+                    zip(*numbers_columns), zip(*number_lists_columns), finals, values)
+            )
+        if self._journal is not None:
+            self._journal.record_samples(instruction=self, samples=self.samples[start:])
+
+    @classmethod
+    def _enforce_plain_string_snippets(cls, column: List[str], token_set: TokenSet):
+        """Validates that plain strings can be used as Snippets of the TokenSet, which requires no numbers."""
+        if not column:
+            return
+        try:
+            token_set.create_snippet(string=column[0])
+        except Exception as e:
+            raise InstructionError(
+                f"Failed to create Snippet from string '{column[0]}' for TokenSet {token_set}.\n"
+                f"Create a Snippet from the tokenset and add associated information: {e}")
+
+    @classmethod
+    def _enforce_column_lengths(cls, columns: Sequence[Sequence[Any]], sample_count: int):
+        """Validates that every column of sample data has one entry per sample."""
+        for i, column in enumerate(columns):
+            if len(column) != sample_count:
+                raise InstructionError(
+                    f"Column {i} has {len(column)} entries but {sample_count} samples were provided.")
+
+    def _enforce_final_column(self, finals: Union[FinalToken, Iterable[Optional[FinalToken]], None],
+                              sample_count: int) -> List[FinalToken]:
+        """
+        Resolves the final token of every sample, assigning defaults once per distinct final token.
+
+        :param finals: A single final token for all samples, one final token or None per sample, or None.
+        :param sample_count: The number of samples.
+        :return: The final token of each sample.
+        """
+        if finals is None or isinstance(finals, FinalToken):
+            return [self._assign_final_token(final=finals)] * sample_count
+
+        finals = self._as_column(finals)
+        self._enforce_column_lengths(columns=[finals], sample_count=sample_count)
+        resolved: dict[int, FinalToken] = {}
+        for final in finals:
+            if id(final) not in resolved:
+                resolved[id(final)] = self._assign_final_token(final=final)
+        return [resolved[id(final)] for final in finals]
+
     def _enforce_response_snippet(self, snippet: Union[Snippet, str]) -> Snippet:
         """Converts a regular string to a snippet if provided as a string."""
         if isinstance(snippet, str):
@@ -360,7 +601,7 @@ class BaseInstruction(ABC):
     def __hash__(self) -> int:
         """Hash based on the token sets of the Instruction. Instructions with the same TokenSets in the same order
         will have the same hash."""
-        return hash(str(self.get_token_sets()))
+        return hash(self.fingerprint)
 
     def __eq__(self, other) -> bool:
         """
@@ -370,6 +611,11 @@ class BaseInstruction(ABC):
         """
         if not isinstance(other, BaseInstruction):
             return False
+        if self is other:
+            return True
+        # Cheap checks first, so unequal Instructions are rejected without comparing their samples
+        if self.name != other.name or len(self.samples) != len(other.samples):
+            return False
 
         attrs_to_compare = ['name', 'context', 'response', 'final', 'samples']
         for attr in attrs_to_compare:
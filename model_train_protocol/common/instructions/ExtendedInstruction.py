@@ -85,7 +85,7 @@ class ExtendedInstruction(BaseInstruction):
 
         sample: Sample = self._create_sample(inputs=inputs,
                                              response_string=response_string, value=value, final=final)
-        self.samples.append(sample)
+        self._append_sample(sample)
 
     def _create_sample(self, inputs: List[Snippet], response_string: str, final: FinalToken,
                        value: Union[int, float, List[Union[int, float]], None] = None) -> Sample:
@@ -121,5 +121,5 @@ class ExtendedInstruction(BaseInstruction):
             raise InstructionError(
                 "Guardrail must have at least 3 samples of bad inputs before being added to an Instruction.")
 
-        self.input.add_guardrail(guardrail=guardrail, tokenset_index=tokenset_index)
+        self._add_guardrail_to_input(guardrail=guardrail, tokenset_index=tokenset_index)
 
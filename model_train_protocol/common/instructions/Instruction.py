@@ -1,4 +1,4 @@
-from typing import List, Union
+from typing import List, Optional, Sequence, Union
 
 from .BaseInstruction import BaseInstruction, Sample
 from .input.InstructionInput import InstructionInput
@@ -7,6 +7,7 @@ from ..guardrails import Guardrail
 from ..tokens.FinalToken import FinalToken
 from ..tokens.TokenSet import TokenSet, Snippet
 from model_train_protocol.errors import InstructionError, InstructionTypeError
+from model_train_protocol.utils._protected import paused_garbage_collection
 
 
 class Instruction(BaseInstruction):
@@ -92,7 +93,39 @@ class Instruction(BaseInstruction):
 
         sample: Sample = self._create_sample(inputs=input_snippets, response_snippet=output_snippet,
                                              value=output_value, final=final)
-        self.samples.append(sample)
+        self._append_sample(sample)
+
+    def add_samples(self, inputs_columns: Sequence[Sequence[Union[str, Snippet]]], outputs: Sequence[Union[str, Snippet]],
+                    finals: Union[FinalToken, Sequence[Optional[FinalToken]], None] = None,
+                    values: Optional[Sequence[Union[int, float, List[Union[int, float]], None]]] = None):
+        """
+        Add many samples to the Instruction from column-oriented data.
+
+        Equivalent to calling add_sample() for each row, but each column is validated in a single pass. Columns may be
+        lists, tuples or arrays. No samples are added if any sample is invalid.
+
+        :param inputs_columns: One column per input TokenSet, each holding the input snippet or string of every sample.
+        :param outputs: The output snippet or string of every sample.
+        :param finals: Optional FinalToken for every sample, or a single FinalToken used for all samples. Defaults to
+            the only final token of the Output, as in add_sample().
+        :param values: Optional value of every sample, required for samples whose final token is a FinalNumToken.
+        """
+        with paused_garbage_collection():
+            outputs: List[Union[str, Snippet]] = self._as_column(outputs)
+            sample_count: int = len(outputs)
+            string_columns, numbers_columns, number_lists_columns = self._enforce_sample_columns(
+                inputs_columns=inputs_columns, outputs=outputs)
+
+            final_column: List[FinalToken] = self._enforce_final_column(finals=finals, sample_count=sample_count)
+            if values is None:
+                values = [None] * sample_count
+            else:
+                values = self._as_column(values)
+                self._enforce_column_lengths(columns=[values], sample_count=sample_count)
+            self.output.validate_samples(values=values, finals=final_column)
+
+            self._extend_samples(string_columns=string_columns, numbers_columns=numbers_columns,
+                                 number_lists_columns=number_lists_columns, finals=final_column, values=values)
 
     def add_guardrail(self, guardrail: Guardrail, tokenset_index: int):
         """
@@ -105,4 +138,4 @@ class Instruction(BaseInstruction):
             raise InstructionError(
                 "Guardrail must have at least 3 samples of bad inputs before being added to an Instruction.")
 
-        self.input.add_guardrail(guardrail=guardrail, tokenset_index=tokenset_index)
+        self._add_guardrail_to_input(guardrail=guardrail, tokenset_index=tokenset_index)
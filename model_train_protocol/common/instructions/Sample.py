@@ -0,0 +1,42 @@
+from typing import List, Optional, Union
+
+from ..tokens.FinalToken import FinalToken
+
+
+class Sample:
+    """A Sample is a single example of input and output for an Instruction."""
+
+    def __init__(self, input: List[str], output: str, prompt: Optional[str], numbers: List[List[int]],
+                 number_lists: List[List[List[int]]],
+                 result: FinalToken,
+                 value: Union[int, float, None]):
+        self.input: List[str] = input
+        self.output: str = output
+        self.prompt: Optional[str] = prompt
+        self.numbers: List[List[int]] = numbers
+        self.number_lists: List[List[List[int]]] = number_lists
+        self.result: FinalToken = result
+        self.value: Union[int, float, None] = value
+
+    @property
+    def strings(self) -> List[str]:
+        """Returns all strings in the sample as a list."""
+        return self.input + [self.output]
+
+    def to_dict(self) -> dict:
+        """Convert the sample to a dictionary, with its keys in alphabetical order as written to protocol files."""
+        return {
+            'number_lists': self.number_lists,
+            'numbers': self.numbers,
+            'prompt': self.prompt,
+            'result': self.result.value,  # We only need the value of the result token
+            'strings': self.strings,
+            'value': self.value
+        }
+
+    def __repr__(self):
+        """String representation of the Sample."""
+        result_str = self.result.value
+        if self.value is not None:
+            result_str += f"{self.value}"
+        return f"Sample(Context: {self.input}, Output: {self.output}, Result: {result_str})"
@@ -0,0 +1,78 @@
+from typing import Iterable, SupportsIndex, Union
+
+from .Sample import Sample
+
+
+class SampleList(list):
+    """
+    List of the samples of an Instruction that counts changes to the samples already in it.
+
+    Appending samples with append() or extend() leaves changes as it is. Every other change, such as replacing,
+    removing, inserting or reordering samples, increments it, so work done over the existing samples, such as their
+    digests in the content fingerprint, can be kept while samples are only appended.
+    """
+
+    def __init__(self, samples: Iterable[Sample] = ()):
+        """
+        Initializes the SampleList.
+
+        :param samples: Samples to add to the list.
+        """
+        super().__init__(samples)
+        self.changes: int = 0
+
+    def __setitem__(self, index: Union[SupportsIndex, slice], value):
+        """Replaces samples."""
+        super().__setitem__(index, value)
+        self.changes += 1
+
+    def __delitem__(self, index: Union[SupportsIndex, slice]):
+        """Removes samples."""
+        super().__delitem__(index)
+        self.changes += 1
+
+    def __iadd__(self, samples: Iterable[Sample]) -> 'SampleList':
+        """Appends samples, as extend() does."""
+        self.extend(samples)
+        return self
+
+    def __imul__(self, count: SupportsIndex) -> 'SampleList':
+        """Repeats the samples, or removes them all for counts below one."""
+        result: 'SampleList' = super().__imul__(count)
+        self.changes += 1
+        return result
+
+    def insert(self, index: SupportsIndex, sample: Sample):
+        """Inserts a sample before index."""
+        super().insert(index, sample)
+        self.changes += 1
+
+    def pop(self, index: SupportsIndex = -1) -> Sample:
+        """Removes and returns the sample at index."""
+        sample: Sample = super().pop(index)
+        self.changes += 1
+        return sample
+
+    def remove(self, sample: Sample):
+        """Removes the first sample equal to sample."""
+        super().remove(sample)
+        self.changes += 1
+
+    def clear(self):
+        """Removes all samples."""
+        super().clear()
+        self.changes += 1
+
+    def sort(self, *args, **kwargs):
+        """Sorts the samples in place."""
+        super().sort(*args, **kwargs)
+        self.changes += 1
+
+    def reverse(self):
+        """Reverses the samples in place."""
+        super().reverse()
+        self.changes += 1
+
+    def __reduce__(self):
+        """Pickles the samples only, so copies count their changes from 0."""
+        return SampleList, (list(self),)
@@ -0,0 +1,313 @@
+import itertools
+from array import array
+from collections.abc import Sequence
+from numbers import Integral
+from typing import Dict, Iterable, Iterator, List, Optional, Union, overload
+
+from model_train_protocol.errors import InstructionError
+from .Sample import Sample
+from ..tokens.FinalToken import FinalToken
+
+# Kind of each number of a _NumberColumn
+_FLOAT: int = 0
+_INT: int = 1
+_OBJECT: int = 2  # A bool or an int outside the 64-bit range, kept as it is
+
+# Translation table swapping _INT and _FLOAT
+_INVERTED_KINDS: bytes = bytes([_INT, _FLOAT]) + bytes(range(2, 256))
+
+_MIN_INT64: int = -(1 << 63)
+_MAX_INT64: int = (1 << 63) - 1
+
+
+class _NumberColumn:
+    """
+    Flat column of numbers split into consecutive groups, preserving whether each number is an int or a float.
+
+    Floats and ints are kept in separate arrays, so ints are stored exactly. Integers of other types, such as NumPy
+    integers, are stored as ints. Bools and ints outside the 64-bit range are kept as they are.
+    """
+
+    def __init__(self):
+        self.kinds: bytearray = bytearray()  # Kind of each number
+        self.floats: array = array('d')
+        self.ints: array = array('q')  # Holds 0 in place of each kept number
+        self.objects: Dict[int, Union[int, bool]] = {}  # Kept numbers, by their position in kinds
+        self.offsets: array = array('Q', [0])  # Start of each group in kinds, plus the end of the last group
+        self.int_offsets: array = array('Q', [0])  # Start of each group in ints, plus the end of the last group
+
+    def __len__(self) -> int:
+        """Returns the number of groups in the column."""
+        return len(self.offsets) - 1
+
+    def append(self, numbers: Iterable[Union[int, float]]):
+        """Appends a group of numbers."""
+        for number in numbers:
+            self._append_number(number)
+        self.offsets.append(len(self.kinds))
+        self.int_offsets.append(len(self.ints))
+
+    def extend(self, groups: List[List[Union[int, float]]]):
+        """Appends many groups of numbers."""
+        numbers: List[Union[int, float]] = list(itertools.chain.from_iterable(groups))
+        if set(map(type, numbers)) <= {int, float}:
+            # Only plain ints and floats, so each column is filled in one pass unless an int is outside the 64-bit
+            # range. _INT is 1 and _FLOAT is 0, so the kinds select the ints, and the inverted kinds the floats.
+            kinds: bytes = bytes([type(number) is int for number in numbers])
+            try:
+                ints: array = array('q', itertools.compress(numbers, kinds))
+            except OverflowError:
+                pass
+            else:
+                int_counts: List[int] = list(itertools.accumulate(kinds, initial=len(self.ints)))
+                group_ends: List[int] = list(itertools.accumulate(map(len, groups)))
+                self.offsets.extend(len(self.kinds) + end for end in group_ends)
+                self.int_offsets.extend(int_counts[end] for end in group_ends)
+                self.kinds += kinds
+                self.ints.extend(ints)
+                self.floats.extend(itertools.compress(numbers, kinds.translate(_INVERTED_KINDS)))
+                return
+        for group in groups:
+            self.append(group)
+
+    def get(self, group: int) -> List[Union[int, float]]:
+        """Returns the numbers in a group."""
+        start: int = self.offsets[group]
+        int_index: int = self.int_offsets[group]
+        float_index: int = start - int_index
+        numbers: List[Union[int, float]] = []
+        for position in range(start, self.offsets[group + 1]):
+            kind: int = self.kinds[position]
+            if kind == _FLOAT:
+                numbers.append(self.floats[float_index])
+                float_index += 1
+            else:
+                numbers.append(self.ints[int_index] if kind == _INT else self.objects[position])
+                int_index += 1
+        return numbers
+
+    def _append_number(self, number: Union[int, float]):
+        """Appends a number to the column of its kind. The group offsets are appended by the caller."""
+        if type(number) is not bool and isinstance(number, Integral):
+            number = int(number)
+            if _MIN_INT64 <= number <= _MAX_INT64:
+                self.ints.append(number)
+                self.kinds.append(_INT)
+                return
+        if isinstance(number, (bool, int)):
+            self.objects[len(self.kinds)] = number
+            self.ints.append(0)
+            self.kinds.append(_OBJECT)
+            return
+        self.floats.append(number)
+        self.kinds.append(_FLOAT)
+
+
+class SampleStore(Sequence):
+    """
+    Columnar backing store for the samples of an Instruction.
+
+    Instead of one Sample object per sample, each field is kept in its own column: a list of strings per input line,
+    the outputs and prompts, an index into the distinct result tokens, the values, and flat numeric arrays with
+    offsets for the numbers and number lists of each line.
+
+    The store behaves like a list of Samples. Indexing and iteration return Sample views built from the columns on
+    access. Views are snapshots, so changes made to a view are not written back to the store.
+    """
+
+    def __init__(self, samples: Iterable[Sample] = ()):
+        """
+        Initializes the SampleStore.
+
+        :param samples: Samples to add to the store.
+        """
+        self.changes: int = 0  # Incremented when stored samples are removed, as for a SampleList
+        self._reset()
+        self.extend(samples)
+
+    def _reset(self):
+        """Sets all columns to empty."""
+        self._input_count: Optional[int] = None
+        self._line_count: Optional[int] = None
+        self._inputs: List[List[str]] = []  # One column per input line
+        self._outputs: List[str] = []
+        self._prompts: List[Optional[str]] = []
+        self._results: array = array('I')
+        self._result_tokens: List[FinalToken] = []
+        self._result_indexes: Dict[FinalToken, int] = {}
+        self._values: List[Union[int, float, None]] = []
+        self._numbers: _NumberColumn = _NumberColumn()  # One group per sample line
+        self._number_lists: _NumberColumn = _NumberColumn()  # One group per number list
+        self._number_list_offsets: array = array('Q', [0])  # Start of each sample line's number lists
+
+    def append(self, sample: Sample):
+        """
+        Adds a sample to the store.
+
+        :param sample: The Sample to add.
+        """
+        if self._input_count is None:
+            self._input_count = len(sample.input)
+            self._line_count = len(sample.numbers)
+            self._inputs = [[] for _ in range(self._input_count)]
+        if len(sample.input) != self._input_count or len(sample.numbers) != self._line_count \
+                or len(sample.number_lists) != self._line_count:
+            raise InstructionError(
+                f"Sample {sample} does not have the same number of lines as the other samples in the store.")
+
+        for column, string in zip(self._inputs, sample.input):
+            column.append(string)
+        self._outputs.append(sample.output)
+        self._prompts.append(sample.prompt)
+        result_index: Optional[int] = self._result_indexes.get(sample.result)
+        if result_index is None:
+            result_index = len(self._result_tokens)
+            self._result_tokens.append(sample.result)
+            self._result_indexes[sample.result] = result_index
+        self._results.append(result_index)
+        self._values.append(sample.value)
+        for line in sample.numbers:
+            self._numbers.append(line)
+        for line in sample.number_lists:
+            for number_list in line:
+                self._number_lists.append(number_list)
+            self._number_list_offsets.append(len(self._number_lists))
+
+    def extend(self, samples: Iterable[Sample]):
+        """
+        Adds samples to the store.
+
+        :param samples: The Samples to add.
+        """
+        for sample in samples:
+            self.append(sample)
+
+    def extend_columns(self, inputs: List[List[str]], outputs: List[str], prompts: List[Optional[str]],
+                       numbers: List[List[List[Union[int, float]]]],
+                       number_lists: List[List[List[List[Union[int, float]]]]], results: List[FinalToken],
+                       values: List[Union[int, float, None]]):
+        """
+        Adds samples given as columns, without creating a Sample object for each one.
+
+        :param inputs: One column per input line, holding the input string of every sample.
+        :param outputs: The output string of every sample.
+        :param prompts: The prompt of every sample.
+        :param numbers: One column per line, holding the numbers of that line for every sample.
+        :param number_lists: One column per line, holding the number lists of that line for every sample.
+        :param results: The result token of every sample.
+        :param values: The value of every sample.
+        """
+        if not outputs:
+            return
+        if self._input_count is None:
+            self._input_count = len(inputs)
+            self._line_count = len(numbers)
+            self._inputs = [[] for _ in range(self._input_count)]
+        if len(inputs) != self._input_count or len(numbers) != self._line_count \
+                or len(number_lists) != self._line_count:
+            raise InstructionError("Samples do not have the same number of lines as the other samples in the store.")
+
+        # Numbers are stored sample by sample, line by line
+        number_groups: List[List[Union[int, float]]] = list(itertools.chain.from_iterable(zip(*numbers)))
+        number_list_lines: List[List[List[Union[int, float]]]] = list(itertools.chain.from_iterable(zip(*number_lists)))
+        number_list_groups: List[List[Union[int, float]]] = list(itertools.chain.from_iterable(number_list_lines))
+
+        for column, strings in zip(self._inputs, inputs):
+            column.extend(strings)
+        self._outputs.extend(outputs)
+        self._prompts.extend(prompts)
+        result_indexes: Dict[int, int] = {}
+        for result in results:
+            if id(result) not in result_indexes:
+                if result not in self._result_indexes:
+                    self._result_indexes[result] = len(self._result_tokens)
+                    self._result_tokens.append(result)
+                result_indexes[id(result)] = self._result_indexes[result]
+        self._results.extend(result_indexes[id(result)] for result in results)
+        self._values.extend(values)
+        self._numbers.extend(number_groups)
+        self._number_lists.extend(number_list_groups)
+        self._number_list_offsets.extend(itertools.islice(
+            itertools.accumulate(map(len, number_list_lines), initial=self._number_list_offsets[-1]), 1, None))
+
+    def clear(self):
+        """Removes all samples from the store."""
+        self._reset()
+        self.changes += 1
+
+    @property
+    def result_tokens(self) -> List[FinalToken]:
+        """Returns the distinct result tokens of the samples, in order of first use."""
+        return list(self._result_tokens)
+
+    def iter_by_result(self) -> Iterator[Sample]:
+        """
+        Yields the samples ordered by the value of their result token, without sorting them.
+
+        Samples with the same result value keep the order in which they were added, as with a stable sort.
+        """
+        result_values: List[str] = [token.value for token in self._result_tokens]
+        if len(set(result_values)) <= 1:
+            yield from self
+            return
+
+        buckets: Dict[str, List[int]] = {value: [] for value in sorted(set(result_values))}
+        result_buckets: List[List[int]] = [buckets[value] for value in result_values]
+        for index, result_index in enumerate(self._results):
+            result_buckets[result_index].append(index)
+        for indexes in buckets.values():
+            for index in indexes:
+                yield self._get_sample(index)
+
+    def __len__(self) -> int:
+        return len(self._outputs)
+
+    @overload
+    def __getitem__(self, index: int) -> Sample:
+        ...
+
+    @overload
+    def __getitem__(self, index: slice) -> List[Sample]:
+        ...
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[Sample, List[Sample]]:
+        if isinstance(index, slice):
+            return [self._get_sample(i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("SampleStore index out of range")
+        return self._get_sample(index)
+
+    def __iter__(self) -> Iterator[Sample]:
+        for index in range(len(self)):
+            yield self._get_sample(index)
+
+    def __eq__(self, other) -> bool:
+        """Stores are equal to other sequences of Samples with the same samples in the same order."""
+        if not isinstance(other, (SampleStore, list)):
+            return NotImplemented
+        return len(self) == len(other) and all(
+            sample.to_dict() == other_sample.to_dict() for sample, other_sample in zip(self, other))
+
+    def __repr__(self) -> str:
+        return f"SampleStore({len(self)} samples)"
+
+    def _get_sample(self, index: int) -> Sample:
+        """Builds the Sample view at a non-negative index."""
+        first_line: int = index * self._line_count
+        number_lists: List[List[List[Union[int, float]]]] = []
+        for line in range(first_line, first_line + self._line_count):
+            start: int = self._number_list_offsets[line]
+            end: int = self._number_list_offsets[line + 1]
+            number_lists.append([self._number_lists.get(group) for group in range(start, end)])
+
+        return Sample(
+            input=[column[index] for column in self._inputs],
+            output=self._outputs[index],
+            prompt=self._prompts[index],
+            numbers=[self._numbers.get(line) for line in range(first_line, first_line + self._line_count)],
+            number_lists=number_lists,
+            result=self._result_tokens[self._results[index]],
+            value=self._values[index],
+        )
@@ -1,4 +1,4 @@
-from typing import List, Union
+from typing import List, Sequence, Union
 
 from model_train_protocol.errors import InstructionError, InstructionTypeError
 from .BaseInstruction import BaseInstruction, Sample
@@ -9,6 +9,7 @@ from ..guardrails import Guardrail
 from ..tokens.FinalToken import FinalToken
 from ..tokens.TokenSet import TokenSet, Snippet
 from ... import Token
+from model_train_protocol.utils._protected import paused_garbage_collection
 
 
 class StateMachineInstruction(BaseInstruction):
@@ -95,7 +96,26 @@ class StateMachineInstruction(BaseInstruction):
         self._validate_snippets_match(inputs=input_snippets, response_snippet=output_snippet)
         self._validate_snippet_length(inputs=input_snippets, response_snippet=output_snippet)
         sample: Sample = self._create_sample(inputs=input_snippets, response_snippet=output_snippet, final=final)
-        self.samples.append(sample)
+        self._append_sample(sample)
+
+    def add_samples(self, inputs_columns: Sequence[Sequence[Union[str, Snippet]]], states: Sequence[str]):
+        """
+        Add many samples to the Instruction from column-oriented data.
+
+        Equivalent to calling add_sample() for each row, but each column is validated in a single pass. Columns may be
+        lists, tuples, arrays or pandas Series. No samples are added if any sample is invalid.
+
+        :param inputs_columns: One column per input TokenSet, each holding the input snippet or string of every sample.
+        :param states: The model's response state of every sample.
+        """
+        with paused_garbage_collection():
+            states: List[Union[str, Snippet]] = self._as_column(states)
+            sample_count: int = len(states)
+            string_columns, numbers_columns, number_lists_columns = self._enforce_sample_columns(
+                inputs_columns=inputs_columns, outputs=states)
+            self._extend_samples(string_columns=string_columns, numbers_columns=numbers_columns,
+                                 number_lists_columns=number_lists_columns, finals=[NON_TOKEN] * sample_count,
+                                 values=[None] * sample_count)
 
     def add_guardrail(self, guardrail: Guardrail, tokenset_index: int):
         """
@@ -108,4 +128,4 @@ class StateMachineInstruction(BaseInstruction):
             raise InstructionError(
                 "Guardrail must have at least 3 samples of bad inputs before being added to an Instruction.")
 
-        self.input.add_guardrail(guardrail=guardrail, tokenset_index=tokenset_index)
+        self._add_guardrail_to_input(guardrail=guardrail, tokenset_index=tokenset_index)
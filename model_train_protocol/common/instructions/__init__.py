@@ -3,6 +3,8 @@ Instruction classes for the Model Train Protocol package.
 """
 
 from .BaseInstruction import BaseInstruction
+from .SampleList import SampleList
+from .SampleStore import SampleStore
 from .output.InstructionOutput import InstructionOutput
 from .output.ExtendedResponse import ExtendedResponse
 from .Instruction import Instruction
@@ -10,6 +12,8 @@ from .ExtendedInstruction import ExtendedInstruction
 
 __all__ = [
     "BaseInstruction",
+    "SampleList",
+    "SampleStore",
     "Instruction",
     "ExtendedInstruction",
     "InstructionOutput",
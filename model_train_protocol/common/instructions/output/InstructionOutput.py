@@ -1,4 +1,4 @@
-from typing import List, Union
+from typing import List, Sequence, Union
 
 from .BaseOutput import BaseOutput
 from ...tokens.FinalNumToken import FinalNumToken
@@ -46,3 +46,42 @@ class InstructionOutput(BaseOutput):
                 raise OutputTypeError(f"Value must be an int or float. Got: {type(value)}")
 
             final.validate_number(number=value)
+
+    def validate_samples(self, values: Sequence[Union[int, float, None]], finals: Sequence[FinalToken]):
+        """
+        Validates the values and final tokens of many samples at once.
+
+        Each distinct FinalToken is checked once, and values are only checked for samples with a FinalNumToken.
+        :param values: The value of each sample.
+        :param finals: The FinalToken of each sample.
+        """
+        distinct_finals: dict[int, FinalToken] = {id(final): final for final in finals}
+        for final in distinct_finals.values():
+            if not final in self.final:
+                raise OutputError(
+                    f"FinalToken {final} is not added to the Output final tokens. Allowed finals: {self.final}")
+
+            if not isinstance(final, FinalToken):
+                raise OutputTypeError(f"Final must be an instance of FinalToken. Got: {type(final)}")
+
+        if not any(isinstance(final, FinalNumToken) for final in distinct_finals.values()):
+            return
+
+        final_values: dict[int, List[Union[int, float]]] = {}
+        for value, final in zip(values, finals):
+            if not isinstance(final, FinalNumToken):
+                continue
+
+            if value is None:
+                raise OutputError(f"FinalToken {final} requires a numeric value, but none was provided.")
+
+            if not isinstance(value, Union[int, float]):
+                raise OutputTypeError(f"Value must be an int or float. Got: {type(value)}")
+
+            final_values.setdefault(id(final), []).append(value)
+
+        # Check the bounds of all values of each FinalNumToken at once
+        for final_id, numbers in final_values.items():
+            invalid_indexes: List[int] = distinct_finals[final_id].find_invalid_numbers(numbers)
+            if invalid_indexes:
+                distinct_finals[final_id].validate_number(number=numbers[invalid_indexes[0]])
@@ -5,6 +5,7 @@ from .NumToken import NumToken
 
 
 class FinalNumToken(NumToken, FinalToken):
+    __slots__ = ()
 
     def __init__(self, value: str, min_value: Union[int, float], max_value: Union[int, float], key: Optional[str] = None,
                  desc: Optional[str] = None, *args, **kwargs):
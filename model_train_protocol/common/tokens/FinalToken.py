@@ -4,6 +4,7 @@ from .Token import Token
 
 
 class FinalToken(Token):
+    __slots__ = ()
 
     def __init__(self, value: str, key: Optional[str] = None, desc: Optional[str] = None, *args, **kwargs):
         """
@@ -5,6 +5,8 @@ from model_train_protocol.errors import TokenError
 
 
 class NumListToken(Token):
+    __slots__ = ()
+
     def __init__(self, value: str, min_value: Union[int, float], max_value: Union[int, float], length: int,
                  key: Optional[str] = None, desc: Optional[str] = None, *args, **kwargs):
         """
@@ -1,10 +1,13 @@
-from typing import Optional, Union
+from typing import Any, List, Optional, Union
 
+from .NumberBounds import NumberBounds
 from .Token import Token
 from model_train_protocol.errors import TokenError
 
 
 class NumToken(Token):
+    __slots__ = ()
+
     def __init__(self, value: str, min_value: Union[int, float], max_value: Union[int, float], key: Optional[str] = None,
                  desc: Optional[str] = None, *args, **kwargs):
         """
@@ -34,8 +37,11 @@ class NumToken(Token):
             return False
         return self.value == other.value and self.key == other.key and self.desc == other.desc and self.num == other.num and self.template_representation == other.template_representation and self.min_value == other.min_value and self.max_value == other.max_value
 
-    def __hash__(self):
-        """Hash based on the string representation of the NumToken."""
+    # Defining __eq__ removes the inherited __hash__, so the cached hash is restored explicitly
+    __hash__ = Token.__hash__
+
+    def _compute_hash(self) -> int:
+        """Hash based on the fields compared by __eq__."""
         return hash((self.value, self.key, self.desc, self.num, self.min_value, self.max_value, self.template_representation))
 
     def validate_number(self, number: Union[int, float]):
@@ -47,4 +53,13 @@ class NumToken(Token):
         """
         if not (self.min_value <= number <= self.max_value):
             raise TokenError(
-                f"Number {number} is out of bounds for token {self}. Must be between {self.min_value} and {self.max_value} (inclusive).")
\ No newline at end of file
+                f"Number {number} is out of bounds for token {self}. Must be between {self.min_value} and {self.max_value} (inclusive).")
+
+    def find_invalid_numbers(self, numbers: Any) -> List[int]:
+        """
+        Finds the numbers outside the defined min and max values, checking all of them at once.
+
+        :param numbers: A flat sequence or NumPy array of numbers.
+        :return: The indices of the numbers that are out of bounds, in ascending order.
+        """
+        return NumberBounds(min_values=[self.min_value], max_values=[self.max_value]).find_invalid_rows(numbers)
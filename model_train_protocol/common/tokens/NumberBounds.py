@@ -0,0 +1,110 @@
+from array import array
+from typing import Any, List, Sequence, Union
+
+_NOT_IMPORTED = object()
+
+# NumPy is optional and only imported on the first validation, see _numpy()
+np: Any = _NOT_IMPORTED
+
+from .NumListToken import NumListToken
+from .Token import Token
+
+
+class NumberBounds:
+    """
+    Per-column minimum and maximum values for validating many rows of numbers at once.
+
+    Rows are checked against the bounds of every column in a single vectorized operation when NumPy is installed,
+    and with the standard library array module otherwise.
+    """
+
+    def __init__(self, min_values: Sequence[Union[int, float]], max_values: Sequence[Union[int, float]]):
+        """
+        Initializes the NumberBounds.
+
+        :param min_values: The inclusive minimum of each column.
+        :param max_values: The inclusive maximum of each column.
+        """
+        if len(min_values) != len(max_values):
+            raise ValueError("min_values and max_values must have the same length.")
+        self.min_values: array = array('d', min_values)
+        self.max_values: array = array('d', max_values)
+
+    @classmethod
+    def from_tokens(cls, tokens: Sequence[Token]) -> 'NumberBounds':
+        """
+        Creates the bounds for the numbers of a sequence of tokens.
+
+        A NumToken contributes one column, and a NumListToken contributes one column per element of its list.
+        :param tokens: The NumTokens or NumListTokens, in order.
+        :return: The bounds of the concatenated numbers of the tokens.
+        """
+        min_values: List[Union[int, float]] = []
+        max_values: List[Union[int, float]] = []
+        for token in tokens:
+            width: int = token.length if isinstance(token, NumListToken) else 1
+            min_values.extend([token.min_value] * width)
+            max_values.extend([token.max_value] * width)
+        return cls(min_values=min_values, max_values=max_values)
+
+    @property
+    def width(self) -> int:
+        """Returns the number of columns."""
+        return len(self.min_values)
+
+    def find_invalid_rows(self, rows: Any) -> List[int]:
+        """
+        Finds the rows that do not match the bounds.
+
+        A row is invalid if it does not have exactly one number per column, or if any of its numbers is out of bounds
+        or not a number. For bounds with a single column, rows may also be given as a flat sequence of numbers.
+        :param rows: A matrix of numbers with one row per sample, as a NumPy array or a sequence of sequences.
+        :return: The indices of the invalid rows, in ascending order.
+        """
+        numpy = _numpy()
+        if numpy is not None:
+            matrix = self._as_matrix(rows)
+            if matrix is not None:
+                in_bounds = (matrix >= numpy.asarray(self.min_values)) & (matrix <= numpy.asarray(self.max_values))
+                return numpy.flatnonzero(~in_bounds.all(axis=1)).tolist()
+
+        if self.width == 1:
+            rows = [row if hasattr(row, "__len__") else [row] for row in rows]
+        return [index for index, row in enumerate(rows) if not self._is_valid_row(row)]
+
+    def _as_matrix(self, rows: Any):
+        """Converts rows to a two-dimensional numeric NumPy array, or returns None if they are not one."""
+        try:
+            matrix = np.asarray(rows)
+        except ValueError:  # Ragged rows
+            return None
+        if matrix.dtype.kind not in "iuf":
+            return None
+        if matrix.ndim == 1 and self.width == 1:
+            matrix = matrix.reshape(-1, 1)
+        if matrix.ndim != 2 or (matrix.shape[1] != self.width and matrix.shape[0] > 0):
+            return None
+        if matrix.shape[0] == 0:
+            return matrix.reshape(0, self.width)
+        return matrix
+
+    def _is_valid_row(self, row: Sequence[Union[int, float]]) -> bool:
+        """Checks a single row against the bounds."""
+        if len(row) != self.width:
+            return False
+        try:
+            return all(low <= number <= high for number, low, high in zip(row, self.min_values, self.max_values))
+        except TypeError:  # Not a number
+            return False
+
+
+def _numpy() -> Any:
+    """Returns the numpy module, importing it on first use, or None if it is not installed."""
+    global np
+    if np is _NOT_IMPORTED:
+        try:
+            import numpy
+        except ImportError:  # NumPy is optional, validation falls back to the standard library
+            numpy = None
+        np = numpy
+    return np
@@ -6,6 +6,8 @@ from .Token import Token
 
 
 class SpecialFinalToken(SpecialToken, FinalToken):
+    __slots__ = ()
+
     def __init__(self, value: str, key: str, desc: Optional[str] = None, special: str = None, *args, **kwargs):
         """
         Initializes a SpecialFinalToken instance.
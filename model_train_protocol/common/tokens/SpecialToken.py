@@ -4,6 +4,8 @@ from .Token import Token
 
 
 class SpecialToken(Token):
+    __slots__ = ()
+
     def __init__(self, value: str, key: str, desc: Optional[str] = None, special: str = None, *args, **kwargs):
         """
         Initializes a SpecialToken instance.
@@ -1,11 +1,22 @@
+import weakref
 from typing import Optional
 
-import emoji
-
 from model_train_protocol.errors import TokenError, TokenTypeError
+from model_train_protocol.utils._protected import find_invalid_token_char
+
+# Interned tokens by their full identity, see Token.intern()
+_INTERNED_TOKENS: weakref.WeakValueDictionary = weakref.WeakValueDictionary()
+
 
 class Token:
-    """The lowest level unit for a model. Represents a word, symbol, or concept."""
+    """
+    The lowest level unit for a model. Represents a word, symbol, or concept.
+
+    Tokens should not be changed once they are hashed, other than by assigning their key, as the hash is cached.
+    """
+    # Subclasses declare empty slots, as multiple inheritance between token classes requires a single slot layout
+    __slots__ = ("value", "_key", "desc", "num", "num_list", "min_value", "max_value", "length", "input",
+                 "template_representation", "special", "_hash", "__weakref__")
 
     def __init__(self, value: str, key: Optional[str] = None, desc: Optional[str] = None, *args, **kwargs):
         """
@@ -15,6 +26,7 @@ class Token:
         :param key: The key associated with the token, a symbol, emoji, or short string.
         :param desc: Optional description of the token. Extends the value to contextualize its use.
         """
+        self._hash: Optional[int] = None
         self.value: str = value + "_"
         self._key: Optional[str] = key
         self.desc: str = desc
@@ -38,6 +50,7 @@ class Token:
     def key(self, new_key: str):
         """Sets the key and validates it"""
         self._key = new_key
+        self._hash = None
         self.validate_key()
 
     def validate_key(self):
@@ -56,10 +69,10 @@ class Token:
         if self.key is None:
             return
 
-        for c in self.key:
-            if not (c == '_' or c.isalnum() or emoji.is_emoji(c)):
-                raise TokenError(
-                    f"Invalid character '{c}' found in key '{self.key}'. Only alphanumeric characters, underscores, and emojis recommended for general interchange by Unicode.org are allowed.")
+        c: Optional[str] = find_invalid_token_char(self.key)
+        if c is not None:
+            raise TokenError(
+                f"Invalid character '{c}' found in key '{self.key}'. Only alphanumeric characters, underscores, and emojis recommended for general interchange by Unicode.org are allowed.")
 
     def validate_value(self):
         """
@@ -73,19 +86,41 @@ class Token:
         if self.value == "" or self.value == "_":
             raise TokenError("Value cannot be an empty string.")
 
-        for c in self.value:
-            if not (c == '_' or c.isalnum() or emoji.is_emoji(c)):
-                raise TokenError(
-                    f"Invalid character '{c}' found in value '{self.value}'. Only alphanumeric characters, underscores, and emojis are allowed.")
+        c: Optional[str] = find_invalid_token_char(self.value)
+        if c is not None:
+            raise TokenError(
+                f"Invalid character '{c}' found in value '{self.value}'. Only alphanumeric characters, underscores, and emojis are allowed.")
 
     def __str__(self):
         """String representation of the token."""
         return f"Token(Value: '{self.value}', Key: '{self.key}', Num: {self.num}, Desc: {self.desc}, Special: {self.special})"
 
     def __hash__(self):
+        """Hash of the token, computed on first use and cached until the key changes."""
+        if self._hash is None:
+            self._hash = self._compute_hash()
+        return self._hash
+
+    def _compute_hash(self) -> int:
         """Hash based on the string representation of the token."""
         return hash(self.__str__())
 
+    def intern(self) -> 'Token':
+        """
+        Returns the shared instance of this token.
+
+        Interned tokens with the same class, value, key, description and settings are the same object, so comparing and
+        hashing them is an identity check. The first token interned with a given identity becomes the shared instance.
+        :return: The shared instance, which may be this token.
+        """
+        identity: tuple = tuple(self.to_dict().values())
+        existing: Optional[Token] = _INTERNED_TOKENS.get(identity)
+        # A shared instance whose key was assigned after interning no longer has this identity
+        if existing is not None and tuple(existing.to_dict().values()) == identity:
+            return existing
+        _INTERNED_TOKENS[identity] = self
+        return self
+
     def __eq__(self, other):
         """
         Defines equality based on the string.
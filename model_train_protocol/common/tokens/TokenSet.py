@@ -1,7 +1,8 @@
 from dataclasses import dataclass
-from typing import List, Sequence, Collection, Union
+from typing import Any, List, Sequence, Collection, Union
 
 from . import NumListToken
+from .NumberBounds import NumberBounds
 from .NumToken import NumToken
 from .Token import Token
 from model_train_protocol.errors import TokenSetError, TokenSetTypeError
@@ -119,6 +120,83 @@ class TokenSet:
 
         return Snippet(string=string, numbers=numbers, number_lists=number_lists, token_set_key=self.key)
 
+    def create_snippets(self, strings: Sequence[str], numbers: Any = None, number_lists: Any = None) -> List[Snippet]:
+        """
+        Create a Snippet for each of many strings, validating all of their numbers at once.
+
+        :param strings: The string of each Snippet.
+        :param numbers: A matrix with one row of numbers per string, one column per NumToken in the TokenSet.
+            Accepts a NumPy array or a sequence of sequences. May be None if the TokenSet has no NumTokens.
+        :param number_lists: One entry per string holding its number lists, one per NumListToken in the TokenSet.
+            Accepts a three-dimensional NumPy array or nested sequences. May be None if the TokenSet has no
+            NumListTokens.
+        :return: The Snippets, in the order of the strings.
+        :raises TokenSetError: If any row has the wrong number of numbers or a number out of bounds. All offending
+            rows are reported.
+        """
+        strings = list(strings)
+        if not all(isinstance(string, str) for string in strings):
+            raise TokenSetTypeError("String must be of type str.")
+
+        number_rows: List[List[Union[int, float]]] = self._validate_number_rows(
+            rows=numbers, tokens=self._num_tokens, row_count=len(strings), name="numbers")
+
+        list_lengths: List[int] = [token.length for token in self._num_list_tokens]
+        if number_lists is not None:
+            if hasattr(number_lists, "reshape"):  # NumPy arrays: flatten each row's number lists
+                if len(set(list_lengths)) != 1 or number_lists.ndim != 3 or \
+                        tuple(number_lists.shape[1:]) != (len(list_lengths), list_lengths[0]):
+                    raise TokenSetError(
+                        f"{self} requires number lists of lengths {list_lengths} but an array of shape "
+                        f"{number_lists.shape} was provided.")
+                number_lists = number_lists.reshape(len(number_lists), -1)
+            else:
+                number_lists = [
+                    [number for number_list in row for number in number_list]
+                    if len(row) == len(list_lengths) and all(
+                        len(number_list) == length for number_list, length in zip(row, list_lengths))
+                    else None
+                    for row in number_lists
+                ]
+                invalid_shapes: List[int] = [index for index, row in enumerate(number_lists) if row is None]
+                if invalid_shapes:
+                    raise TokenSetError(
+                        f"{self} requires number lists of lengths {list_lengths} but rows {invalid_shapes} do not match.")
+        flat_list_rows: List[List[Union[int, float]]] = self._validate_number_rows(
+            rows=number_lists, tokens=self._num_list_tokens, row_count=len(strings), name="number lists")
+
+        snippets: List[Snippet] = []
+        boundaries: List[int] = [0]
+        for length in list_lengths:
+            boundaries.append(boundaries[-1] + length)
+        for string, number_row, flat_list_row in zip(strings, number_rows, flat_list_rows):
+            snippets.append(Snippet(
+                string=string, numbers=number_row, token_set_key=self.key,
+                number_lists=[flat_list_row[start:end] for start, end in zip(boundaries, boundaries[1:])]))
+        return snippets
+
+    def _validate_number_rows(self, rows: Any, tokens: Sequence[Union[NumToken, NumListToken]], row_count: int,
+                              name: str) -> List[List[Union[int, float]]]:
+        """
+        Validates a matrix of numbers against the bounds of the given tokens in one operation.
+
+        :return: The rows as lists of numbers.
+        """
+        bounds: NumberBounds = NumberBounds.from_tokens(tokens)
+        if rows is None:
+            if bounds.width > 0:
+                raise TokenSetError(f"{self} requires {name} but none were provided.")
+            return [[] for _ in range(row_count)]
+
+        if len(rows) != row_count:
+            raise TokenSetError(f"{self} requires {name} for each of the {row_count} strings but {len(rows)} were provided.")
+        invalid_rows: List[int] = bounds.find_invalid_rows(rows)
+        if invalid_rows:
+            raise TokenSetError(
+                f"{self} has {name} of the wrong length or out of bounds in rows {invalid_rows}. "
+                f"Bounds: {[(token.value, token.min_value, token.max_value) for token in tokens]}.")
+        return rows.tolist() if hasattr(rows, "tolist") else [list(row) for row in rows]
+
     def get_token_key_set(self) -> str:
         """Returns a string representing the combined token keys of the individual Tokens in the TokenSet."""
         token_key_set = ''
@@ -7,6 +7,7 @@ from .FinalToken import FinalToken
 from .FinalNumToken import FinalNumToken
 from .NumToken import NumToken
 from .NumListToken import NumListToken
+from .NumberBounds import NumberBounds
 from .SpecialToken import SpecialToken
 from .SpecialToken import SpecialToken
 from .TokenSet import TokenSet, Snippet
@@ -17,6 +18,7 @@ __all__ = [
     "FinalNumToken",
     "NumToken",
     "NumListToken",
+    "NumberBounds",
     "SpecialToken",
     "TokenSet",
     "Snippet"
@@ -5,7 +5,9 @@ MTP is an open-source protocol for training custom Language Models on Databiomes
 MTP contains all the data that a model is trained on.
 """
 from .conversion import CSVConversion
+from .streaming import CSVStreamConversion
 
 __all__ = [
-    "CSVConversion"
+    "CSVConversion",
+    "CSVStreamConversion",
 ]
@@ -1,5 +1,6 @@
 from dataclasses import dataclass
-from typing import List
+from functools import cached_property
+from typing import List, Optional
 
 import pandas as pd
 
@@ -42,7 +43,7 @@ class CSVConversion:
         :param csv_data: A dictionary where keys are column names and values are lists of column data.
         """
         self.csv_data: pd.DataFrame = self._process_dataframe(csv_data)
-        self.ordered_lines: List[CSVLine] = self._format_lines()
+        self.lines: pd.DataFrame = self._format_columns()
         self.protocol: ProtocolV1 = ProtocolV1(name=protocol_name, inputs=1, encrypt=False, state_machine=True)
         self.standard_input: StateMachineInput = StateMachineInput(
             tokensets=[self.input_tokenset])
@@ -53,21 +54,23 @@ class CSVConversion:
         self._process_instruction()
         return self.protocol
 
+    @cached_property
+    def ordered_lines(self) -> List[CSVLine]:
+        """The formatted lines of the CSV data, in order."""
+        return self._format_lines()
+
     def _get_unique_states(self) -> set[str]:
         """
         Retrieves unique outputs from the CSV data.
 
         :return: A set of unique outputs.
         """
-        unique_outputs: set[str] = set()
-        for line in self.ordered_lines:
-            if line.output_str != "" and not pd.isna(line.output_str):
-                unique_outputs.add(line.output_str)
-        if "GUARDRAIL" in unique_outputs:
-            unique_outputs.remove("GUARDRAIL")
+        unique_outputs: set[str] = set(self.lines["output_str"].unique())
+        unique_outputs.discard("GUARDRAIL")
         return unique_outputs
 
-    def _process_dataframe(self, dataframe: pd.DataFrame) -> pd.DataFrame:
+    @classmethod
+    def _process_dataframe(cls, dataframe: pd.DataFrame) -> pd.DataFrame:
         """
         Processes the input DataFrame to match expected format.
 
@@ -75,43 +78,56 @@ class CSVConversion:
         :return: Processed DataFrame
         """
         # Remove rows where Input is empty
-        dataframe = dataframe[~(dataframe[self.input_col].isna())]
-        dataframe.reset_index(drop=True)
-        return dataframe
+        dataframe = dataframe[~(dataframe[cls.input_col].isna())]
+        return dataframe.reset_index(drop=True)
 
-    def _format_lines(self) -> List[CSVLine]:
+    def _format_columns(self) -> pd.DataFrame:
         """
-        Formats the DataFrame into a list of CSVLine objects.
+        Formats the DataFrame into string columns, one row per line of the CSV data.
 
-        :return: A list of CSVLine objects containing the formatted data.
+        Empty or NaN outputs inherit the output of the previous line.
+        :return: A DataFrame with the input_str, output_str and context_str columns.
         """
-        ordered_lines: List[CSVLine] = []
-        previous_line: CSVLine | None = None
-        for _, line in self.csv_data.iterrows():
-            formatted_line: CSVLine = self._format_line(previous_line, line)
-            ordered_lines.append(formatted_line)
-            previous_line = formatted_line
-        return ordered_lines
+        return self._format_chunk(self.csv_data, previous_output=None)
 
-    def _format_line(self, previous_line: CSVLine | None, line: pd.Series) -> CSVLine:
+    @classmethod
+    def _format_chunk(cls, dataframe: pd.DataFrame, previous_output: Optional[str]) -> pd.DataFrame:
         """
-        Formats a single line of the DataFrame into a CSVLine object.
+        Formats a processed chunk of CSV data into string columns, one row per line.
 
-        :param line: A pandas Series representing a single line of the DataFrame.
-        :return: A CSVLine object containing the formatted data.
+        Empty or NaN outputs inherit the output of the previous line, which for the first line of the chunk is the last
+        output of the previous chunk.
+        :param dataframe: The processed chunk.
+        :param previous_output: The last output of the previous chunk, or None for the first chunk.
+        :return: A DataFrame with the input_str, output_str and context_str columns.
         """
-        output_str: str = str(line[self.output_col])
-
-        if output_str == "nan" or output_str == "" or pd.isna(output_str):
-            if previous_line is None:
+        outputs: pd.Series = cls._as_strings(dataframe[cls.output_col])
+        missing_outputs: pd.Series = outputs.isin(["", "nan"])
+        if len(outputs) > 0 and missing_outputs.iloc[0]:
+            if previous_output is None:
                 raise ConversionError("The first line of the CSV cannot have an empty output.")
-            output_str = str(previous_line.output_str)
+            outputs.iloc[0] = previous_output
+            missing_outputs.iloc[0] = False
 
-        return CSVLine(
-            input_str=str(line[self.input_col]),
-            output_str=output_str,
-            context_str=str(line[self.context_col])
-        )
+        return pd.DataFrame({
+            "input_str": cls._as_strings(dataframe[cls.input_col]),
+            "output_str": outputs.mask(missing_outputs).ffill(),
+            "context_str": cls._as_strings(dataframe[cls.context_col]),
+        })
+
+    @classmethod
+    def _as_strings(cls, column: pd.Series) -> pd.Series:
+        """Converts a column to strings, with missing values as "nan"."""
+        return column.astype(str).where(column.notna(), "nan")
+
+    def _format_lines(self) -> List[CSVLine]:
+        """
+        Formats the DataFrame into a list of CSVLine objects.
+
+        :return: A list of CSVLine objects containing the formatted data.
+        """
+        return [CSVLine(input_str=input_str, output_str=output_str, context_str=context_str)
+                for input_str, output_str, context_str in self.lines.itertuples(index=False, name=None)]
 
     @classmethod
     def _assign_latest(cls, column: pd.Series, idx: int, latest: str) -> str:
@@ -129,34 +145,49 @@ class CSVConversion:
         Processes a single instruction and adds it to the protocol.
         """
         instruction_outputs: set[str] = self._get_unique_states()
-        guardrail = Guardrail(
+        guardrail: Guardrail = self._create_guardrail()
+        instruction: StateMachineInstruction = StateMachineInstruction(
+            input=self.standard_input, states=sorted(instruction_outputs)
+        )
+        self._add_lines(instruction=instruction, guardrail=guardrail, lines=self.lines)
+        self._add_instruction(protocol=self.protocol, instruction=instruction, guardrail=guardrail)
+
+    @classmethod
+    def _create_guardrail(cls) -> Guardrail:
+        """Creates the guardrail that collects the GUARDRAIL lines of the CSV data."""
+        return Guardrail(
             good_prompt="Prompt related to the provided context of the model",
             bad_prompt="Prompt that is irrelevant and off topic",
             bad_output="GUARDRAIL"
         )
 
-        instruction: StateMachineInstruction = StateMachineInstruction(
-            input=self.standard_input, states=list(instruction_outputs)
-        )
-
-        for line in self.ordered_lines:
+    @classmethod
+    def _add_lines(cls, instruction: StateMachineInstruction, guardrail: Guardrail, lines: pd.DataFrame) -> None:
+        """
+        Adds formatted lines to the instruction as samples, or to the guardrail as bad prompts.
 
-            if line.is_guardrail:
-                guardrail.add_sample(line.input_str)
-                continue
+        :param instruction: The instruction to add the samples and contexts to.
+        :param guardrail: The guardrail to add the GUARDRAIL lines to.
+        :param lines: The formatted lines, as returned by _format_chunk().
+        """
+        guardrail_mask: pd.Series = lines["output_str"] == "GUARDRAIL"
+        for sample in lines["input_str"][guardrail_mask]:
+            guardrail.add_sample(sample)
 
-            if line.context_str != "" and line.context_str != "nan" and not pd.isna(line.context_str):
-                instruction.add_context(line.context_str)
+        sample_lines: pd.DataFrame = lines[~guardrail_mask]
+        # Contexts are deduplicated by hash in order of first appearance
+        has_context: pd.Series = ~sample_lines["context_str"].isin(["", "nan"])
+        instruction.add_contexts(sample_lines["context_str"][has_context].unique())
 
-            instruction.add_sample(
-                input_snippets=[line.input_str],
-                state=line.output_str
-            )
+        instruction.add_samples(inputs_columns=[sample_lines["input_str"]], states=sample_lines["output_str"])
 
+    @classmethod
+    def _add_instruction(cls, protocol: ProtocolV1, instruction: StateMachineInstruction, guardrail: Guardrail) -> None:
+        """Adds the guardrail, if it has enough samples, to the instruction, and the instruction to the protocol."""
         if instruction.has_guardrails and 0 < len(guardrail.samples) < 3:
             raise GuardrailError(
                 "At least 3 guardrail samples are required. Please add more guardrail samples to the CSV data.")
         elif len(guardrail.samples) >= 3:
             instruction.add_guardrail(guardrail=guardrail, tokenset_index=0)
 
-        self.protocol.add_instruction(instruction)
+        protocol.add_instruction(instruction)
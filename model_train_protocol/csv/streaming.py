@@ -0,0 +1,85 @@
+import os
+from typing import Iterator, Optional, Union
+
+import pandas as pd
+
+from model_train_protocol import StateMachineInstruction, StateMachineInput
+from model_train_protocol.common.guardrails import Guardrail
+from model_train_protocol.errors.conversion import ConversionError
+from model_train_protocol.v1 import ProtocolV1
+from .conversion import CSVConversion
+
+
+class CSVStreamConversion:
+    """
+    Converts a CSV file into MTP in fixed-size chunks, without loading the whole file into memory.
+
+    The file is read twice: once to collect the states, which the StateMachineInstruction needs up front, and once to
+    add the samples. The forward-fill of empty outputs carries over chunk boundaries, and samples are kept in a
+    columnar SampleStore, so memory is bounded by the chunk size rather than by the file size.
+
+    Every cell is read as a string, so values are not converted to numbers differently from one chunk to another.
+    """
+    DEFAULT_CHUNK_SIZE: int = 100_000
+
+    def __init__(self, path: Union[str, os.PathLike], protocol_name: str = "CSV Protocol",
+                 chunk_size: int = DEFAULT_CHUNK_SIZE):
+        """
+        Initializes the CSVStreamConversion instance.
+
+        :param path: The path to the CSV file.
+        :param protocol_name: The name of the protocol.
+        :param chunk_size: The number of rows to read at a time.
+        """
+        if str(path).endswith(".xlsx"):
+            raise ConversionError("XLSX files cannot be read in chunks. Use CSVConversion with pd.read_excel instead.")
+        if chunk_size < 1:
+            raise ConversionError(f"chunk_size must be at least 1. Got: {chunk_size}")
+        self.path: Union[str, os.PathLike] = path
+        self.chunk_size: int = chunk_size
+        self.protocol: ProtocolV1 = ProtocolV1(name=protocol_name, inputs=1, encrypt=False, state_machine=True)
+        self.standard_input: StateMachineInput = StateMachineInput(tokensets=[CSVConversion.input_tokenset])
+
+    def to_mtp(self) -> ProtocolV1:
+        """Converts the CSV file to MTP format."""
+        instruction: StateMachineInstruction = StateMachineInstruction(
+            input=self.standard_input, states=sorted(self.get_unique_states())
+        )
+        instruction.use_sample_store()
+        guardrail: Guardrail = CSVConversion._create_guardrail()
+        for lines in self._iter_lines():
+            CSVConversion._add_lines(instruction=instruction, guardrail=guardrail, lines=lines)
+        CSVConversion._add_instruction(protocol=self.protocol, instruction=instruction, guardrail=guardrail)
+        return self.protocol
+
+    def get_unique_states(self) -> set[str]:
+        """
+        Retrieves unique outputs from the CSV file, reading only the Input and Output columns.
+
+        :return: A set of unique outputs, excluding GUARDRAIL.
+        """
+        unique_states: set[str] = set()
+        for lines in self._iter_lines(columns=[CSVConversion.input_col, CSVConversion.output_col]):
+            unique_states.update(lines["output_str"].unique())
+        unique_states.discard("GUARDRAIL")
+        return unique_states
+
+    def _iter_lines(self, columns: Optional[list[str]] = None) -> Iterator[pd.DataFrame]:
+        """
+        Reads the CSV file in chunks and formats each chunk, carrying the last output over to the next chunk.
+
+        :param columns: The columns to read. Defaults to all required columns. Columns that are not read are empty.
+        :return: An iterator over the formatted lines of each chunk.
+        """
+        columns = columns or CSVConversion.REQUIRED_COLUMNS
+        previous_output: Optional[str] = None
+        with pd.read_csv(self.path, usecols=columns, dtype=str, chunksize=self.chunk_size) as reader:
+            for chunk in reader:
+                for column in CSVConversion.REQUIRED_COLUMNS:
+                    if column not in chunk:
+                        chunk[column] = ""
+                lines: pd.DataFrame = CSVConversion._format_chunk(
+                    CSVConversion._process_dataframe(chunk), previous_output=previous_output)
+                if len(lines) > 0:
+                    previous_output = lines["output_str"].iloc[-1]
+                yield lines
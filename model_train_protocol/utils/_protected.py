@@ -2,13 +2,14 @@
 Internal utils. Not intended to be publicly exposed. Use root-level utils.py for any functions that should be public.
 """
 
+import gc
 import hashlib
-import tomllib
-from importlib import metadata
+import re
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional
-
-import emoji
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
 
 from model_train_protocol.errors.tokens import TokenError
 
@@ -26,6 +27,7 @@ def get_mtp_version() -> str:
     Return the installed package version when available.
     Falls back to the local pyproject.toml for editable/dev usage.
     """
+    from importlib import metadata  # Imported on first use, as it is slow to import
     try:
         return metadata.version("model-train-protocol")
     except metadata.PackageNotFoundError:
@@ -38,6 +40,7 @@ def get_mtp_version() -> str:
             "Could not find installed package metadata or pyproject.toml in any parent directories."
         )
 
+    import tomllib
     with open(pyproject_path, "rb") as f:
         pyproject = tomllib.load(f)
 
@@ -60,28 +63,352 @@ def convert_str_to_camel_case(snake_str: str) -> str:
     return components[0] + ''.join(x.title() for x in components[1:])
 
 
+@lru_cache(maxsize=1)
+def _invalid_token_char_pattern() -> re.Pattern:
+    """
+    Compiles a character class matching the characters that are not allowed in token values and keys.
+
+    Allowed characters are alphanumerics and underscores, which are exactly the characters matched by \\w, and the
+    single code point emojis recommended for general interchange by Unicode.org.
+    """
+    import emoji  # Imported on first use, as the emoji library is slow to import
+    code_points: List[int] = sorted(ord(character) for character in emoji.EMOJI_DATA if len(character) == 1)
+
+    # Consecutive code points are collapsed into ranges, which keeps the character class fast to match
+    ranges: List[List[int]] = []
+    for code_point in code_points:
+        if ranges and code_point == ranges[-1][1] + 1:
+            ranges[-1][1] = code_point
+        else:
+            ranges.append([code_point, code_point])
+    emoji_class: str = "".join(
+        re.escape(chr(start)) if start == end else f"{re.escape(chr(start))}-{re.escape(chr(end))}"
+        for start, end in ranges)
+    return re.compile(f"[^\\w{emoji_class}]")
+
+
+# Memo of valid token values and keys that are not only alphanumerics and underscores, cleared when full
+_VALID_TOKEN_STRINGS: Set[str] = set()
+_MAX_VALID_TOKEN_STRINGS: int = 1 << 16
+
+
+def find_invalid_token_char(string: str) -> Optional[str]:
+    """
+    Finds the first character that is not allowed in a token value or key.
+
+    Allowed characters are alphanumerics, underscores and single code point emojis. Strings with other characters are
+    checked against a precompiled character class, and valid strings are memoized, so validating the same value or
+    key again is a set lookup.
+    :param string: The token value or key.
+    :return: The first invalid character, or None if every character is allowed.
+    """
+    if string in _VALID_TOKEN_STRINGS or string.replace("_", "").isalnum():
+        return None
+    match: Optional[re.Match] = _invalid_token_char_pattern().search(string)
+    if match is not None:
+        return match.group()
+    if len(_VALID_TOKEN_STRINGS) >= _MAX_VALID_TOKEN_STRINGS:
+        _VALID_TOKEN_STRINGS.clear()
+    _VALID_TOKEN_STRINGS.add(string)
+    return None
+
+
+@lru_cache(maxsize=None)
+def _keep_comparison_char(char: str) -> bool:
+    """Whether a character is kept when comparing token strings for substring conflicts."""
+    if char.isalnum():
+        return True
+    import emoji  # Imported on first use, as the emoji library is slow to import
+    return emoji.purely_emoji(char)
+
+
+def normalize_comparison_string(string: str) -> str:
+    """
+    Normalizes a string for token substring comparison.
+
+    :param string: The input string.
+    :return: The lowercase string with only alphanumeric and emoji characters kept.
+    """
+    return ''.join(char.lower() for char in string if _keep_comparison_char(char))
+
+
+class _SubstringAutomaton:
+    """Aho–Corasick automaton matching a fixed set of patterns against any text in a single pass."""
+
+    def __init__(self, patterns: Sequence[str]):
+        """
+        Builds the automaton.
+
+        :param patterns: Distinct, non-empty patterns. Matches are reported by index into this sequence.
+        """
+        self._goto: List[Dict[str, int]] = [{}]
+        self._terminal: List[int] = [-1]  # Index of the pattern ending at each node, or -1
+        for index, pattern in enumerate(patterns):
+            node: int = 0
+            for char in pattern:
+                next_node: Optional[int] = self._goto[node].get(char)
+                if next_node is None:
+                    next_node = len(self._goto)
+                    self._goto[node][char] = next_node
+                    self._goto.append({})
+                    self._terminal.append(-1)
+                node = next_node
+            self._terminal[node] = index
+
+        # Breadth-first construction of failure links and dictionary links (nearest terminal suffix node)
+        self._fail: List[int] = [0] * len(self._goto)
+        self._dict_link: List[int] = [-1] * len(self._goto)
+        queue: deque = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                fail: int = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                child_fail: int = self._goto[fail].get(char, 0)
+                self._fail[child] = child_fail if child_fail != child else 0
+                self._dict_link[child] = child_fail if self._terminal[child_fail] >= 0 else self._dict_link[child_fail]
+                queue.append(child)
+
+    def find(self, text: str) -> Set[int]:
+        """
+        Finds every pattern occurring in the text.
+
+        :param text: The text to search.
+        :return: The indices of all patterns that occur in the text.
+        """
+        found: Set[int] = set()
+        node: int = 0
+        for char in text:
+            while node and char not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(char, 0)
+            match: int = node if self._terminal[node] >= 0 else self._dict_link[node]
+            while match >= 0 and self._terminal[match] not in found:
+                found.add(self._terminal[match])
+                match = self._dict_link[match]
+        return found
+
+
+def find_string_subset_conflicts(string_set: Iterable[str]) -> List[Tuple[str, str]]:
+    """
+    Finds every pair of strings where one is a perfect substring of the other.
+
+    Strings are compared after normalization, keeping only alphanumeric and emoji characters, case insensitive.
+    Each string is normalized once and all normalized strings are matched with a single multi-pattern automaton,
+    so the search runs in time linear in the total string length plus the number of conflicts.
+
+    :param string_set: The strings to check. Identical strings are not conflicts.
+    :return: (substring, superstring) pairs, sorted by length and then value.
+    """
+    groups: Dict[str, List[str]] = defaultdict(list)
+    for string in sorted(set(string_set), key=lambda value: (len(value), value)):
+        groups[normalize_comparison_string(string)].append(string)
+
+    conflicts: List[Tuple[str, str]] = []
+    # Distinct strings that normalize to the same value are substrings of each other
+    for strings in groups.values():
+        conflicts.extend((strings[i], strings[j]) for i in range(len(strings)) for j in range(i + 1, len(strings)))
+
+    # An empty normalized string is a substring of every other string
+    for substring in groups.get("", []):
+        conflicts.extend((substring, string) for normalized, strings in groups.items() if normalized
+                         for string in strings)
+
+    patterns: List[str] = [normalized for normalized in groups if normalized]
+    automaton: _SubstringAutomaton = _SubstringAutomaton(patterns)
+    for text_index, text in enumerate(patterns):
+        for pattern_index in automaton.find(text):
+            if pattern_index == text_index:
+                continue
+            conflicts.extend((substring, string) for substring in groups[patterns[pattern_index]]
+                             for string in groups[text])
+
+    return sorted(conflicts, key=lambda pair: (len(pair[0]), pair[0], len(pair[1]), pair[1]))
+
+
+class StringConflictIndex:
+    """
+    Incrementally maintained index for finding substring conflicts between a growing set of strings.
+
+    Strings are normalized as in validate_string_subset. A trie over the normalized strings finds the existing
+    strings contained in a new string, and a generalized suffix automaton finds whether a new string is contained
+    in any existing one, so each addition is checked in time proportional to its own length rather than the size
+    of the set.
+    """
+
+    def __init__(self):
+        """Initializes an empty StringConflictIndex."""
+        self._strings: Set[str] = set()
+        self._groups: Dict[str, List[str]] = defaultdict(list)  # Normalized string -> original strings
+        self._trie: List[Dict[str, int]] = [{}]
+        self._trie_terminal: List[Optional[str]] = [None]
+        # Generalized suffix automaton over all normalized strings
+        self._next: List[Dict[str, int]] = [{}]
+        self._link: List[int] = [-1]
+        self._length: List[int] = [0]
+
+    def __len__(self) -> int:
+        return len(self._strings)
+
+    def __contains__(self, string: str) -> bool:
+        return string in self._strings
+
+    def find_conflicts(self, string: str) -> List[Tuple[str, str]]:
+        """
+        Finds the conflicts a string would introduce without adding it.
+
+        :param string: The candidate string.
+        :return: (substring, superstring) pairs between the candidate and existing strings.
+        """
+        if string in self._strings:
+            return []
+        normalized: str = normalize_comparison_string(string)
+        conflicts: List[Tuple[str, str]] = [
+            (existing, string) if (len(existing), existing) < (len(string), string) else (string, existing)
+            for existing in self._groups.get(normalized, [])
+        ]
+
+        if not normalized:
+            conflicts.extend((string, existing) for group, strings in self._groups.items() if group
+                             for existing in strings)
+            return sorted(conflicts, key=lambda pair: (len(pair[0]), pair[0], len(pair[1]), pair[1]))
+        conflicts.extend((existing, string) for existing in self._groups.get("", []))
+
+        # Existing strings contained in the candidate: walk the trie from every start position
+        for start in range(len(normalized)):
+            node: int = 0
+            for char in normalized[start:]:
+                node = self._trie[node].get(char, -1)
+                if node < 0:
+                    break
+                terminal: Optional[str] = self._trie_terminal[node]
+                if terminal is not None and terminal != normalized:
+                    conflicts.extend((existing, string) for existing in self._groups[terminal])
+
+        # Existing strings containing the candidate. Conflicts are rare, so only enumerate them once the automaton
+        # confirms there is at least one.
+        if self._is_substring(normalized):
+            conflicts.extend((string, existing) for group, strings in self._groups.items()
+                             if group != normalized and normalized in group for existing in strings)
+
+        return sorted(set(conflicts), key=lambda pair: (len(pair[0]), pair[0], len(pair[1]), pair[1]))
+
+    def add(self, string: str):
+        """
+        Adds a string to the index.
+
+        :param string: The string to add.
+        """
+        if string in self._strings:
+            return
+        self._strings.add(string)
+        normalized: str = normalize_comparison_string(string)
+        self._groups[normalized].append(string)
+        if len(self._groups[normalized]) > 1 or not normalized:
+            return
+
+        node: int = 0
+        for char in normalized:
+            next_node: int = self._trie[node].get(char, -1)
+            if next_node < 0:
+                next_node = len(self._trie)
+                self._trie[node][char] = next_node
+                self._trie.append({})
+                self._trie_terminal.append(None)
+            node = next_node
+        self._trie_terminal[node] = normalized
+
+        last: int = 0
+        for char in normalized:
+            last = self._extend(last, char)
+
+    def _is_substring(self, normalized: str) -> bool:
+        """Whether the normalized string occurs in any normalized string in the index."""
+        state: int = 0
+        for char in normalized:
+            state = self._next[state].get(char, -1)
+            if state < 0:
+                return False
+        return True
+
+    def _new_state(self, length: int, link: int, transitions: Dict[str, int]) -> int:
+        """Creates a suffix automaton state and returns its index."""
+        self._next.append(transitions)
+        self._link.append(link)
+        self._length.append(length)
+        return len(self._next) - 1
+
+    def _clone(self, source: int, state: int, char: str) -> int:
+        """Splits state so that the transition from source on char reaches a state of length len(source) + 1."""
+        clone: int = self._new_state(self._length[source] + 1, self._link[state], dict(self._next[state]))
+        while source >= 0 and self._next[source].get(char) == state:
+            self._next[source][char] = clone
+            source = self._link[source]
+        self._link[state] = clone
+        return clone
+
+    def _extend(self, last: int, char: str) -> int:
+        """Extends the suffix automaton with one character of the string being added, returning the new last state."""
+        existing: Optional[int] = self._next[last].get(char)
+        if existing is not None:
+            if self._length[last] + 1 == self._length[existing]:
+                return existing
+            return self._clone(last, existing, char)
+
+        current: int = self._new_state(self._length[last] + 1, 0, {})
+        state: int = last
+        while state >= 0 and char not in self._next[state]:
+            self._next[state][char] = current
+            state = self._link[state]
+        if state >= 0:
+            target: int = self._next[state][char]
+            if self._length[state] + 1 == self._length[target]:
+                self._link[current] = target
+            else:
+                self._link[current] = self._clone(state, target, char)
+        return current
+
+
+def format_string_subset_conflicts(conflicts: List[Tuple[str, str]]) -> str:
+    """
+    Formats substring conflicts into an error message.
+
+    :param conflicts: (substring, superstring) pairs.
+    :return: The error message listing every conflict.
+    """
+    return ("Tokens cannot be substrings of each other (alphanumeric characters only, case insensitive).\n"
+            + "\n".join(f"'{substring}' is a substring of '{string}'" for substring, string in conflicts))
+
+
 def validate_string_subset(string_set: set[str]):
     """
     Checks if any string in a set is a perfect substring of another.
 
     :param string_set: A set of strings.
-    :raises ValueError: If any string is a perfect substring of another (case insensitive).
+    :raises TokenError: If any string is a perfect substring of another (case insensitive). All conflicts are
+        reported in the error message.
     """
-    # Sort the list by length, longest to shortest.
-    sorted_strings = sorted(list(string_set), key=len, reverse=False)
+    conflicts: List[Tuple[str, str]] = find_string_subset_conflicts(string_set)
+    if conflicts:
+        raise TokenError(format_string_subset_conflicts(conflicts))
 
-    # Iterate through the strings and check for perfect subsets.
-    for i in range(len(sorted_strings)):
-        for j in range(i + 1, len(sorted_strings)):
-            # If a shorter string is a perfect substring of a longer one, return False.
 
-            # Only keep alphanumeric characters for comparison
-            first_string: str = ''.join(c.lower() for c in sorted_strings[i] if c.isalnum() or emoji.purely_emoji(c))
-            second_string: str = ''.join(c.lower() for c in sorted_strings[j] if c.isalnum() or emoji.purely_emoji(c))
+@contextmanager
+def paused_garbage_collection() -> Iterator[None]:
+    """
+    Pauses cyclic garbage collection while building large numbers of objects in bulk.
 
-            if first_string in second_string:
-                raise TokenError(
-                    f"'Tokens cannot be substrings of each other.\n{sorted_strings[i]}' is a substring of '{sorted_strings[j]}' (alphanumeric characters only, case insensitive).")
+    Bulk loads allocate millions of small, acyclic objects, which would otherwise trigger repeated full collections
+    that dominate the load time. Collection is re-enabled afterward if it was enabled before.
+    """
+    was_enabled: bool = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if was_enabled:
+            gc.enable()
 
 
 def hash_string(key: str, output_char: int = 6) -> str:
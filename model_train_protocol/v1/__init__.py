@@ -1,9 +1,36 @@
-from model_train_protocol.v1.protocol.protocol_v1 import ProtocolV1
-from model_train_protocol.v1.protocol_file.protocol_file_v1 import ProtocolFileV1
-from model_train_protocol.v1.template_file.template_file_v1 import TemplateFileV1
+import importlib
+from typing import TYPE_CHECKING, Any, Dict, List
 
 __all__ = [
     "ProtocolV1",
     "ProtocolFileV1",
+    "ProtocolReader",
     "TemplateFileV1",
 ]
+
+# Imported on first access, as the file classes load the Pydantic schemas. Maps each name to its module.
+_LAZY_IMPORTS: Dict[str, str] = {
+    "ProtocolV1": "model_train_protocol.v1.protocol.protocol_v1",
+    "ProtocolFileV1": "model_train_protocol.v1.protocol_file.protocol_file_v1",
+    "ProtocolReader": "model_train_protocol.v1.protocol_file.protocol_reader",
+    "TemplateFileV1": "model_train_protocol.v1.template_file.template_file_v1",
+}
+
+if TYPE_CHECKING:
+    from model_train_protocol.v1.protocol.protocol_v1 import ProtocolV1
+    from model_train_protocol.v1.protocol_file.protocol_file_v1 import ProtocolFileV1
+    from model_train_protocol.v1.protocol_file.protocol_reader import ProtocolReader
+    from model_train_protocol.v1.template_file.template_file_v1 import TemplateFileV1
+
+
+def __getattr__(name: str) -> Any:
+    """Imports a public class on first access."""
+    if name not in _LAZY_IMPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value: Any = getattr(importlib.import_module(_LAZY_IMPORTS[name]), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(__all__))
@@ -4,6 +4,7 @@ from typing import Optional
 from packaging.version import Version
 
 from model_train_protocol.v1.protocol_file.base import BaseProtocolFile
+from model_train_protocol.v1.protocol_file.shards import DEFAULT_MAX_SAMPLES_PER_SHARD
 from model_train_protocol.v1.template_file.base import BaseTemplateFile
 
 
@@ -29,16 +30,38 @@ class BaseProtocol(ABC):
         """
 
     @abstractmethod
-    def save(self, name: Optional[str] = None, path: Optional[str] = None):
+    def save(self, name: Optional[str] = None, path: Optional[str] = None, stream: bool = False,
+             strict: bool = False, compact: bool = False, compression: Optional[str] = None):
         """
         Saves the protocol to a JSON file. This file can be submitted to Databiomes for model training.
 
         :param name: The name of the file (without extension). If None, uses the protocol's name.
         :param path: The directory path where the file will be saved. If None, saves in the current directory.
+        :param stream: Whether to stream tokens and samples directly to the file instead of building the full
+            protocol dictionary in memory.
+        :param strict: Whether to validate the file against the schema models before writing it.
+        :param compact: Whether to write the file without indentation or whitespace.
+        :param compression: "gzip", "xz" or "bz2" to compress the file, or None to write it uncompressed.
         """
 
     @abstractmethod
-    def template(self, path: Optional[str] = None):
+    def save_sharded(self, name: Optional[str] = None, path: Optional[str] = None,
+                     max_samples_per_shard: int = DEFAULT_MAX_SAMPLES_PER_SHARD,
+                     workers: Optional[int] = None, compact: bool = False, compression: Optional[str] = None) -> str:
+        """
+        Saves the protocol as a manifest file and shard files holding its samples.
+
+        :param name: The name the file names start with. If None, uses the protocol's name.
+        :param path: The directory path where the files will be saved. If None, saves in the current directory.
+        :param max_samples_per_shard: The maximum number of samples in each shard file.
+        :param workers: The number of processes writing shards. If None, uses one per CPU.
+        :param compact: Whether to write the files without indentation or whitespace.
+        :param compression: "gzip", "xz" or "bz2" to compress the shard files, or None to write them uncompressed.
+        :return: The path of the manifest file.
+        """
+
+    @abstractmethod
+    def template(self, path: Optional[str] = None, compact: bool = False):
         """
         Create a template JSON file for the model training protocol.
 
@@ -46,6 +69,7 @@ class BaseProtocol(ABC):
         outputs based on the defined tokens and instructions.
 
         :param path: The directory path where the template file will be saved. If None, saves in the current directory.
+        :param compact: Whether to write the file without indentation or whitespace.
         """
 
     @abstractmethod
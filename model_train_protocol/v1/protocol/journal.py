@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+import json
+import os
+from typing import TYPE_CHECKING, Any, Iterable, Iterator, List, Set
+
+from model_train_protocol.common.guardrails import Guardrail
+from model_train_protocol.common.instructions.BaseInstruction import BaseInstruction, Sample
+from model_train_protocol.common.instructions.SampleStore import SampleStore
+from model_train_protocol.common.tokens.Token import Token
+from model_train_protocol.errors import ProtocolError
+from model_train_protocol.v1.protocol.packing import get_token_info
+
+if TYPE_CHECKING:
+    from model_train_protocol.v1.protocol.protocol_v1 import ProtocolV1
+
+# Record kinds, the first item of each record
+PROTOCOL_RECORD: str = "protocol"  # The protocol settings, always the first record
+CONTEXT_RECORD: str = "context"  # A line of protocol context
+TOKEN_RECORD: str = "token"  # A token added to the protocol
+FINAL_RECORD: str = "final"  # A final token used by samples before it is added to the protocol, if ever
+INSTRUCTION_RECORD: str = "instruction"  # An instruction added to the protocol, with its samples and guardrails
+SAMPLES_RECORD: str = "samples"  # Samples added to an instruction of the protocol
+GUARDRAIL_RECORD: str = "guardrail"  # A guardrail added to an instruction of the protocol
+INSTRUCTION_CONTEXT_RECORD: str = "instruction_context"  # Lines of context added to an instruction of the protocol
+
+
+class ProtocolJournal:
+    """
+    Append-only log of the changes made to a Protocol and its Instructions.
+
+    Each accepted change is appended to the file as a record, one line of compact JSON, and flushed before the call
+    that made it returns. ProtocolV1.replay() rebuilds the Protocol from the records without revalidating them. A record
+    cut short by a crash is incomplete and is discarded when the journal is replayed.
+
+    Changes made through add_context(), add_instruction() and the add_sample(), add_samples(), add_guardrail() and
+    add_context() methods of added Instructions are recorded. Attributes assigned directly are not.
+    """
+
+    def __init__(self, path: str, fsync: bool = False, token_values: Iterable[str] = ()):
+        """
+        Initializes the ProtocolJournal, opening the file for appending.
+
+        :param path: The path to the journal file.
+        :param fsync: Whether to also force each record to disk with os.fsync(). Flushed records survive the process
+            crashing either way; fsync also protects them from the operating system crashing, but is much slower.
+        :param token_values: The values of the tokens already recorded in the file.
+        """
+        self.path: str = path
+        self.fsync: bool = fsync
+        self._token_values: Set[str] = set(token_values)
+        self._file = open(path, 'a', encoding="utf-8")
+
+    def record_protocol(self, protocol: ProtocolV1):
+        """Records the settings of a new Protocol."""
+        self._write([PROTOCOL_RECORD, {
+            "encrypted": protocol.encrypt,
+            "inputs": protocol.input_count,
+            "name": protocol.name,
+            "state_machine": protocol.state_machine,
+            "version": str(protocol.bloom_version),
+        }])
+
+    def record_context(self, context: str):
+        """Records a line of context added to the Protocol."""
+        self._write([CONTEXT_RECORD, context])
+
+    def record_token(self, token: Token):
+        """Records a token added to the Protocol."""
+        self._token_values.add(token.value)
+        self._write([TOKEN_RECORD, token.value, get_token_info(token)])
+
+    def record_instruction(self, instruction: BaseInstruction):
+        """Records an Instruction added to the Protocol, with its samples and guardrails."""
+        for token_set in instruction.get_token_sets():
+            self._record_final_tokens(token_set.tokens)
+        self._record_final_tokens(instruction.output.final or [])
+        self._write([INSTRUCTION_RECORD, {
+            "context": instruction.context,
+            "final": [token.value for token in instruction.output.final or []],
+            "guardrails": instruction.serialize_guardrails(),
+            "name": instruction.name,
+            "samples": self._get_sample_dicts(instruction.samples),
+            "set": instruction.serialize_memory_set(),
+            "store": isinstance(instruction.samples, SampleStore),
+        }])
+
+    def record_samples(self, instruction: BaseInstruction, samples: List[Sample]):
+        """Records samples added to an Instruction of the Protocol."""
+        self._write([SAMPLES_RECORD, instruction.name, self._get_sample_dicts(samples)])
+
+    def record_guardrail(self, instruction: BaseInstruction, guardrail: Guardrail, tokenset_index: int):
+        """Records a guardrail added to an Instruction of the Protocol."""
+        guardrail_dict: dict = guardrail.to_dict()
+        guardrail_dict["index"] = tokenset_index
+        self._write([GUARDRAIL_RECORD, instruction.name, guardrail_dict])
+
+    def record_instruction_context(self, instruction: BaseInstruction, contexts: List[str]):
+        """Records lines of context added to an Instruction of the Protocol."""
+        self._write([INSTRUCTION_CONTEXT_RECORD, instruction.name, contexts])
+
+    def close(self):
+        """Closes the journal file."""
+        self._file.close()
+
+    @classmethod
+    def read(cls, path: str) -> Iterator[list]:
+        """
+        Reads the complete records of a journal file, in order.
+
+        :param path: The path to the journal file.
+        :return: An iterator of the records. An incomplete last record is skipped.
+        """
+        with open(path, 'rb') as file:
+            for number, line in enumerate(file, start=1):
+                if not line.endswith(b"\n"):
+                    return
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError as e:
+                    raise ProtocolError(f"Invalid record on line {number} of journal '{path}': {e}")
+
+    @classmethod
+    def discard_incomplete_record(cls, path: str):
+        """
+        Truncates an incomplete last record from a journal file, so new records start on a line of their own.
+
+        :param path: The path to the journal file.
+        """
+        with open(path, 'rb+') as file:
+            size: int = file.seek(0, os.SEEK_END)
+            position: int = size
+            while position > 0:
+                chunk_start: int = max(0, position - (1 << 16))
+                file.seek(chunk_start)
+                newline: int = file.read(position - chunk_start).rfind(b"\n")
+                if newline != -1:
+                    position = chunk_start + newline + 1
+                    break
+                position = chunk_start
+            if position != size:
+                file.truncate(position)
+
+    def _record_final_tokens(self, tokens: Iterable[Token]):
+        """Records the tokens that have not been recorded yet, so records referencing them by value can be replayed."""
+        for token in tokens:
+            if token.value not in self._token_values:
+                self._token_values.add(token.value)
+                self._write([FINAL_RECORD, token.value, get_token_info(token)])
+
+    def _get_sample_dicts(self, samples: Iterable[Sample]) -> List[dict]:
+        """Serializes samples, recording their result tokens first if needed."""
+        sample_dicts: List[dict] = []
+        for sample in samples:
+            if sample.result.value not in self._token_values:
+                self._record_final_tokens([sample.result])
+            sample_dicts.append(sample.to_dict())
+        return sample_dicts
+
+    def _write(self, record: List[Any]):
+        """Appends a record to the journal file and flushes it."""
+        self._file.write(json.dumps(record, separators=(",", ":"), ensure_ascii=False) + "\n")
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
@@ -0,0 +1,90 @@
+from array import array
+from typing import Any, Dict, Iterable, List, Optional
+
+from model_train_protocol.common.instructions.BaseInstruction import Sample
+from model_train_protocol.common.tokens.Token import Token
+
+# Version of the packed protocol layout, stored in every pickled protocol
+PACKED_FORMAT_VERSION: int = 1
+
+
+def get_token_info(token: Token) -> Dict[str, Any]:
+    """Returns the settings of a token without its value, with keys in alphabetical order as in protocol files."""
+    token_dict: dict = token.to_dict()
+    return {key: token_dict[key] for key in sorted(token_dict.keys()) if key != "value"}
+
+
+def pack_samples(samples: Iterable[Sample]) -> Dict[str, Any]:
+    """
+    Packs samples into columns of plain values, which pickle much faster and smaller than Sample objects.
+
+    Result tokens are stored once, by value, with an index per sample. Columns that are empty for every sample, such as
+    the numbers of samples without NumTokens, are stored as None.
+    :param samples: The samples to pack.
+    :return: The packed samples, for unpack_samples().
+    """
+    result_indexes: Dict[str, int] = {}
+    results: array = array('I')
+    inputs: List[List[str]] = []
+    outputs: List[str] = []
+    prompts: List[Optional[str]] = []
+    numbers: List[List[list]] = []
+    number_lists: List[List[list]] = []
+    values: List[Any] = []
+    line_count: int = 0
+    for sample in samples:
+        if not outputs:
+            inputs = [[] for _ in sample.input]
+            line_count = len(sample.numbers)
+        for column, string in zip(inputs, sample.input):
+            column.append(string)
+        outputs.append(sample.output)
+        prompts.append(sample.prompt)
+        numbers.append(sample.numbers)
+        number_lists.append(sample.number_lists)
+        values.append(sample.value)
+        result_index: Optional[int] = result_indexes.get(sample.result.value)
+        if result_index is None:
+            result_indexes[sample.result.value] = result_index = len(result_indexes)
+        results.append(result_index)
+
+    return {
+        "inputs": inputs,
+        "outputs": outputs,
+        "prompts": prompts if any(prompt is not None for prompt in prompts) else None,
+        "numbers": numbers if any(line for sample_numbers in numbers for line in sample_numbers) else None,
+        "number_lists": number_lists if any(line for sample_lists in number_lists for line in sample_lists) else None,
+        "values": values if any(value is not None for value in values) else None,
+        "line_count": line_count,
+        "result_values": list(result_indexes),
+        "results": results.tobytes(),
+    }
+
+
+def unpack_samples(packed: Dict[str, Any], tokens: Dict[str, Token]) -> List[Sample]:
+    """
+    Unpacks samples packed by pack_samples().
+
+    :param packed: The packed samples.
+    :param tokens: The result tokens of the samples, by value.
+    :return: The samples, in order.
+    """
+    outputs: List[str] = packed["outputs"]
+    sample_count: int = len(outputs)
+    line_count: int = packed["line_count"]
+    result_tokens: List[Token] = [tokens[value] for value in packed["result_values"]]
+    results: array = array('I')
+    results.frombytes(packed["results"])
+    inputs: Iterable[tuple] = zip(*packed["inputs"]) if packed["inputs"] else (() for _ in range(sample_count))
+    prompts: Iterable[Optional[str]] = packed["prompts"] or [None] * sample_count
+    values: Iterable[Any] = packed["values"] or [None] * sample_count
+    numbers: Iterable[List[list]] = packed["numbers"] or ([[] for _ in range(line_count)] for _ in range(sample_count))
+    number_lists: Iterable[List[list]] = packed["number_lists"] or \
+        ([[] for _ in range(line_count)] for _ in range(sample_count))
+
+    return [
+        Sample(input=list(sample_inputs), output=output, prompt=prompt, numbers=sample_numbers,
+               number_lists=sample_number_lists, result=result_tokens[result], value=value)
+        for sample_inputs, output, prompt, sample_numbers, sample_number_lists, result, value in zip(
+            inputs, outputs, prompts, numbers, number_lists, results, values)
+    ]
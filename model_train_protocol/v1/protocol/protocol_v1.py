@@ -1,10 +1,11 @@
 from __future__ import annotations
 
+import itertools
 import json
+import math
 import os
-from typing import List, Optional, Set, Dict, Union
+from typing import TYPE_CHECKING, Collection, Iterable, List, Optional, Set, Dict, Union
 
-from model_train_protocol_schemas.structures.protocol import Protocol as PydanticProtocol
 from packaging.version import Version
 
 from model_train_protocol import Token, FinalToken, Guardrail, Instruction, InstructionInput, InstructionOutput, Snippet
@@ -12,17 +13,43 @@ from model_train_protocol.common.constants import BOS_TOKEN, EOS_TOKEN, RUN_TOKE
     MINIMUM_TOTAL_CONTEXT_LINES, PER_FINAL_TOKEN_SAMPLE_MINIMUM, TokenTypeEnum, \
     MAXIMUM_CHARACTERS_PER_MODEL_CONTEXT_LINE
 from model_train_protocol.common.instructions.BaseInstruction import BaseInstruction, Sample
+from model_train_protocol.common.instructions.SampleStore import SampleStore
 from model_train_protocol.common.instructions.StateMachineInstruction import StateMachineInstruction
 from model_train_protocol.common.instructions.input.StateMachineInput import StateMachineInput
 from model_train_protocol.common.tokens import TokenSet
 from model_train_protocol.common.tokens.SpecialToken import SpecialToken
-from model_train_protocol.errors import ProtocolError, ProtocolTypeError, StateMachineError
-from model_train_protocol.utils._protected import validate_string_subset, hash_string
+from model_train_protocol.errors import ProtocolError, ProtocolFileError, ProtocolTypeError, StateMachineError, \
+    TokenError
+from model_train_protocol.utils._protected import (
+    StringConflictIndex,
+    find_string_subset_conflicts,
+    format_string_subset_conflicts,
+    hash_string,
+    validate_string_subset,
+)
 from model_train_protocol.v1.protocol.base import BaseProtocol
-from model_train_protocol.v1.protocol_file.protocol_file_v1 import ProtocolFileV1
-from model_train_protocol.v1.template_file.template_file_v1 import TemplateFileV1
+from model_train_protocol.v1.protocol.journal import CONTEXT_RECORD, FINAL_RECORD, GUARDRAIL_RECORD, \
+    INSTRUCTION_CONTEXT_RECORD, INSTRUCTION_RECORD, PROTOCOL_RECORD, SAMPLES_RECORD, TOKEN_RECORD, ProtocolJournal
+from model_train_protocol.v1.protocol.packing import PACKED_FORMAT_VERSION, get_token_info, pack_samples, \
+    unpack_samples
+from model_train_protocol.v1.protocol_file.checksum import CHECKSUM_FIELD, verify_document_checksum, \
+    verify_file_checksum
+from model_train_protocol.v1.protocol_file.compression import COMPRESSION_SUFFIXES, open_for_reading, \
+    open_for_writing, validate_compression
+from model_train_protocol.v1.protocol_file.fragment_cache import FragmentCache
+from model_train_protocol.v1.protocol_file.json_encoder import INDENT, JSON_BACKEND, JSONEncoder
+from model_train_protocol.v1.protocol_file.offset_index import DEFAULT_INDEX_INTERVAL, remove_index, write_index
+from model_train_protocol.v1.protocol_file.segments import Segment, read_segments, remove_segments, \
+    verify_segment_chain, write_segment
+from model_train_protocol.v1.protocol_file.shards import DEFAULT_MAX_SAMPLES_PER_SHARD, get_manifest_filename, \
+    iter_shards, write_sharded
+from model_train_protocol.v1.protocol_file.stream_reader import JSONStreamReader
 from model_train_protocol.v1.utils import get_default_protocol_version
 
+if TYPE_CHECKING:
+    from model_train_protocol.v1.protocol_file.protocol_file_v1 import ProtocolFileV1
+    from model_train_protocol.v1.template_file.template_file_v1 import TemplateFileV1
+
 
 class BloomUtils:
     """Helper class for converting bloom files into Protocol objects"""
@@ -45,19 +72,113 @@ class BloomUtils:
     @classmethod
     def add_tokens(cls, protocol_file: dict, protocol: ProtocolV1, tokens: dict[str, Token]):
         """Adds tokens to instructions"""
-        # Add tokens
         for token_value, token_info in protocol_file["tokens"].items():
-            token_value = token_value[:-1] if token_value[-1] == "_" else token_value
-            token_class: type[Token] = TokenTypeEnum[token_info["type"]]
-            token: Token = token_class(value=token_value, **token_info)
-            protocol._add_token(token)
-            tokens[token.value] = token
+            cls.add_token(token_value=token_value, token_info=token_info, protocol=protocol, tokens=tokens)
+
+    @classmethod
+    def add_token(cls, token_value: str, token_info: dict, protocol: ProtocolV1, tokens: dict[str, Token]):
+        """Adds a single token from its bloom file representation to the protocol."""
+        token: Token = cls.create_token(token_value=token_value, token_info=token_info)
+        protocol._add_token(token)
+        tokens[token.value] = token
+
+    @classmethod
+    def create_token(cls, token_value: str, token_info: dict) -> Token:
+        """Creates a single token from its bloom file representation."""
+        token_value = token_value[:-1] if token_value[-1] == "_" else token_value
+        token_class: type[Token] = TokenTypeEnum[token_info["type"]]
+        # Interned, so protocols loaded from the same file share their tokens
+        return token_class(value=token_value, **token_info).intern()
+
+    @classmethod
+    def create_instruction(cls, instruction: dict, index: int, state_machine: bool,
+                           tokens: dict[str, Token]) -> tuple[BaseInstruction, List[TokenSet]]:
+        """
+        Creates an Instruction from a bloom file instruction set, without its samples or guardrails.
+
+        Final tokens are registered on the Instruction output as samples are added by add_sample_to_instruction.
+        :return: Tuple of (the Instruction, the TokenSets of the instruction set in order)
+        """
+        tokensets: List[TokenSet] = []
+        for token_set in instruction["set"]:
+            tokensets.append(TokenSet([tokens[token_value] for token_value in token_set]))
+
+        protocol_instruction: BaseInstruction
+        if state_machine:
+            # The saved response TokenSet replaces the one generated from the states, so no states are needed here
+            protocol_instruction = StateMachineInstruction(
+                input=StateMachineInput(tokensets=tokensets[:-1]),
+                states=[],
+            )
+            protocol_instruction.output.tokenset = tokensets[-1]
+            protocol_instruction.context = instruction["context"]
+        else:
+            protocol_instruction = Instruction(
+                name=instruction.get("name", f"Instruction_{index}"),
+                input=InstructionInput(tokensets=tokensets[:-1]),
+                output=InstructionOutput(tokenset=tokensets[-1], final=[]),
+                context=instruction["context"]
+            )
+
+        return protocol_instruction, tokensets
+
+    @classmethod
+    def add_sample_to_instruction(cls, protocol_instruction: BaseInstruction, tokensets: List[TokenSet],
+                                  sample: dict, tokens: dict[str, Token], trusted: bool = False):
+        """
+        Adds a single sample from its bloom file representation to an Instruction.
+
+        :param trusted: Whether the sample comes from a checksum-verified valid file. Trusted samples are
+            constructed directly without being revalidated against the Instruction's TokenSets.
+        """
+        numbers: List[List[int]] = sample["numbers"]
+        number_lists: List[List[List[int]]] = sample["number_lists"]
+        strings: List[str] = sample["strings"]
+
+        if trusted:
+            result_token: FinalToken = tokens[sample["result"]]  # type: ignore
+            if not isinstance(protocol_instruction, StateMachineInstruction) and \
+                    result_token not in protocol_instruction.output.final:
+                protocol_instruction.output.final.append(result_token)
+            protocol_instruction.samples.append(
+                Sample(input=strings[:-1], output=strings[-1], prompt=sample["prompt"], numbers=numbers,
+                       number_lists=number_lists, result=result_token, value=sample["value"]))
+            return
+
+        inputs_snippets: List[Snippet] = []
+        for i, sample_input in enumerate(strings[:-1]):
+            inputs_snippets.append(
+                tokensets[i].create_snippet(string=sample_input,
+                                            number_lists=number_lists[i] if len(number_lists[i]) > 0 else None,
+                                            numbers=numbers[i] if len(numbers[i]) > 0 else None))
+
+        if isinstance(protocol_instruction, StateMachineInstruction):
+            protocol_instruction.add_sample(input_snippets=inputs_snippets, state=strings[-1])
+            return
+
+        outputs_snippet: Snippet = tokensets[-1].create_snippet(
+            string=strings[-1],
+            number_lists=number_lists[-1] if len(number_lists[-1]) > 0 else None,
+            numbers=numbers[-1] if len(numbers[-1]) > 0 else None
+        )
+
+        final_token: FinalToken = tokens[sample["result"]]  # type: ignore
+        if final_token not in protocol_instruction.output.final:
+            protocol_instruction.output.final.append(final_token)
+
+        protocol_instruction.add_sample(
+            input_snippets=inputs_snippets,
+            output_snippet=outputs_snippet,
+            output_value=sample["value"],
+            final=final_token,
+        )
 
 
 class ProtocolV1(BaseProtocol):
     """Model Train Protocol (MTP) class for creating the training configuration."""
 
-    def __init__(self, name: str, inputs: int, encrypt: bool = True, state_machine: bool = False, version: Optional[Version | str] = None):
+    def __init__(self, name: str, inputs: int, encrypt: bool = True, state_machine: bool = False, version: Optional[Version | str] = None,
+                 journal: Optional[str] = None, fsync: bool = False):
         """
         Initialize the Model Train Protocol (MTP)
 
@@ -66,6 +187,9 @@ class ProtocolV1(BaseProtocol):
         :param encrypt: Whether to encrypt Tokens with unspecified with hashed keys. Default is True.
         :param state_machine: Whether this Protocol is training a state machine with defined states / outputs.
         :param version: The version of the Bloom file. If None, defaults to the latest version.
+        :param journal: Optional path to a new journal file. Every change made to the protocol and its instructions is
+            appended to the journal as it is accepted, and replay() rebuilds the protocol from it, e.g. after a crash.
+        :param fsync: Whether to force each journal record to disk, which also survives operating system crashes.
         """
         self.name: str = name
         self.input_count: int = inputs  # Number of lines in instruction samples
@@ -79,11 +203,27 @@ class ProtocolV1(BaseProtocol):
         self.context: List[str] = []
         self.tokens: Set[Token] = set()
         self.instructions: Set[BaseInstruction] = set()
+        self._instructions_by_name: Dict[str, BaseInstruction] = dict()
         self.guardrails: Dict[str, List[str]] = dict()
         self.numbers: Dict[str, str] = dict()
         self.special_tokens: Set[Token] = set()
         self.used_keys: Set[str] = set()
         self.has_guardrails: bool = False
+        self._value_index: StringConflictIndex = StringConflictIndex()
+        self._key_index: StringConflictIndex = StringConflictIndex()
+        # Validation state, so validate_protocol() only rechecks what changed since its last successful pass
+        self._tokens_revision: int = 0
+        self._validated_tokens_state: Optional[tuple] = None
+        self._validated_instructions: Dict[BaseInstruction, tuple] = dict()
+        self._validated_state: Optional[tuple] = None
+        self._journal: Optional[ProtocolJournal] = None
+        self._fragment_cache: Optional[FragmentCache] = None
+        if journal is not None:
+            if os.path.exists(journal) and os.path.getsize(journal) > 0:
+                raise ProtocolError(
+                    f"Journal '{journal}' already has records. Use ProtocolV1.replay() to resume the protocol.")
+            self._journal = ProtocolJournal(journal, fsync=fsync)
+            self._journal.record_protocol(self)
 
     @property
     def bloom_version(self) -> Version:
@@ -91,99 +231,560 @@ class ProtocolV1(BaseProtocol):
         return self._version
 
     @classmethod
-    def from_json(cls, protocol_file: dict) -> 'ProtocolV1':
+    def from_json(cls, protocol_file: dict, trusted: bool = False) -> 'ProtocolV1':
         """
         Loads a Protocol from a JSON representation.
 
-        Does NOT require a protocol to be valid.
+        Does NOT require a protocol to be valid, unless loading in trusted mode.
         :param protocol_file: The JSON representation of the Protocol.
+        :param trusted: Whether to skip per-sample revalidation. Only allowed for valid protocol files whose
+            embedded checksum matches their contents, i.e. unmodified files written by save().
         :return: A Protocol instance.
         """
-        for field in PydanticProtocol.model_fields.keys():
-            if field not in protocol_file:
-                raise ProtocolError(f"Missing required field '{field}' in protocol JSON.")
-
-        name: str = protocol_file["name"]
-        inputs: int = protocol_file["inputs"]
-        encrypt: bool = protocol_file["encrypted"]
-
-        state_machine: bool = protocol_file["state_machine"]
-        protocol = ProtocolV1(name=name, inputs=inputs, encrypt=encrypt, state_machine=state_machine)
-        protocol.context = protocol_file["context"]
-
+        cls._validate_required_fields(protocol_file.keys())
+        if trusted:
+            cls._assert_trusted(valid=protocol_file["valid"], checksum_matches=verify_document_checksum(protocol_file))
+        protocol: ProtocolV1 = cls._create_from_header(protocol_file)
         tokens: dict[str, Token] = {}
 
-        if state_machine:
-            return cls._load_state_machine_protocol(protocol_file=protocol_file, protocol=protocol, tokens=tokens)
-
         # Add tokens
         BloomUtils.add_tokens(protocol_file=protocol_file, protocol=protocol, tokens=tokens)
 
         # Add instructions
-        instruction_info = protocol_file["instruction"]
-        for i, instruction in enumerate(instruction_info["sets"]):
-            if "name" in instruction:
-                instruction_name = instruction["name"]
-            else:
-                instruction_name = f"Instruction_{i}"
-            context: List[str] = instruction["context"]
-            tokensets: List[TokenSet] = []
-            final_tokens: List[FinalToken] = []
-            for token_set in instruction["set"]:
-                tokensets.append(TokenSet([tokens[token_value] for token_value in token_set]))
-
-            samples: List[Sample] = []
+        for i, instruction in enumerate(protocol_file["instruction"]["sets"]):
+            protocol_instruction, tokensets = BloomUtils.create_instruction(
+                instruction=instruction, index=i, state_machine=protocol.state_machine, tokens=tokens)
+
             for sample in instruction["samples"]:
-                input_lines: List[str] = sample["strings"][:-1]
-                output_line: str = sample["strings"][-1]
-                result_token: FinalToken = tokens[sample["result"]]  # type: ignore
-                final_tokens.append(result_token)
-                samples.append(Sample(input=input_lines, output=output_line, prompt=None, numbers=sample["numbers"],
-                                      number_lists=sample["number_lists"], result=result_token, value=sample["value"]))
-
-            instr_input: InstructionInput = InstructionInput(
-                tokensets=tokensets[:-1],
-            )
+                BloomUtils.add_sample_to_instruction(protocol_instruction=protocol_instruction, tokensets=tokensets,
+                                                     sample=sample, tokens=tokens, trusted=trusted)
 
-            instr_output: InstructionOutput = InstructionOutput(
-                tokenset=tokensets[-1],
-                final=final_tokens,
-            )
+            # Add guardrails
+            BloomUtils.add_guardrails_to_instruction(protocol_instruction=protocol_instruction, instruction=instruction)
+            protocol._add_loaded_instruction(instruction=protocol_instruction, tokensets=tokensets, trusted=trusted)
 
-            protocol_instruction: Instruction = Instruction(
-                name=instruction_name,
-                input=instr_input,
-                output=instr_output,
-                context=context
-            )
+        return protocol
 
-            for sample in samples:
-                inputs_snippets: List[Snippet] = []
-                for i, sample_input in enumerate(sample.input):
-                    inputs_snippets.append(
-                        tokensets[i].create_snippet(string=sample_input, number_lists=sample.number_lists[i] if len(
-                            sample.number_lists[i]) > 0 else None,
-                                                    numbers=sample.numbers[i] if len(sample.numbers[i]) > 0 else None))
-
-                outputs_snippet: Snippet = tokensets[-1].create_snippet(
-                    string=sample.output,
-                    number_lists=sample.number_lists[-1] if len(sample.number_lists[-1]) > 0 else None
-                    , numbers=sample.numbers[-1] if len(sample.numbers[-1]) > 0 else None
-                )
+    @classmethod
+    def load(cls, path: str, trusted: bool = False) -> 'ProtocolV1':
+        """
+        Loads a Protocol from a saved bloom file, parsing the file incrementally.
+
+        Tokens are built first, then each instruction set is rebuilt sample by sample directly from the file stream,
+        so neither the raw JSON document nor the full list of sample dictionaries is ever held in memory. Files
+        compressed with gzip, xz or bz2 are detected from their leading bytes and decompressed as they are read.
+        Samples appended to the file by append_samples() are added after the samples of their instruction set.
+
+        Does NOT require a protocol to be valid, unless loading in trusted mode.
+        :param path: The path to the bloom file.
+        :param trusted: Whether to skip per-sample revalidation. Only allowed for valid protocol files whose
+            embedded checksum matches their contents, i.e. unmodified files written by save(), and whose appended
+            segment files are likewise valid and unmodified.
+        :return: A Protocol instance.
+        """
+        segments: List[Segment] = read_segments(path, trusted=trusted)
+        if trusted and segments and not segments[-1].valid:
+            raise ProtocolError(
+                f"Protocol file '{path}' is not valid with the samples appended to it. Only valid protocol files can be "
+                f"loaded in trusted mode.")
+        with open_for_reading(path) as file:
+            checksum_matches: bool = trusted and verify_file_checksum(file)
+            file.seek(0)
+            reader: JSONStreamReader = JSONStreamReader(file)
+            header: dict = {}
+            protocol: Optional[ProtocolV1] = None
+            tokens: dict[str, Token] = {}
+            instruction_offset: Optional[int] = None
+            for key in reader.iter_object():
+                if key != "instruction":
+                    header[key] = reader.read_value()
+                elif cls._is_header_complete(header):
+                    # Saved files place the instruction sets last, so they can be loaded in the same pass
+                    protocol = cls._create_from_loaded_header(header=header, tokens=tokens, trusted=trusted,
+                                                              checksum_matches=checksum_matches, segments=segments)
+                    cls._load_instruction(reader=reader, protocol=protocol, tokens=tokens, trusted=trusted,
+                                          segments=segments)
+                else:
+                    instruction_offset = reader.tell()
+                    reader.skip_value()
+
+            if protocol is None:
+                cls._validate_required_fields(
+                    list(header.keys()) + (["instruction"] if instruction_offset is not None else []))
+                protocol = cls._create_from_loaded_header(header=header, tokens=tokens, trusted=trusted,
+                                                          checksum_matches=checksum_matches, segments=segments)
+                reader.seek(instruction_offset)
+                cls._load_instruction(reader=reader, protocol=protocol, tokens=tokens, trusted=trusted,
+                                      segments=segments)
+
+        verify_segment_chain(path, checksum=header.get(CHECKSUM_FIELD), segments=segments)
+        return protocol
 
-                final_token: FinalToken = sample.result
+    @classmethod
+    def load_sharded(cls, path: str, trusted: bool = False, workers: Optional[int] = None) -> 'ProtocolV1':
+        """
+        Loads a Protocol saved by save_sharded() from its manifest and shard files.
 
-                protocol_instruction.add_sample(
-                    input_snippets=inputs_snippets,
-                    output_snippet=outputs_snippet,
-                    output_value=sample.value,
-                    final=final_token,
-                )
+        Shard files are read and parsed in parallel by a process pool, and their samples are added to each
+        instruction set in manifest order, so the Protocol is the same as one loaded from the equivalent single file.
 
-            # Add guardrails
+        Does NOT require a protocol to be valid, unless loading in trusted mode.
+        :param path: The path to the manifest file.
+        :param trusted: Whether to skip per-sample revalidation. Only allowed for valid protocols whose manifest and
+            shard files are unmodified, i.e. whose checksums match their contents and the checksums in the manifest.
+        :param workers: The number of processes reading shards. If None, uses one per CPU, up to the number of shards.
+        :return: A Protocol instance.
+        """
+        with open_for_reading(path) as file:
+            checksum_matches: bool = trusted and verify_file_checksum(file)
+            file.seek(0)
+            manifest: dict = json.load(file)
+        cls._validate_required_fields(manifest.keys())
+        if trusted:
+            cls._assert_trusted(valid=manifest["valid"], checksum_matches=checksum_matches)
+        protocol: ProtocolV1 = cls._create_from_header(manifest)
+        tokens: dict[str, Token] = {}
+        BloomUtils.add_tokens(protocol_file=manifest, protocol=protocol, tokens=tokens)
+
+        instruction_sets: List[dict] = manifest["instruction"]["sets"]
+        protocol_instructions: List[tuple[BaseInstruction, List[TokenSet]]] = [
+            BloomUtils.create_instruction(instruction=instruction, index=i, state_machine=protocol.state_machine,
+                                          tokens=tokens)
+            for i, instruction in enumerate(instruction_sets)
+        ]
+        for shard in iter_shards(path, manifest=manifest, trusted=trusted, workers=workers):
+            protocol_instruction, tokensets = protocol_instructions[shard.set]
+            for sample in shard.samples:
+                BloomUtils.add_sample_to_instruction(protocol_instruction=protocol_instruction, tokensets=tokensets,
+                                                     sample=sample, tokens=tokens, trusted=trusted)
+
+        for instruction, (protocol_instruction, tokensets) in zip(instruction_sets, protocol_instructions):
             BloomUtils.add_guardrails_to_instruction(protocol_instruction=protocol_instruction, instruction=instruction)
-            protocol.add_instruction(protocol_instruction)
+            protocol._add_loaded_instruction(instruction=protocol_instruction, tokensets=tokensets, trusted=trusted)
+
+        return protocol
+
+    @classmethod
+    def replay(cls, journal: str, fsync: bool = False) -> 'ProtocolV1':
+        """
+        Rebuilds a Protocol from its journal, and resumes journaling to the same file.
+
+        Records were validated when they were accepted, so they are applied without validating them again, as in
+        trusted loading, and instructions are rebuilt as load() rebuilds them. An incomplete last record, left by a crash
+        while it was being written, is discarded.
+        :param journal: The path to the journal file of a Protocol created with journal=path.
+        :param fsync: Whether to force each new journal record to disk.
+        :return: The Protocol. Use get_instruction() to skip instructions that were already added before resuming.
+        """
+        protocol: Optional[ProtocolV1] = None
+        tokens: dict[str, Token] = {}
+        for record in ProtocolJournal.read(journal):
+            kind: str = record[0]
+            if protocol is None:
+                if kind != PROTOCOL_RECORD:
+                    raise ProtocolError(f"Journal '{journal}' does not start with the protocol settings.")
+                settings: dict = record[1]
+                protocol = ProtocolV1(name=settings["name"], inputs=settings["inputs"], encrypt=settings["encrypted"],
+                                      state_machine=settings["state_machine"], version=settings["version"])
+            elif kind == CONTEXT_RECORD:
+                protocol.context.append(record[1])
+            elif kind in (TOKEN_RECORD, FINAL_RECORD):
+                cls._replay_token(protocol=protocol, token_value=record[1], token_info=record[2], tokens=tokens,
+                                  add=kind == TOKEN_RECORD)
+            elif kind == INSTRUCTION_RECORD:
+                cls._replay_instruction(protocol=protocol, instruction=record[1], tokens=tokens)
+            else:
+                cls._replay_instruction_change(protocol=protocol, record=record, tokens=tokens)
+        if protocol is None:
+            raise ProtocolError(f"Journal '{journal}' has no records.")
+
+        ProtocolJournal.discard_incomplete_record(journal)
+        protocol._journal = ProtocolJournal(journal, fsync=fsync, token_values=tokens.keys())
+        for instruction in protocol.instructions:
+            instruction._journal = protocol._journal
+        return protocol
+
+    @classmethod
+    def _replay_token(cls, protocol: 'ProtocolV1', token_value: str, token_info: dict, tokens: dict[str, Token],
+                      add: bool):
+        """Creates a token from a journal record, adding it to the protocol if it was added to the protocol."""
+        token: Optional[Token] = tokens.get(token_value)
+        if token is None:
+            token = BloomUtils.create_token(token_value=token_value, token_info=token_info)
+            tokens[token.value] = token
+        elif token.key != token_info["key"]:  # A final token recorded for its samples, keyed when it was added
+            token.key = token_info["key"]
+        if add:
+            protocol._add_token(token)
+
+    @classmethod
+    def _replay_instruction(cls, protocol: 'ProtocolV1', instruction: dict, tokens: dict[str, Token]):
+        """Rebuilds an Instruction from a journal record and adds it to the protocol."""
+        protocol_instruction, tokensets = BloomUtils.create_instruction(
+            instruction=instruction, index=len(protocol.instructions), state_machine=protocol.state_machine,
+            tokens=tokens)
+        if not isinstance(protocol_instruction, StateMachineInstruction):
+            protocol_instruction.output.final = [tokens[token_value] for token_value in instruction["final"]]
+        if instruction["store"]:
+            protocol_instruction.use_sample_store()
+        for sample in instruction["samples"]:
+            BloomUtils.add_sample_to_instruction(protocol_instruction=protocol_instruction, tokensets=tokensets,
+                                                 sample=sample, tokens=tokens, trusted=True)
+        BloomUtils.add_guardrails_to_instruction(protocol_instruction=protocol_instruction, instruction=instruction)
+        protocol._add_loaded_instruction(instruction=protocol_instruction, tokensets=tokensets, trusted=True)
+
+    @classmethod
+    def _replay_instruction_change(cls, protocol: 'ProtocolV1', record: list, tokens: dict[str, Token]):
+        """Applies a journal record of samples, a guardrail or context added to an Instruction of the protocol."""
+        kind: str = record[0]
+        instruction: Optional[BaseInstruction] = protocol.get_instruction(record[1])
+        if instruction is None:
+            raise ProtocolError(f"Journal record '{kind}' references unknown instruction '{record[1]}'.")
+        if kind == SAMPLES_RECORD:
+            tokensets: List[TokenSet] = instruction.get_token_sets()
+            for sample in record[2]:
+                BloomUtils.add_sample_to_instruction(protocol_instruction=instruction, tokensets=tokensets,
+                                                     sample=sample, tokens=tokens, trusted=True)
+        elif kind == GUARDRAIL_RECORD:
+            BloomUtils.add_guardrails_to_instruction(protocol_instruction=instruction,
+                                                     instruction={"guardrails": [record[2]]})
+        elif kind == INSTRUCTION_CONTEXT_RECORD:
+            instruction.add_contexts(record[2])
+        else:
+            raise ProtocolError(f"Unknown journal record '{kind}'.")
+
+    @classmethod
+    def merge(cls, *protocols: 'ProtocolV1', name: Optional[str] = None) -> 'ProtocolV1':
+        """
+        Merges partial protocols into a new Protocol, e.g. protocols built by worker processes from slices of the data.
+
+        Tokens are combined by value, and tokens with the same value must have the same settings and key. Keys must
+        not collide across protocols. Instructions with the same name must have the same TokenSets; their samples are
+        concatenated in the order of the protocols, and their final tokens, context and guardrails are combined.
+        Context lines are combined in order, without duplicates. Instructions are rebuilt as load() rebuilds them.
+
+        The samples were validated when they were added to the partial protocols, so they are not validated again.
+        :param protocols: The protocols to merge, which must have the same inputs, encryption, state machine setting
+            and version. They are not modified.
+        :param name: The name of the merged Protocol. If None, uses the name of the first protocol.
+        :return: The merged Protocol.
+        """
+        if not protocols:
+            raise ProtocolError("At least one protocol is required to merge.")
+        first: ProtocolV1 = protocols[0]
+        settings: tuple = (first.input_count, first.encrypt, first.state_machine, first.bloom_version)
+        for protocol in protocols[1:]:
+            if (protocol.input_count, protocol.encrypt, protocol.state_machine, protocol.bloom_version) != settings:
+                raise ProtocolError(
+                    f"Protocol '{protocol.name}' cannot be merged with protocol '{first.name}'. Protocols must have "
+                    f"the same inputs, encryption, state machine setting and version to be merged.")
+
+        merged: ProtocolV1 = ProtocolV1(name=name if name is not None else first.name, inputs=first.input_count,
+                                        encrypt=first.encrypt, state_machine=first.state_machine,
+                                        version=first.bloom_version)
+        context: Set[str] = set()
+        tokens: dict[str, Token] = {}
+        for protocol in protocols:
+            for line in protocol.context:
+                if line not in context:
+                    context.add(line)
+                    merged.context.append(line)
+            for token in protocol.tokens:
+                if cls._merge_token(token=token, tokens=tokens):
+                    merged._add_token(token)
+
+        # Final tokens used by samples that were never added to their protocol are only looked up
+        used_tokens: dict[str, Token] = dict(tokens)
+        instructions: Dict[str, tuple[BaseInstruction, List[TokenSet]]] = {}
+        for protocol in protocols:
+            for instruction in protocol.instructions:
+                cls._merge_instruction(merged=merged, instruction=instruction, instructions=instructions,
+                                       tokens=used_tokens)
+
+        for protocol_instruction, tokensets in instructions.values():
+            merged._add_loaded_instruction(instruction=protocol_instruction, tokensets=tokensets, trusted=True)
+        return merged
+
+    @classmethod
+    def _merge_token(cls, token: Token, tokens: dict[str, Token]) -> bool:
+        """
+        Adds a token to the tokens of a merge by value, checking it against a token with the same value.
+
+        :return: True if the token is new, False if an identical token was already added.
+        """
+        existing: Optional[Token] = tokens.get(token.value)
+        if existing is None:
+            tokens[token.value] = token
+            return True
+        if existing is not token and existing.to_dict() != token.to_dict():
+            raise ProtocolError(
+                f"Token '{token.value}' has different settings or keys in the protocols being merged: "
+                f"{existing.to_dict()} and {token.to_dict()}.")
+        return False
+
+    @classmethod
+    def _merge_instruction(cls, merged: 'ProtocolV1', instruction: BaseInstruction,
+                           instructions: Dict[str, tuple[BaseInstruction, List[TokenSet]]], tokens: dict[str, Token]):
+        """Adds the samples, final tokens, context and guardrails of an Instruction to the merged Instruction."""
+        memory_set: List[List[str]] = instruction.serialize_memory_set()
+        if instruction.name not in instructions:
+            instructions[instruction.name] = BloomUtils.create_instruction(
+                instruction={"name": instruction.name, "set": memory_set, "context": []}, index=len(instructions),
+                state_machine=merged.state_machine, tokens=tokens)
+        merged_instruction, _ = instructions[instruction.name]
+        if merged_instruction.serialize_memory_set() != memory_set:
+            raise ProtocolError(
+                f"Instruction '{instruction.name}' has different TokenSets in the protocols being merged.")
+
+        for token in instruction.output.final or []:
+            cls._merge_token(token=token, tokens=tokens)
+            if not isinstance(merged_instruction, StateMachineInstruction) and \
+                    tokens[token.value] not in merged_instruction.output.final:
+                merged_instruction.output.final.append(tokens[token.value])
+        if isinstance(instruction.samples, SampleStore):
+            merged_instruction.use_sample_store()
+        samples: List[Sample] = []
+        for sample in instruction.samples:
+            if tokens.get(sample.result.value) is not sample.result:
+                cls._merge_token(token=sample.result, tokens=tokens)
+            samples.append(Sample(input=sample.input, output=sample.output, prompt=sample.prompt,
+                                  numbers=sample.numbers, number_lists=sample.number_lists,
+                                  result=tokens[sample.result.value], value=sample.value))
+        merged_instruction.samples.extend(samples)
+
+        merged_instruction.add_contexts(instruction.context)
+        for index, guardrail in instruction.input.guardrails.items():
+            existing: Optional[Guardrail] = merged_instruction.input.guardrails.get(index)
+            if existing is None:
+                merged_instruction.add_guardrail(guardrail=guardrail, tokenset_index=index)
+            elif existing.to_dict() != guardrail.to_dict():
+                raise ProtocolError(
+                    f"Instruction '{instruction.name}' has different guardrails for TokenSet {index} in the "
+                    f"protocols being merged.")
+
+    def __reduce__(self):
+        """
+        Pickles the protocol in a compact packed layout instead of object by object.
+
+        Samples are packed into columns of plain values, so partial protocols can be shipped between processes cheaply.
+        The journal is not pickled; unpickled protocols are not journaled.
+        """
+        return ProtocolV1._unpack, (self._pack(),)
+
+    def _pack(self) -> dict:
+        """Packs the protocol into plain values for pickling."""
+        token_values: Set[str] = {token.value for token in self.tokens}
+        # Tokens used by the instructions that were never added to the protocol, e.g. final tokens of later samples
+        used_tokens: Dict[str, Token] = {}
+        instructions: List[dict] = []
+        for instruction in self.instructions:
+            used: Iterable[Token] = itertools.chain(
+                (token for token_set in instruction.get_token_sets() for token in token_set.tokens),
+                instruction.output.final or [],
+                instruction.samples.result_tokens if isinstance(instruction.samples, SampleStore)
+                else (sample.result for sample in instruction.samples))
+            for token in used:
+                if token.value not in token_values:
+                    used_tokens.setdefault(token.value, token)
+            instructions.append({
+                "name": instruction.name,
+                "context": list(instruction.context),
+                "set": instruction.serialize_memory_set(),
+                "final": [token.value for token in instruction.output.final or []],
+                "guardrails": instruction.serialize_guardrails(),
+                "store": isinstance(instruction.samples, SampleStore),
+                "samples": pack_samples(instruction.samples),
+            })
+        return {
+            "format": PACKED_FORMAT_VERSION,
+            "name": self.name,
+            "inputs": self.input_count,
+            "encrypted": self.encrypt,
+            "state_machine": self.state_machine,
+            "version": str(self.bloom_version),
+            "context": list(self.context),
+            "tokens": [(token.value, get_token_info(token)) for token in self.tokens],
+            "used_tokens": [(token.value, get_token_info(token)) for token in used_tokens.values()],
+            "instructions": instructions,
+        }
+
+    @classmethod
+    def _unpack(cls, packed: dict) -> 'ProtocolV1':
+        """Rebuilds a protocol packed by _pack(), without revalidating its samples."""
+        if packed["format"] != PACKED_FORMAT_VERSION:
+            raise ProtocolError(f"Unsupported packed protocol format {packed['format']}.")
+        protocol: ProtocolV1 = ProtocolV1(name=packed["name"], inputs=packed["inputs"], encrypt=packed["encrypted"],
+                                          state_machine=packed["state_machine"], version=packed["version"])
+        protocol.context = packed["context"]
+        tokens: dict[str, Token] = {}
+        for token_value, token_info in packed["used_tokens"]:
+            tokens[token_value] = BloomUtils.create_token(token_value=token_value, token_info=token_info)
+        for token_value, token_info in packed["tokens"]:
+            BloomUtils.add_token(token_value=token_value, token_info=token_info, protocol=protocol, tokens=tokens)
+
+        for i, instruction in enumerate(packed["instructions"]):
+            protocol_instruction, tokensets = BloomUtils.create_instruction(
+                instruction=instruction, index=i, state_machine=protocol.state_machine, tokens=tokens)
+            if not isinstance(protocol_instruction, StateMachineInstruction):
+                protocol_instruction.output.final = [tokens[token_value] for token_value in instruction["final"]]
+            protocol_instruction.samples.extend(unpack_samples(instruction["samples"], tokens=tokens))
+            if instruction["store"]:
+                protocol_instruction.use_sample_store()
+            BloomUtils.add_guardrails_to_instruction(protocol_instruction=protocol_instruction,
+                                                     instruction=instruction)
+            protocol._add_loaded_instruction(instruction=protocol_instruction, tokensets=tokensets, trusted=True)
+        return protocol
+
+    def get_instruction(self, name: str) -> Optional[BaseInstruction]:
+        """
+        Returns the Instruction added to the protocol under a name.
 
+        :param name: The name of the Instruction.
+        :return: The Instruction, or None if no Instruction with that name was added.
+        """
+        return self._instructions_by_name.get(name)
+
+    def close_journal(self):
+        """Closes the journal of the protocol, if any. Changes made afterwards are not journaled."""
+        if self._journal is None:
+            return
+        self._journal.close()
+        self._journal = None
+        for instruction in self.instructions:
+            instruction._journal = None
+
+    def use_fragment_cache(self, path: Optional[str] = None):
+        """
+        Caches the encoded JSON of each instruction set between saves, so save() only encodes the instruction sets
+        that changed since the last save.
+
+        Instruction sets are keyed by the content fingerprint of their Instruction, see
+        BaseInstruction.get_content_fingerprint(). Like validation, the fingerprint does not detect changes made inside
+        existing samples, so samples must not be modified in place while the cache is used.
+        :param path: A directory to also store the encoded instruction sets in, so later processes saving the same
+            instruction sets can reuse them. If None, they are only kept in memory.
+        """
+        self._fragment_cache = FragmentCache(path)
+
+    @classmethod
+    def _create_from_loaded_header(cls, header: dict, tokens: dict[str, Token], trusted: bool,
+                                   checksum_matches: bool, segments: List[Segment] = ()) -> 'ProtocolV1':
+        """Creates a Protocol with its tokens and the tokens of its segments from the top-level fields read by load()."""
+        if trusted:
+            cls._assert_trusted(valid=header["valid"], checksum_matches=checksum_matches)
+        protocol: ProtocolV1 = cls._create_from_header(header)
+        BloomUtils.add_tokens(protocol_file=header, protocol=protocol, tokens=tokens)
+        for segment in segments:
+            BloomUtils.add_tokens(protocol_file={"tokens": segment.tokens}, protocol=protocol, tokens=tokens)
+        return protocol
+
+    @classmethod
+    def _load_instruction(cls, reader: JSONStreamReader, protocol: 'ProtocolV1', tokens: dict[str, Token],
+                          trusted: bool, segments: List[Segment] = ()):
+        """Loads the instruction object at the reader's position, one instruction set at a time."""
+        for key in reader.iter_object():
+            if key != "sets":
+                reader.skip_value()
+                continue
+            for i in reader.iter_array():
+                cls._load_instruction_set(reader=reader, index=i, protocol=protocol, tokens=tokens, trusted=trusted,
+                                          segments=segments)
+
+    @classmethod
+    def _load_instruction_set(cls, reader: JSONStreamReader, index: int, protocol: 'ProtocolV1',
+                              tokens: dict[str, Token], trusted: bool, segments: List[Segment] = ()):
+        """
+        Loads the instruction set at the reader's position and adds it to the protocol.
+
+        Samples precede the token set in saved files, so the samples array is skipped while the rest of the
+        instruction set is read, then revisited and streamed sample by sample once the Instruction exists. The
+        samples of the segments of the instruction set follow, before the Instruction is added.
+        """
+        instruction: dict = {}
+        samples_offset: Optional[int] = None
+        for key in reader.iter_object():
+            if key == "samples":
+                samples_offset = reader.tell()
+                reader.skip_value()
+            else:
+                instruction[key] = reader.read_value()
+        end_offset: int = reader.tell()
+
+        protocol_instruction, tokensets = BloomUtils.create_instruction(
+            instruction=instruction, index=index, state_machine=protocol.state_machine, tokens=tokens)
+
+        if samples_offset is not None:
+            reader.seek(samples_offset)
+            for _ in reader.iter_array():
+                BloomUtils.add_sample_to_instruction(protocol_instruction=protocol_instruction, tokensets=tokensets,
+                                                     sample=reader.read_value(), tokens=tokens, trusted=trusted)
+            reader.seek(end_offset)
+
+        for segment in segments:
+            if segment.set != index:
+                continue
+            if segment.name != instruction.get("name"):
+                raise ProtocolFileError(
+                    f"Segment file '{os.path.basename(segment.filename)}' belongs to instruction set "
+                    f"'{segment.name}', but instruction set {index} is '{instruction.get('name')}'.")
+            for sample in segment.samples:
+                BloomUtils.add_sample_to_instruction(protocol_instruction=protocol_instruction, tokensets=tokensets,
+                                                     sample=sample, tokens=tokens, trusted=trusted)
+
+        # Add guardrails
+        BloomUtils.add_guardrails_to_instruction(protocol_instruction=protocol_instruction, instruction=instruction)
+        protocol._add_loaded_instruction(instruction=protocol_instruction, tokensets=tokensets, trusted=trusted)
+
+    def _add_loaded_instruction(self, instruction: BaseInstruction, tokensets: List[TokenSet], trusted: bool):
+        """
+        Adds an Instruction rebuilt from a bloom file to the protocol.
+
+        Trusted instructions were validated before they were saved, so they are registered without rechecking
+        every sample.
+        """
+        if not trusted:
+            self.add_instruction(instruction)
+            return
+
+        tokens: List[Token] = [token for token_set in tokensets for token in token_set.tokens]
+        tokens.extend(instruction.output.final or [])
+        self._register_instruction(instruction=instruction, tokens=tokens)
+
+    @classmethod
+    def _assert_trusted(cls, valid: bool, checksum_matches: bool):
+        """Raises if a bloom file does not qualify for trusted loading."""
+        if not valid:
+            raise ProtocolError("Only protocol files saved as valid can be loaded in trusted mode.")
+        if not checksum_matches:
+            raise ProtocolError(
+                "Protocol file checksum is missing or does not match its contents. Only unmodified files written by "
+                "save() can be loaded in trusted mode.")
+
+    @classmethod
+    def _required_fields(cls) -> List[str]:
+        """Returns the required top-level fields of a bloom file."""
+        # The schemas are imported on first use, as Pydantic models are slow to import
+        from model_train_protocol_schemas.structures.protocol import Protocol as PydanticProtocol
+        return list(PydanticProtocol.model_fields.keys())
+
+    @classmethod
+    def _is_header_complete(cls, header: dict) -> bool:
+        """Returns True if every required top-level field other than the instruction has been read."""
+        return all(field in header for field in cls._required_fields() if field != "instruction")
+
+    @classmethod
+    def _validate_required_fields(cls, fields: Collection[str]):
+        """Validates that all required top-level fields are present in a bloom file."""
+        for field in cls._required_fields():
+            if field not in fields:
+                raise ProtocolError(f"Missing required field '{field}' in protocol JSON.")
+
+    @classmethod
+    def _create_from_header(cls, protocol_file: dict) -> 'ProtocolV1':
+        """Creates an empty Protocol from the top-level fields of a bloom file."""
+        protocol = ProtocolV1(name=protocol_file["name"], inputs=protocol_file["inputs"],
+                              encrypt=protocol_file["encrypted"], state_machine=protocol_file["state_machine"])
+        protocol.context = protocol_file["context"]
         return protocol
 
     def add_context(self, context: str):
@@ -194,6 +795,8 @@ class ProtocolV1(BaseProtocol):
         self._validate_context_line_length(context)
 
         self.context.append(context)
+        if self._journal is not None:
+            self._journal.record_context(context)
 
     @classmethod
     def _validate_context_line_length(cls, line: str):
@@ -223,20 +826,22 @@ class ProtocolV1(BaseProtocol):
                 raise StateMachineError(
                     f"Instructions in a state machine protocol cannot have a generated numeric output. Found numeric output tokens in instruction '{instruction.name}'.")
 
-        if instruction in self.instructions:
-            raise ProtocolError(
-                "Instruction already added to the protocol (or instruction with identical tokensets in the same order).")
-
-        for existing_instruction in self.instructions:
-            if existing_instruction.name == instruction.name:
-                raise ProtocolError(f"An instruction with name '{instruction.name}' already exists in the protocol.")
+        # Equal instructions share a name, so only the instruction registered under this name needs comparing
+        existing_instruction: Optional[BaseInstruction] = self._instructions_by_name.get(instruction.name)
+        if existing_instruction is not None:
+            if existing_instruction.fingerprint == instruction.fingerprint and existing_instruction == instruction:
+                raise ProtocolError(
+                    "Instruction already added to the protocol (or instruction with identical tokensets in the same order).")
+            raise ProtocolError(f"An instruction with name '{instruction.name}' already exists in the protocol.")
 
         if len(instruction.samples) < 3:
             raise ProtocolError(
                 f"Instruction must have at least three samples. Found {len(instruction.samples)} samples."
             )
 
-        final_sample_table: dict[FinalToken, int] = dict()
+        # Count samples per result token by identity, which avoids hashing a token for every sample
+        final_sample_table: dict[int, int] = dict()
+        final_tokens: dict[int, FinalToken] = dict()
 
         # Assert all samples match the defined sample line size
         for sample in instruction.samples:
@@ -245,27 +850,51 @@ class ProtocolV1(BaseProtocol):
                     f"Sample input lines ({len(sample.input)}) does not match defined inputs count ({self.input_count})"
                     f"\n{sample}."
                 )
-            if sample.result not in final_sample_table:
-                final_sample_table[sample.result] = 1
+            result_id: int = id(sample.result)
+            if result_id not in final_sample_table:
+                final_sample_table[result_id] = 1
+                final_tokens[result_id] = sample.result
             else:
-                final_sample_table[sample.result] += 1
+                final_sample_table[result_id] += 1
+
+        # Equal result tokens may be distinct objects
+        final_counts: dict[FinalToken, int] = dict()
+        for result_id, count in final_sample_table.items():
+            final_token: FinalToken = final_tokens[result_id]
+            final_counts[final_token] = final_counts.get(final_token, 0) + count
 
         # Ensure each FinalToken has at least 3 samples
-        for final_token, count in final_sample_table.items():
+        for final_token, count in final_counts.items():
             if count < PER_FINAL_TOKEN_SAMPLE_MINIMUM:
                 raise ProtocolError(
                     f"Missing minimum {PER_FINAL_TOKEN_SAMPLE_MINIMUM} samples for each FinalToken in the Output of Instruction {instruction.name}.\n"
                     f"FinalToken '{final_token.value}' must have at least 3 samples in the instruction. Found {count} samples."
                 )
 
-        # Add all tokens
-        for token in instruction.get_tokens():
+        tokens: List[Token] = [token for token_set in instruction.get_token_sets() for token in token_set.tokens]
+        self._register_instruction(instruction=instruction, tokens=tokens + list(final_tokens.values()))
+
+    def _register_instruction(self, instruction: BaseInstruction, tokens: Iterable[Token]):
+        """
+        Adds an already validated Instruction and its tokens to the protocol.
+
+        :param instruction: The Instruction to add.
+        :param tokens: The tokens used by the Instruction.
+        """
+        # Add all tokens, checking every new token before any is added, so a rejected Instruction leaves no tokens
+        for token in tokens:
             self._assign_key(token=token)
-            if token not in self.tokens:
-                self._add_token(token)
+        new_tokens: List[Token] = list(dict.fromkeys(token for token in tokens if token not in self.tokens))
+        self._validate_new_tokens(new_tokens)
+        for token in new_tokens:
+            self._insert_token(token)
 
         # Add the instruction to the protocol
         self.instructions.add(instruction)
+        self._instructions_by_name[instruction.name] = instruction
+        if self._journal is not None:
+            self._journal.record_instruction(instruction)
+            instruction._journal = self._journal
 
         # Update guardrails flag
         if instruction.has_guardrails:
@@ -277,6 +906,7 @@ class ProtocolV1(BaseProtocol):
 
         :return: The ProtocolFile instance representing the protocol.
         """
+        from model_train_protocol.v1.protocol_file.protocol_file_v1 import ProtocolFileV1
         self._prep_protocol()
 
         return ProtocolFileV1(
@@ -292,6 +922,7 @@ class ProtocolV1(BaseProtocol):
 
         :return: The TemplateFile instance representing the protocol template.
         """
+        from model_train_protocol.v1.template_file.template_file_v1 import TemplateFileV1
         self._prep_protocol()
 
         return TemplateFileV1(
@@ -302,19 +933,44 @@ class ProtocolV1(BaseProtocol):
             state_machine=self.state_machine,
         )
 
-    def save(self, name: Optional[str] = None, path: Optional[str] = None):
+    def save(self, name: Optional[str] = None, path: Optional[str] = None, stream: bool = False,
+             strict: bool = False, compact: bool = False, compression: Optional[str] = None, index: bool = False,
+             index_interval: int = DEFAULT_INDEX_INTERVAL):
         """
         Saves the protocol to a JSON file. This file can be submitted to Databiomes for model training.
 
         :param name: The name of the file (without extension). If None, uses the protocol's name.
         :param path: The directory path where the file will be saved. If None, saves in the current directory.
+        :param stream: Whether to stream tokens and samples directly to the file instead of building the full
+            protocol dictionary in memory. The output is identical either way; streaming keeps peak memory bounded
+            for protocols with very large sample counts.
+        :param strict: Whether to also validate the file against the Pydantic models of model_train_protocol_schemas
+            before writing it. Slower, and the output is identical.
+        :param compact: Whether to write the file without indentation or whitespace. Compact files are smaller and
+            faster to write, and load the same way.
+        :param compression: "gzip", "xz" or "bz2" to compress the file as it is written, adding the matching suffix
+            to the file name, e.g. "{name}_model.json.gz". load() detects the compression automatically.
+        :param index: Whether to also write an offset index, "{name}_model_index.json", holding the byte offsets of
+            each instruction set and of every index_interval-th sample. ProtocolReader uses it to read single
+            instruction sets and samples without loading the file. The file is scanned once more to build the index.
+            Only uncompressed files can be indexed.
+        :param index_interval: The number of samples between indexed samples. Reading a sample decodes up to
+            index_interval - 1 samples before it.
+
+        After use_fragment_cache(), the file is always streamed and unchanged instruction sets are copied from the
+        cache. Segment files appended to an earlier file of the same name by append_samples() are removed, and so is
+        its offset index unless a new one is written.
         """
+        validate_compression(compression)
+        if index and compression is not None:
+            raise ProtocolError("Only uncompressed protocol files can be indexed, as the offsets of compressed files "
+                                "cannot be read directly.")
         if name is None:
             name = self.name
         if path is None:
             path = os.getcwd()
         os.makedirs(path, exist_ok=True)
-        filename = os.path.join(path, f"{name}_model.json")
+        filename = os.path.join(path, f"{name}_model.json{COMPRESSION_SUFFIXES.get(compression, '')}")
 
         print(f"Saving Model Train Protocol to {filename}...")
         valid: bool
@@ -324,10 +980,174 @@ class ProtocolV1(BaseProtocol):
             raise ProtocolError(error_msg)
         self._prep_protocol()
 
-        with open(filename, 'w', encoding="utf-8") as file:
-            json.dump(self.get_protocol_file(valid=valid).to_json(), file, indent=4, ensure_ascii=False)
+        # The file replaces any samples appended to an earlier file of the same name, and its index
+        remove_segments(filename)
+        remove_index(filename)
+        with open_for_writing(filename, compression=compression) as file:
+            self.get_protocol_file(valid=valid).write(file, stream=stream, strict=strict,
+                                                      encoder=self._get_json_encoder(compact=compact),
+                                                      fragment_cache=self._fragment_cache)
+        if index:
+            write_index(filename, interval=index_interval, encoder=self._get_json_encoder(compact=compact))
+
+    def save_sharded(self, name: Optional[str] = None, path: Optional[str] = None,
+                     max_samples_per_shard: int = DEFAULT_MAX_SAMPLES_PER_SHARD, workers: Optional[int] = None,
+                     compact: bool = False, compression: Optional[str] = None) -> str:
+        """
+        Saves the protocol as a manifest file and shard files, which can be ingested in parallel.
+
+        The manifest, "{name}_manifest.json", holds the tokens, special tokens, context and instruction sets without
+        their samples. The samples are split into shard files, "{name}_shard_00000.json" onwards, each holding up to
+        max_samples_per_shard consecutive samples of one instruction set. Shard files are written concurrently by a
+        process pool. Use load_sharded() to load the protocol back.
+        :param name: The name the file names start with. If None, uses the protocol's name.
+        :param path: The directory path where the files will be saved. If None, saves in the current directory.
+        :param max_samples_per_shard: The maximum number of samples in each shard file.
+        :param workers: The number of processes writing shards. If None, uses one per CPU, up to the number of shards.
+        :param compact: Whether to write the files without indentation or whitespace.
+        :param compression: "gzip", "xz" or "bz2" to compress the shard files, adding the matching suffix to their
+            file names. The manifest is not compressed.
+        :return: The path of the manifest file.
+        """
+        validate_compression(compression)
+        if name is None:
+            name = self.name
+        if path is None:
+            path = os.getcwd()
+        os.makedirs(path, exist_ok=True)
+
+        print(f"Saving sharded Model Train Protocol to {os.path.join(path, get_manifest_filename(name))}...")
+        valid: bool
+        error_msg: Optional[str]
+        valid, error_msg = self.validate_protocol()
+        if not valid:
+            raise ProtocolError(error_msg)
+        self._prep_protocol()
+
+        return write_sharded(self.get_protocol_file(valid=valid), path=path, name=name,
+                             max_samples_per_shard=max_samples_per_shard, workers=workers,
+                             encoder=self._get_json_encoder(compact=compact), compression=compression)
+
+    @classmethod
+    def append_samples(cls, path: str, instruction: BaseInstruction, compact: bool = False) -> str:
+        """
+        Appends the samples of an Instruction to the same-named instruction set of a saved bloom file, without
+        rewriting the file.
+
+        The samples are written to a new segment file next to the bloom file, "{name}_model_segment_00001.json"
+        onwards, along with any result tokens the file does not have yet. load() adds the samples of each segment
+        after the samples of their instruction set, so saving the loaded protocol writes the same file as saving the
+        protocol with every sample added in order. Each segment records the checksum of the file it was appended to,
+        and whether the bloom file is valid with the samples appended so far. Only the samples of the Instruction are
+        appended; its context and guardrails are not.
+
+        The bloom file is scanned once to read its tokens and instruction sets, without decoding the samples of other
+        instruction sets. The result tokens of the instruction set are counted the first time samples are appended
+        to it, as each result token needs PER_FINAL_TOKEN_SAMPLE_MINIMUM samples for the file to stay valid.
+        :param path: The path to a bloom file written by save().
+        :param instruction: An Instruction with the TokenSets of the instruction set, holding the new samples. The
+            samples were validated when they were added to the Instruction.
+        :param compact: Whether to write the segment file without indentation or whitespace.
+        :return: The path of the segment file.
+        """
+        if not instruction.samples:
+            raise ProtocolError(f"Instruction '{instruction.name}' has no samples to append.")
+        segments: List[Segment] = read_segments(path)
+        # The latest result counts of each instruction set with segments, by set index
+        results: Dict[int, Dict[str, int]] = {segment.set: segment.results for segment in segments}
+        counted: bool = any(segment.name == instruction.name for segment in segments)
+        header, instruction_sets = cls._read_saved_structure(path, results_of=None if counted else instruction.name)
+        checksum: Optional[str] = header.get(CHECKSUM_FIELD)
+        if checksum is None:
+            raise ProtocolError(f"Protocol file '{path}' has no checksum. Only files written by save() can be appended "
+                                f"to.")
+        verify_segment_chain(path, checksum=checksum, segments=segments)
+
+        set_index: Optional[int] = next(
+            (i for i, instruction_set in enumerate(instruction_sets) if instruction_set.get("name") == instruction.name),
+            None)
+        if set_index is None:
+            raise ProtocolError(f"Protocol file '{path}' has no instruction set named '{instruction.name}'.")
+        if instruction_sets[set_index]["set"] != instruction.serialize_memory_set():
+            raise ProtocolError(
+                f"Instruction '{instruction.name}' has different TokenSets than its instruction set in '{path}'.")
+
+        protocol: ProtocolV1 = cls._create_from_header(header)
+        tokens: dict[str, Token] = {}
+        BloomUtils.add_tokens(protocol_file=header, protocol=protocol, tokens=tokens)
+        for segment in segments:
+            BloomUtils.add_tokens(protocol_file={"tokens": segment.tokens}, protocol=protocol, tokens=tokens)
+        new_tokens: Dict[str, dict] = {}
+        result_tokens: Iterable[Token] = instruction.samples.result_tokens \
+            if isinstance(instruction.samples, SampleStore) \
+            else dict.fromkeys(sample.result for sample in instruction.samples)
+        for token in result_tokens:
+            existing: Optional[Token] = tokens.get(token.value)
+            if existing is None:
+                protocol._add_token(token)
+                tokens[token.value] = token
+                new_tokens[token.value] = get_token_info(token)
+            elif token.key is not None and get_token_info(existing) != get_token_info(token):
+                raise ProtocolError(
+                    f"Token '{token.value}' has different settings or keys than in '{path}': "
+                    f"{get_token_info(existing)} and {get_token_info(token)}.")
+
+        set_results: Dict[str, int] = dict(results.get(set_index, instruction_sets[set_index].get("results", {})))
+        for sample in instruction.samples:
+            set_results[sample.result.value] = set_results.get(sample.result.value, 0) + 1
+        results[set_index] = set_results
+        valid: bool = header["valid"] and all(count >= PER_FINAL_TOKEN_SAMPLE_MINIMUM
+                                              for counts in results.values() for count in counts.values())
+
+        segment: Segment = Segment(
+            filename="", name=instruction.name, set=set_index,
+            previous=segments[-1].checksum if segments else checksum, tokens=new_tokens,
+            samples=[sample.to_dict() for sample in instruction.samples], results=set_results, valid=valid,
+            checksum=None)
+        filename: str = write_segment(path, segment=segment, encoder=protocol._get_json_encoder(compact=compact))
+        print(f"Appended {len(segment.samples)} samples to {path} in {filename}.")
+        return filename
+
+    @classmethod
+    def _read_saved_structure(cls, path: str, results_of: Optional[str] = None) -> tuple[dict, List[dict]]:
+        """
+        Reads the top-level fields and the instruction sets of a bloom file, without their samples.
 
-    def template(self, path: Optional[str] = None):
+        :param results_of: The name of an instruction set whose samples are counted by result token, as a "results"
+            dictionary of the instruction set. Saved files place the name of each instruction set before its samples.
+        :return: Tuple of (the top-level fields other than the instruction, the instruction sets without samples)
+        """
+        header: dict = {}
+        instruction_sets: List[dict] = []
+        with open_for_reading(path) as file:
+            reader: JSONStreamReader = JSONStreamReader(file)
+            for key in reader.iter_object():
+                if key != "instruction":
+                    header[key] = reader.read_value()
+                    continue
+                for instruction_key in reader.iter_object():
+                    if instruction_key != "sets":
+                        reader.skip_value()
+                        continue
+                    for _ in reader.iter_array():
+                        instruction_set: dict = {}
+                        for set_key in reader.iter_object():
+                            if set_key == "samples" and results_of is not None and \
+                                    instruction_set.get("name") == results_of:
+                                set_results: Dict[str, int] = {}
+                                for _ in reader.iter_array():
+                                    result: str = reader.read_value()["result"]
+                                    set_results[result] = set_results.get(result, 0) + 1
+                                instruction_set["results"] = set_results
+                            elif set_key == "samples":
+                                reader.skip_value()
+                            else:
+                                instruction_set[set_key] = reader.read_value()
+                        instruction_sets.append(instruction_set)
+        cls._validate_required_fields(list(header.keys()) + ["instruction"])
+        return header, instruction_sets
+
+    def template(self, path: Optional[str] = None, compact: bool = False):
         """
         Create a template JSON file for the model training protocol.
 
@@ -335,6 +1155,7 @@ class ProtocolV1(BaseProtocol):
         outputs based on the defined tokens and instructions.
 
         :param path: The directory path where the template file will be saved. If None, saves in the current directory.
+        :param compact: Whether to write the file without indentation or whitespace.
         """
         if path is None:
             path = os.getcwd()
@@ -349,7 +1170,19 @@ class ProtocolV1(BaseProtocol):
         self._prep_protocol()
 
         with open(filename, 'w', encoding="utf-8") as file:
-            json.dump(self.get_template_file().to_json(), file, indent=4, ensure_ascii=False)
+            self._get_json_encoder(compact=compact).dump(self.get_template_file().to_json(), file)
+
+    def _get_json_encoder(self, compact: bool) -> JSONEncoder:
+        """
+        Returns the JSON encoder for saved files, which uses orjson when it is installed.
+
+        orjson writes non-finite numbers as null. Sample numbers are bounded by the tokens, so the standard library is
+        used instead if any token bound is not finite.
+        :param compact: Whether to write without indentation or whitespace.
+        """
+        finite: bool = all(math.isfinite(bound) for token in self.tokens
+                           for bound in (token.min_value, token.max_value) if bound is not None)
+        return JSONEncoder(indent=None if compact else INDENT, backend=None if finite else JSON_BACKEND)
 
     def _assign_key(self, token: Token):
         """
@@ -376,19 +1209,55 @@ class ProtocolV1(BaseProtocol):
         :param token: The Token instance to add.
         """
         self._assign_key(token=token)
+        self._validate_new_tokens([token])
+        self._insert_token(token)
 
-        if token in self.tokens:
-            raise ProtocolError(f"Token value {token.value} already used. Duplicate tokens are not allowed.")
-
-        if token.key in self.used_keys:
-            raise ProtocolError(
-                f"Duplicate token key '{token.key}' is already used in another token. Duplicate keys are not allowed.")
+    def _validate_new_tokens(self, tokens: List[Token]):
+        """
+        Validates that tokens can be added to the protocol together, without changing the protocol.
 
+        The values and keys of the tokens are checked against the existing tokens and against each other. Special
+        tokens are only checked for duplicates: saved files list them with the other tokens, but they are reserved and
+        never conflict with the tokens of the protocol, as when they are added by _add_default_special_tokens().
+        :param tokens: The tokens to add, with their keys assigned.
+        """
+        values: Set[str] = set()
+        keys: Set[str] = set()
+        for token in tokens:
+            if token in self.tokens or token.value in values:
+                raise ProtocolError(f"Token value {token.value} already used. Duplicate tokens are not allowed.")
+            if token.key in self.used_keys or token.key in keys:
+                raise ProtocolError(
+                    f"Duplicate token key '{token.key}' is already used in another token. Duplicate keys are not "
+                    f"allowed.")
+            values.add(token.value)
+            keys.add(token.key)
+
+        # Check the new values and keys against the existing tokens, and against each other. Unencrypted tokens use
+        # their value as their key, so the same conflict can be found twice.
+        checked_tokens: List[Token] = [token for token in tokens if not isinstance(token, SpecialToken)]
+        conflicts: Set[tuple[str, str]] = set(find_string_subset_conflicts(token.value for token in checked_tokens))
+        conflicts.update(find_string_subset_conflicts(token.key for token in checked_tokens))
+        for token in checked_tokens:
+            conflicts.update(self._value_index.find_conflicts(token.value))
+            conflicts.update(self._key_index.find_conflicts(token.key))
+        if conflicts:
+            raise TokenError(format_string_subset_conflicts(
+                sorted(conflicts, key=lambda pair: (len(pair[0]), pair[0], len(pair[1]), pair[1]))))
+
+    def _insert_token(self, token: Token):
+        """Adds a token validated by _validate_new_tokens() to the protocol and its conflict indexes."""
         self.tokens.add(token)
         self.used_keys.add(token.key)
+        self._tokens_revision += 1
+        if self._journal is not None:
+            self._journal.record_token(token)
 
         if isinstance(token, SpecialToken):
             self.special_tokens.add(token)
+        else:
+            self._value_index.add(token.value)
+            self._key_index.add(token.key)
 
     def _add_default_special_tokens(self):
         """Adds all special tokens to the protocol."""
@@ -424,59 +1293,6 @@ class ProtocolV1(BaseProtocol):
             raise StateMachineError(
                 f"The instruction in a state machine protocol must be a StateMachineInstruction. Found instruction of type {type(list(self.instructions)[0])}.")
 
-    @classmethod
-    def _load_state_machine_protocol(cls, protocol_file: dict, protocol: 'ProtocolV1',
-                                     tokens: dict[str, Token]) -> 'ProtocolV1':
-        """Loads a state machine protocol from a JSON representation."""
-        # Add tokens
-        BloomUtils.add_tokens(protocol_file=protocol_file, protocol=protocol, tokens=tokens)
-
-        instruction_info = protocol_file["instruction"]
-        for instruction in instruction_info["sets"]:
-            context: List[str] = instruction["context"]
-            tokensets: List[TokenSet] = []
-            for token_set in instruction["set"]:
-                tokensets.append(TokenSet([tokens[token_value] for token_value in token_set]))
-
-            samples: List[Sample] = []
-            for sample in instruction["samples"]:
-                input_lines: List[str] = sample["strings"][:-1]
-                output_line: str = sample["strings"][-1]
-                result_token: FinalToken = tokens[sample["result"]]  # type: ignore
-                samples.append(Sample(input=input_lines, output=output_line, prompt=None, numbers=sample["numbers"],
-                                      number_lists=sample["number_lists"], result=result_token, value=sample["value"]))
-
-            instr_input: StateMachineInput = StateMachineInput(
-                tokensets=tokensets[:-1],
-            )
-
-            states: list[str] = list(dict.fromkeys([sample.output for sample in samples]))
-            protocol_instruction: StateMachineInstruction = StateMachineInstruction(
-                input=instr_input,
-                states=states,
-            )
-            protocol_instruction.output.tokenset = tokensets[-1]
-            protocol_instruction.context = context
-
-            for sample in samples:
-                inputs_snippets: List[Snippet] = []
-                for i, sample_input in enumerate(sample.input):
-                    inputs_snippets.append(
-                        tokensets[i].create_snippet(string=sample_input, number_lists=sample.number_lists[i] if len(
-                            sample.number_lists[i]) > 0 else None,
-                                                    numbers=sample.numbers[i] if len(sample.numbers[i]) > 0 else None))
-
-                protocol_instruction.add_sample(
-                    input_snippets=inputs_snippets,
-                    state=sample.output,
-                )
-
-            # Add guardrails
-            BloomUtils.add_guardrails_to_instruction(protocol_instruction=protocol_instruction, instruction=instruction)
-            protocol.add_instruction(protocol_instruction)
-
-        return protocol
-
     def _prep_protocol(self):
         """
         Sets all elements in the protocol before serialization.
@@ -489,11 +1305,55 @@ class ProtocolV1(BaseProtocol):
         """
         self._add_default_special_tokens()
 
+    def _validate_token_conflicts(self):
+        """
+        Validates that no token value or key is a substring of another. Special tokens, listed with the tokens of
+        loaded protocols, are not compared.
+
+        Tokens added through _add_token are already checked against the conflict indexes, so the full sweep only
+        runs if the token sets were modified directly.
+        """
+        special_tokens: List[Token] = [token for token in self.tokens if isinstance(token, SpecialToken)]
+        used_values: Set[str] = {token.value for token in self.tokens}.difference(
+            token.value for token in special_tokens)
+        used_keys: Set[str] = self.used_keys.difference(token.key for token in special_tokens)
+        if len(used_values) != len(self._value_index) or any(value not in self._value_index for value in used_values):
+            validate_string_subset(used_values)
+        if len(used_keys) != len(self._key_index) or any(key not in self._key_index for key in used_keys):
+            validate_string_subset(used_keys)
+
+    def _get_tokens_state(self) -> tuple:
+        """Returns a snapshot of the protocol's tokens, which changes whenever tokens are added or removed."""
+        return self._tokens_revision, len(self.tokens), len(self.used_keys)
+
+    def _get_validation_state(self) -> tuple:
+        """Returns a snapshot of everything validate_protocol() checks."""
+        return (self.state_machine, id(self.context), len(self.context), self._get_tokens_state(),
+                tuple((id(instruction), instruction.get_validation_state()) for instruction in self.instructions))
+
+    def _validate_instruction(self, instruction: BaseInstruction):
+        """Validates an Instruction and its guardrails, unless it is unchanged since it was last validated."""
+        instruction_state: tuple = instruction.get_validation_state()
+        if self._validated_instructions.get(instruction) == instruction_state:
+            return
+
+        instruction.validate_instruction()
+        for guardrail in instruction.get_guardrails():
+            guardrail.validate_guardrail()
+        self._validated_instructions[instruction] = instruction_state
+
     def validate_protocol(self) -> tuple[bool, Optional[str]]:
         """
         Validates that the protocol meets all requirements for training.
+
+        Instructions and tokens that are unchanged since the last successful validation are not checked again, and the
+        result is reused as is if nothing changed, e.g. when template() is called after save().
         :return: Tuple of (True if valid, error message if invalid)
         """
+        validation_state: tuple = self._get_validation_state()
+        if validation_state == self._validated_state:
+            return True, None
+
         try:
             if len(self.instructions) == 0:
                 raise ProtocolError(
@@ -503,14 +1363,13 @@ class ProtocolV1(BaseProtocol):
             for line in self.context:
                 self._validate_context_line_length(line)
 
-            used_values: Set[str] = {token.value for token in self.tokens}
-            validate_string_subset(used_values)
-            validate_string_subset(self.used_keys)
+            tokens_state: tuple = self._get_tokens_state()
+            if tokens_state != self._validated_tokens_state:
+                self._validate_token_conflicts()
+                self._validated_tokens_state = tokens_state
 
             for instruction in self.instructions:
-                instruction.validate_instruction()
-                for guardrail in instruction.get_guardrails():
-                    guardrail.validate_guardrail()
+                self._validate_instruction(instruction)
 
             if self.state_machine:
                 self._validate_state_machine_requirements()
@@ -520,4 +1379,5 @@ class ProtocolV1(BaseProtocol):
             print(f"Protocol invalid: {error_msg}")
             return False, error_msg
 
+        self._validated_state = validation_state
         return True, None
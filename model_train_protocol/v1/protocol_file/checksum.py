@@ -0,0 +1,140 @@
+import hashlib
+import os
+import re
+from typing import BinaryIO, List, Optional, TextIO
+
+from model_train_protocol.errors import ProtocolFileError
+from model_train_protocol.v1.protocol_file.json_encoder import INDENT, JSON_BACKEND, JSONEncoder
+
+CHECKSUM_FIELD: str = "checksum"
+
+_DOCUMENT_END: str = "\n}"
+_COMPACT_DOCUMENT_END: str = "}"
+# The checksum member of an indented file, or of a compact file
+_CHECKSUM_MEMBER = re.compile(rb',(?:\n {%d}"%s": "([0-9a-f]{64})"\n|"%s":"([0-9a-f]{64})")}\s*\Z' % (
+    INDENT, CHECKSUM_FIELD.encode(), CHECKSUM_FIELD.encode()))
+_TAIL_SIZE: int = 256
+_READ_SIZE: int = 1 << 20
+
+
+class ChecksumWriter:
+    """
+    Text file wrapper that appends a content checksum to the JSON object written through it.
+
+    Everything written is passed through to the file except the closing line of the object, which is held back.
+    On finish(), a final "checksum" member holding the SHA-256 digest of all preceding bytes is written in its place.
+    The object must be indented by INDENT spaces per level, or compact without any whitespace.
+    """
+
+    def __init__(self, file: TextIO, compact: bool = False):
+        """
+        Initializes the ChecksumWriter.
+
+        :param file: The text file handle to write to.
+        :param compact: Whether the JSON object is written without whitespace.
+        """
+        self.file: TextIO = file
+        self.compact: bool = compact
+        self._document_end: str = _COMPACT_DOCUMENT_END if compact else _DOCUMENT_END
+        self._hash = hashlib.sha256()
+        self._pending: str = ""
+
+    def write(self, text: str):
+        """Writes text to the file, holding back the last characters until more text arrives."""
+        text = self._pending + text
+        self._pending = text[-len(self._document_end):]
+        body: str = text[:-len(self._document_end)]
+        if body:
+            self._hash.update(body.encode("utf-8"))
+            self.file.write(body)
+
+    def finish(self) -> str:
+        """
+        Writes the checksum member and closes the JSON object.
+
+        :return: The checksum, as a hexadecimal SHA-256 digest.
+        """
+        if self._pending != self._document_end:
+            layout: str = "a compact" if self.compact else "an indented"
+            raise ProtocolFileError(f"A checksum can only be appended to {layout} JSON object.")
+        if self.compact:
+            self.file.write(f',"{CHECKSUM_FIELD}":"{self._hash.hexdigest()}"{self._document_end}')
+        else:
+            self.file.write(f',\n{" " * INDENT}"{CHECKSUM_FIELD}": "{self._hash.hexdigest()}"{self._document_end}')
+        self._pending = ""
+        return self._hash.hexdigest()
+
+
+def verify_file_checksum(file: BinaryIO) -> bool:
+    """
+    Verifies the checksum embedded in a saved protocol file against the file contents.
+
+    The file is read once from its current position to the end without seeking, so decompressing file handles are
+    verified without decompressing them more than once.
+    :param file: The binary file handle of the protocol file, at the start of the file. The position is left at the end.
+    :return: True if the file has a checksum and it matches, False otherwise.
+    """
+    return read_file_checksum(file) is not None
+
+
+def read_file_checksum(file: BinaryIO) -> Optional[str]:
+    """
+    Reads the checksum embedded in a saved file, verifying it against the file contents as verify_file_checksum() does.
+
+    :param file: The binary file handle of the saved file, at the start of the file. The position is left at the end.
+    :return: The checksum if the file has one and it matches, None otherwise.
+    """
+    content_hash = hashlib.sha256()
+    tail: bytes = b""
+    while chunk := file.read(_READ_SIZE):
+        tail += chunk
+        if len(tail) > _TAIL_SIZE:
+            content_hash.update(memoryview(tail)[:-_TAIL_SIZE])
+            tail = tail[-_TAIL_SIZE:]
+
+    match: Optional[re.Match] = _CHECKSUM_MEMBER.search(tail)
+    if match is None:
+        return None
+    content_hash.update(tail[:match.start()])
+    checksum: str = (match.group(1) or match.group(2)).decode()
+    return checksum if content_hash.hexdigest() == checksum else None
+
+
+def read_embedded_checksum(file: BinaryIO) -> Optional[str]:
+    """
+    Reads the checksum embedded at the end of a saved file, without verifying it against the file contents.
+
+    :param file: A seekable binary file handle of the saved file. The position is left at the end.
+    :return: The checksum if the file ends with one, None otherwise.
+    """
+    file.seek(0, os.SEEK_END)
+    file.seek(max(file.tell() - _TAIL_SIZE, 0))
+    match: Optional[re.Match] = _CHECKSUM_MEMBER.search(file.read())
+    if match is None:
+        return None
+    return (match.group(1) or match.group(2)).decode()
+
+
+def verify_document_checksum(document: dict) -> bool:
+    """
+    Verifies the checksum of a parsed protocol file by re-encoding the rest of the document.
+
+    The layout of the file is not known, so the document is re-encoded indented and compact, with the default
+    encoder and with the standard library, until one encoding matches.
+    :param document: The parsed protocol file, with keys in file order.
+    :return: True if the document has a checksum and it matches, False otherwise.
+    """
+    checksum: Optional[str] = document.get(CHECKSUM_FIELD)
+    if not isinstance(checksum, str):
+        return False
+    content: dict = {key: value for key, value in document.items() if key != CHECKSUM_FIELD}
+    for indent, document_end in ((INDENT, _DOCUMENT_END), (None, _COMPACT_DOCUMENT_END)):
+        encoder: JSONEncoder = JSONEncoder(indent=indent)
+        encoders: List[JSONEncoder] = [encoder]
+        if encoder.backend != JSON_BACKEND:
+            encoders.append(JSONEncoder(indent=indent, backend=JSON_BACKEND))
+        for encoder in encoders:
+            text: str = encoder.dumps(content)
+            if hashlib.sha256(text[:-len(document_end)].encode("utf-8")).hexdigest() == checksum:
+                return True
+    return False
@@ -0,0 +1,113 @@
+import io
+import os
+import shutil
+import tempfile
+from typing import BinaryIO, Optional, TextIO, Union
+
+from model_train_protocol.errors import ProtocolFileError
+
+GZIP: str = "gzip"
+XZ: str = "xz"
+BZ2: str = "bz2"
+
+# File name suffix of each compression
+COMPRESSION_SUFFIXES: dict[str, str] = {GZIP: ".gz", XZ: ".xz", BZ2: ".bz2"}
+
+# Leading bytes of each compressed format
+_MAGIC_BYTES: dict[bytes, str] = {b"\x1f\x8b": GZIP, b"\xfd7zXZ\x00": XZ, b"BZh": BZ2}
+_MAGIC_SIZE: int = max(len(magic) for magic in _MAGIC_BYTES)
+
+# zlib's default level; gzip's level 9 is several times slower for a marginally smaller file
+_GZIP_LEVEL: int = 6
+
+# Decompressed content up to this size is kept in memory, and larger content is spooled to a temporary file
+_SPOOL_MAX_SIZE: int = 64 << 20
+_SPOOL_CHUNK_SIZE: int = 1 << 20
+
+
+def validate_compression(compression: Optional[str]):
+    """
+    Validates a compression name.
+
+    :param compression: "gzip", "xz", "bz2", or None for no compression.
+    """
+    if compression is not None and compression not in COMPRESSION_SUFFIXES:
+        raise ProtocolFileError(
+            f"Unknown compression '{compression}'. Expected one of: {', '.join(COMPRESSION_SUFFIXES)}, or None.")
+
+
+def detect_compression(file: BinaryIO) -> Optional[str]:
+    """
+    Detects the compression of a file from its leading magic bytes.
+
+    :param file: The binary file handle, at the start of the file. The position is restored.
+    :return: The compression name, or None if the file is not compressed.
+    """
+    position: int = file.tell()
+    header: bytes = file.read(_MAGIC_SIZE)
+    file.seek(position)
+    for magic, compression in _MAGIC_BYTES.items():
+        if header.startswith(magic):
+            return compression
+    return None
+
+
+def open_for_reading(path: Union[str, os.PathLike]) -> BinaryIO:
+    """
+    Opens a protocol file for reading, decompressing it transparently if it is compressed.
+
+    Seeking backward in a gzip, xz or bz2 stream decompresses it again from the start, and loading seeks back once per
+    instruction set. Compressed files are therefore decompressed once, into a temporary file that is kept in memory
+    while it is small, and read from there.
+    :param path: The path to the file.
+    :return: A seekable binary file handle over the uncompressed content.
+    """
+    with open(path, 'rb') as file:
+        compression: Optional[str] = detect_compression(file)
+    if compression is None:
+        return open(path, 'rb')
+    spool: BinaryIO = tempfile.SpooledTemporaryFile(max_size=_SPOOL_MAX_SIZE)
+    try:
+        with _open_compressed(path, compression) as compressed:
+            shutil.copyfileobj(compressed, spool, _SPOOL_CHUNK_SIZE)
+        spool.seek(0)
+    except BaseException:
+        spool.close()
+        raise
+    return spool
+
+
+def _open_compressed(path: Union[str, os.PathLike], compression: str) -> BinaryIO:
+    """Opens a compressed file as a stream of its decompressed content."""
+    if compression == GZIP:
+        import gzip
+        return gzip.GzipFile(path, mode='rb')
+    if compression == XZ:
+        import lzma
+        return lzma.LZMAFile(path, mode='rb')
+    import bz2
+    return bz2.BZ2File(path, mode='rb')
+
+
+def open_for_writing(path: Union[str, os.PathLike], compression: Optional[str] = None) -> TextIO:
+    """
+    Opens a UTF-8 text file for writing, compressing everything written to it.
+
+    Gzip files are written without a timestamp, so saving the same content twice gives the same bytes.
+    :param path: The path to the file.
+    :param compression: "gzip", "xz", "bz2", or None for no compression.
+    :return: A text file handle.
+    """
+    validate_compression(compression)
+    if compression is None:
+        return open(path, 'w', encoding="utf-8")
+    if compression == GZIP:
+        import gzip
+        binary: BinaryIO = gzip.GzipFile(path, mode='wb', compresslevel=_GZIP_LEVEL, mtime=0)
+    elif compression == XZ:
+        import lzma
+        binary = lzma.LZMAFile(path, mode='wb')
+    else:
+        import bz2
+        binary = bz2.BZ2File(path, mode='wb')
+    return io.TextIOWrapper(binary, encoding="utf-8")
@@ -0,0 +1,109 @@
+import os
+import tempfile
+from typing import Dict, Optional, Set
+
+from model_train_protocol.v1.protocol_file.json_encoder import JSONEncoder
+
+FRAGMENT_SUFFIX: str = ".fragment"
+# Version of the fragment layout, part of every key so fragments of older layouts are never spliced in
+FRAGMENT_FORMAT_VERSION: int = 1
+
+
+class FragmentCache:
+    """
+    Content-addressed cache of the encoded JSON of instruction sets, for protocols that are saved repeatedly.
+
+    Fragments are keyed by the content fingerprint of their Instruction and the layout they were encoded with, so a
+    fragment is only reused while its instruction set is unchanged. Fragments are kept in memory and, if a directory
+    is given, also written to it, so later processes saving the same instruction sets can reuse them.
+
+    After each save, the fragments that were not used are dropped from memory, which keeps about one copy of the
+    instruction sets in memory. Fragment files are kept until clear() is called.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        """
+        Initializes the FragmentCache.
+
+        :param path: The directory to store fragment files in. If None, fragments are only kept in memory.
+        """
+        self.path: Optional[str] = path
+        self.hits: int = 0
+        self.misses: int = 0
+        self._fragments: Dict[str, str] = {}
+        self._used_keys: Set[str] = set()
+        if path is not None:
+            os.makedirs(path, exist_ok=True)
+
+    @classmethod
+    def get_key(cls, fingerprint: str, encoder: JSONEncoder) -> str:
+        """
+        Returns the cache key of a fragment.
+
+        :param fingerprint: The content fingerprint of the Instruction of the fragment.
+        :param encoder: The encoder the fragment is encoded with.
+        """
+        layout: str = "compact" if encoder.compact else f"indent{encoder.indent}"
+        return f"{fingerprint}-{layout}-{encoder.backend}-v{FRAGMENT_FORMAT_VERSION}"
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Returns a cached fragment, reading it from the cache directory if it is not in memory.
+
+        :param key: The key of the fragment, from get_key().
+        :return: The fragment, or None if it is not cached.
+        """
+        fragment: Optional[str] = self._fragments.get(key)
+        if fragment is None and self.path is not None:
+            try:
+                with open(self._get_filename(key), 'r', encoding="utf-8", newline="") as file:
+                    fragment = file.read()
+            except FileNotFoundError:
+                pass
+            else:
+                self._fragments[key] = fragment
+
+        if fragment is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self._used_keys.add(key)
+        return fragment
+
+    def put(self, key: str, fragment: str):
+        """
+        Caches a fragment, writing it to the cache directory if there is one.
+
+        :param key: The key of the fragment, from get_key().
+        :param fragment: The encoded fragment.
+        """
+        self._fragments[key] = fragment
+        self._used_keys.add(key)
+        if self.path is not None:
+            # Written to a temporary file first, so a fragment file is never read while partially written
+            descriptor, temporary_filename = tempfile.mkstemp(dir=self.path, suffix=".tmp")
+            try:
+                with os.fdopen(descriptor, 'w', encoding="utf-8", newline="") as file:
+                    file.write(fragment)
+                os.replace(temporary_filename, self._get_filename(key))
+            except BaseException:
+                os.remove(temporary_filename)
+                raise
+
+    def retain_used(self):
+        """Drops the fragments that were not used since the last call from memory."""
+        self._fragments = {key: fragment for key, fragment in self._fragments.items() if key in self._used_keys}
+        self._used_keys = set()
+
+    def clear(self):
+        """Removes every fragment from memory and from the cache directory."""
+        self._fragments = {}
+        self._used_keys = set()
+        if self.path is not None:
+            for filename in os.listdir(self.path):
+                if filename.endswith(FRAGMENT_SUFFIX):
+                    os.remove(os.path.join(self.path, filename))
+
+    def _get_filename(self, key: str) -> str:
+        """Returns the path of the file of a fragment."""
+        return os.path.join(self.path, f"{key}{FRAGMENT_SUFFIX}")
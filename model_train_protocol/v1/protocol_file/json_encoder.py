@@ -0,0 +1,140 @@
+import json
+from typing import Any, Optional, TextIO
+
+from model_train_protocol.errors import ProtocolFileError
+
+INDENT: int = 4
+
+JSON_BACKEND: str = "json"
+ORJSON_BACKEND: str = "orjson"
+BACKENDS: tuple[str, ...] = (ORJSON_BACKEND, JSON_BACKEND)
+
+_ORJSON_INDENT: int = 2  # orjson only supports two-space indentation
+
+
+class JSONEncoder:
+    """
+    Encodes protocol and template files as JSON text.
+
+    Indented output matches json.dumps(value, indent=indent, ensure_ascii=False) and compact output matches
+    json.dumps(value, separators=(",", ":"), ensure_ascii=False), whichever backend encodes it. Object keys are
+    written in insertion order.
+
+    The orjson backend is used when it is installed, and is much faster than the standard library for indented
+    output. It writes floats in exponent notation without a plus sign or leading zeros (1e16 instead of 1e+16), which
+    parses to the same values, and writes non-finite numbers as null, so it must not be used for documents that may
+    contain them. Values orjson cannot encode, such as integers wider than 64 bits, are encoded with the standard
+    library instead.
+    """
+
+    def __init__(self, indent: Optional[int] = INDENT, backend: Optional[str] = None):
+        """
+        Initializes the JSONEncoder.
+
+        :param indent: The number of spaces per indentation level, or None for compact output without whitespace.
+        :param backend: The encoding backend, "orjson" or "json". If None, uses orjson when it is installed and the
+            standard library json module otherwise.
+        """
+        if indent is not None and indent < 1:
+            raise ProtocolFileError(f"indent must be at least 1, or None for compact output. Got: {indent}")
+        if backend is None:
+            backend = ORJSON_BACKEND if _orjson() is not None else JSON_BACKEND
+        elif backend not in BACKENDS:
+            raise ProtocolFileError(f"Unknown JSON backend '{backend}'. Expected one of: {', '.join(BACKENDS)}.")
+        elif backend == ORJSON_BACKEND and _orjson() is None:
+            raise ProtocolFileError("The orjson backend was requested, but orjson is not installed.")
+        self.indent: Optional[int] = indent
+        self.backend: str = backend
+
+    @property
+    def compact(self) -> bool:
+        """Returns True if the output has no whitespace."""
+        return self.indent is None
+
+    @property
+    def key_separator(self) -> str:
+        """Returns the separator written between the key and value of an object member."""
+        return ":" if self.compact else ": "
+
+    def newline(self, level: int) -> str:
+        """Returns the line break and indentation before a value at the given level, or nothing if compact."""
+        return "" if self.compact else "\n" + " " * (self.indent * level)
+
+    def dumps(self, value: Any, level: int = 0) -> str:
+        """
+        Encodes a value as JSON text.
+
+        :param value: The JSON-compatible value.
+        :param level: The indentation level the value is written at inside an enclosing document.
+        :return: The JSON text.
+        """
+        text: str = self._dumps(value)
+        if level > 0 and not self.compact:
+            # JSON strings never contain raw newlines, so every newline is a structural line break
+            text = text.replace("\n", self.newline(level))
+        return text
+
+    def _dumps(self, value: Any) -> str:
+        """Encodes a value as JSON text at the top level."""
+        if self.backend == ORJSON_BACKEND:
+            orjson = _orjson()
+            option: int = orjson.OPT_NON_STR_KEYS | (0 if self.compact else orjson.OPT_INDENT_2)
+            try:
+                text: str = orjson.dumps(value, option=option).decode("utf-8")
+            except TypeError:  # Includes orjson.JSONEncodeError
+                return self._dumps_json(value)
+            if self.compact or self.indent == _ORJSON_INDENT:
+                return text
+            return self._reindent(text)
+        return self._dumps_json(value)
+
+    def dump(self, value: Any, file: TextIO):
+        """
+        Encodes a value as JSON text and writes it to a file handle.
+
+        :param value: The JSON-compatible value.
+        :param file: The text file handle to write to.
+        """
+        file.write(self.dumps(value))
+
+    def _dumps_json(self, value: Any) -> str:
+        """Encodes a value with the standard library json module."""
+        if self.compact:
+            return json.dumps(value, separators=(",", ":"), ensure_ascii=False)
+        return json.dumps(value, indent=self.indent, ensure_ascii=False)
+
+    def _reindent(self, text: str) -> str:
+        """
+        Converts two-space indented text to the encoder's indentation.
+
+        JSON strings never contain raw newlines or tabs, so the spaces after each newline are indentation only, and a
+        tab can mark each converted level. Levels are converted deepest first with one str.replace() pass per level,
+        which is much faster than a regular expression substitution per line.
+        """
+        depth: int = 0
+        while "\n" + " " * (_ORJSON_INDENT * (depth + 1)) in text:
+            depth += 1
+        for level in range(depth, 0, -1):
+            text = text.replace("\n" + " " * (_ORJSON_INDENT * level), "\n" + "\t" * level)
+        return text.replace("\t", " " * self.indent)
+
+    def __repr__(self) -> str:
+        return f"JSONEncoder(indent={self.indent}, backend='{self.backend}')"
+
+
+_NOT_IMPORTED = object()
+
+# orjson is optional and only imported when an encoder is created, see _orjson()
+_orjson_module: Any = _NOT_IMPORTED
+
+
+def _orjson() -> Any:
+    """Returns the orjson module, importing it on first use, or None if it is not installed."""
+    global _orjson_module
+    if _orjson_module is _NOT_IMPORTED:
+        try:
+            import orjson
+        except ImportError:  # orjson is optional, encoding falls back to the standard library
+            orjson = None
+        _orjson_module = orjson
+    return _orjson_module
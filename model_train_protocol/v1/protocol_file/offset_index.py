@@ -0,0 +1,213 @@
+import json
+import mmap
+import os
+import re
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Optional, Tuple
+
+from model_train_protocol.errors import ProtocolFileError
+from model_train_protocol.v1.protocol_file.checksum import CHECKSUM_FIELD
+from model_train_protocol.v1.protocol_file.json_encoder import JSONEncoder
+from model_train_protocol.v1.protocol_file.stream_reader import JSONStreamReader
+
+INDEX_SUFFIX: str = "_index.json"
+# Version of the index layout, so indexes of other layouts are rejected instead of misread
+INDEX_FORMAT_VERSION: int = 1
+DEFAULT_INDEX_INTERVAL: int = 1000
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_DECODER: json.JSONDecoder = json.JSONDecoder()
+# Size of the windows of the file the samples are scanned in. Windows grow to fit larger samples.
+_WINDOW_SIZE: int = 1 << 20
+
+
+@dataclass
+class IndexedInstructionSet:
+    """The byte offsets of an instruction set of a bloom file."""
+
+    name: str
+    offset: int  # Byte offset of the instruction set object
+    samples: int  # Number of samples of the instruction set
+    sample_offsets: List[int]  # Byte offsets of every interval-th sample, starting with the first
+
+
+@dataclass
+class OffsetIndex:
+    """The byte offsets of the top-level members, instruction sets and samples of a bloom file."""
+
+    file_checksum: str  # Checksum embedded in the bloom file, which ties the index to the file it was built from
+    size: int  # Size of the bloom file in bytes
+    interval: int  # Number of samples between indexed samples
+    members: Dict[str, int]  # Byte offset of the value of each top-level member, other than the instruction
+    sets: List[IndexedInstructionSet]
+
+
+def get_index_filename(path: str) -> str:
+    """Returns the path of the offset index of a bloom file, e.g. "my_protocol_model_index.json"."""
+    root: str = path[:-len(".json")] if path.endswith(".json") else path
+    return f"{root}{INDEX_SUFFIX}"
+
+
+def build_index(path: str, interval: int = DEFAULT_INDEX_INTERVAL) -> OffsetIndex:
+    """
+    Builds the offset index of an uncompressed bloom file, scanning it once.
+
+    The structure of the file is read with a JSONStreamReader, and the samples of each instruction set are scanned
+    with the C JSON decoder, which is much faster than skipping them with the reader.
+
+    :param path: The path to a bloom file written by save().
+    :param interval: The number of samples between indexed samples. Reading a sample decodes up to interval - 1
+        samples before it, so smaller intervals give faster reads and larger indexes.
+    :return: The offset index.
+    """
+    if interval < 1:
+        raise ProtocolFileError(f"The index interval must be at least 1, got {interval}.")
+    members: Dict[str, int] = {}
+    sets: List[IndexedInstructionSet] = []
+    checksum: Optional[str] = None
+    with open(path, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+        reader: JSONStreamReader = JSONStreamReader(file)
+        for key in reader.iter_object():
+            reader.peek()
+            if key == CHECKSUM_FIELD:
+                checksum = reader.read_value()
+            elif key == "instruction":
+                for instruction_key in reader.iter_object():
+                    if instruction_key != "sets":
+                        reader.skip_value()
+                        continue
+                    for _ in reader.iter_array():
+                        sets.append(_index_instruction_set(reader, buffer=buffer, interval=interval))
+            else:
+                members[key] = reader.tell()
+                reader.skip_value()
+        size: int = os.fstat(file.fileno()).st_size
+
+    if checksum is None:
+        raise ProtocolFileError(f"Protocol file '{path}' has no checksum. Only files written by save() can be indexed.")
+    return OffsetIndex(file_checksum=checksum, size=size, interval=interval, members=members, sets=sets)
+
+
+def write_index(path: str, interval: int = DEFAULT_INDEX_INTERVAL, encoder: Optional[JSONEncoder] = None) -> str:
+    """
+    Builds the offset index of an uncompressed bloom file and writes it next to the file.
+
+    :param path: The path to a bloom file written by save().
+    :param interval: The number of samples between indexed samples.
+    :param encoder: The JSON encoder of the index file. Defaults to JSONEncoder().
+    :return: The path of the index file.
+    """
+    if encoder is None:
+        encoder = JSONEncoder()
+    index: OffsetIndex = build_index(path, interval=interval)
+    filename: str = get_index_filename(path)
+    with open(filename, 'w', encoding="utf-8") as file:
+        encoder.dump({"version": INDEX_FORMAT_VERSION, **asdict(index)}, file)
+    return filename
+
+
+def read_index(path: str) -> OffsetIndex:
+    """
+    Reads the offset index of a bloom file.
+
+    :param path: The path to the bloom file.
+    :return: The offset index.
+    """
+    filename: str = get_index_filename(path)
+    try:
+        with open(filename, 'r', encoding="utf-8") as file:
+            document: dict = json.load(file)
+    except FileNotFoundError:
+        raise ProtocolFileError(
+            f"Protocol file '{path}' has no offset index. Save it with index=True, or index it with write_index().")
+    except json.JSONDecodeError as e:
+        raise ProtocolFileError(f"Invalid offset index '{os.path.basename(filename)}': {e}")
+    if document.get("version") != INDEX_FORMAT_VERSION:
+        raise ProtocolFileError(
+            f"Offset index '{os.path.basename(filename)}' has version {document.get('version')}, expected "
+            f"{INDEX_FORMAT_VERSION}. Index the file again with write_index().")
+    return OffsetIndex(file_checksum=document["file_checksum"], size=document["size"],
+                       interval=document["interval"], members=document["members"],
+                       sets=[IndexedInstructionSet(**instruction_set) for instruction_set in document["sets"]])
+
+
+def remove_index(path: str):
+    """Removes the offset index of a bloom file, if it has one."""
+    filename: str = get_index_filename(path)
+    if os.path.exists(filename):
+        os.remove(filename)
+
+
+def _index_instruction_set(reader: JSONStreamReader, buffer: mmap.mmap, interval: int) -> IndexedInstructionSet:
+    """Indexes the instruction set at the reader's position."""
+    reader.peek()
+    offset: int = reader.tell()
+    name: str = ""
+    sample_count: int = 0
+    sample_offsets: List[int] = []
+    for key in reader.iter_object():
+        if key == "name":
+            name = reader.read_value()
+        elif key == "samples":
+            reader.peek()
+            sample_count, sample_offsets, end_offset = _index_samples(buffer, offset=reader.tell(), interval=interval)
+            reader.seek(end_offset)
+        else:
+            reader.skip_value()
+    return IndexedInstructionSet(name=name, offset=offset, samples=sample_count, sample_offsets=sample_offsets)
+
+
+def _index_samples(buffer: mmap.mmap, offset: int, interval: int) -> Tuple[int, List[int], int]:
+    """
+    Indexes the samples array at an offset of the file.
+
+    The file is decoded in windows as Latin-1, which maps each byte to one character, so positions in a window are
+    byte offsets and multibyte characters split across windows stay intact.
+    :return: Tuple of (the number of samples, the offsets of every interval-th sample, the offset after the array)
+    """
+    window_start: int = offset
+    window: str = buffer[offset:offset + _WINDOW_SIZE].decode("latin-1")
+
+    def refill(start: int, size: int) -> bool:
+        """Moves the window to start, returning False if the end of the file was already in the window."""
+        nonlocal window_start, window
+        if window_start + len(window) >= len(buffer) and start == window_start:
+            return False
+        window_start, window = start, buffer[start:start + size].decode("latin-1")
+        return True
+
+    if window[:1] != "[":
+        raise ProtocolFileError(f"Expected a samples array at byte offset {offset}.")
+    sample_count: int = 0
+    sample_offsets: List[int] = []
+    position: int = offset + 1
+    while True:
+        index: int = _WHITESPACE.match(window, position - window_start).end()
+        if index >= len(window):
+            if not refill(position, _WINDOW_SIZE):
+                raise ProtocolFileError(f"Unexpected end of file in the samples array at byte offset {offset}.")
+            continue
+        if sample_count == 0 and window[index] == "]":
+            return 0, [], window_start + index + 1
+        try:
+            end: int = _DECODER.raw_decode(window, index)[1]
+        except json.JSONDecodeError as e:
+            # The sample may continue past the window, which is then grown to hold it
+            if not refill(window_start + index, max(_WINDOW_SIZE, 2 * (len(window) - index))):
+                raise ProtocolFileError(f"Invalid sample at byte offset {window_start + index}: {e}")
+            position = window_start
+            continue
+        if sample_count % interval == 0:
+            sample_offsets.append(window_start + index)
+        sample_count += 1
+
+        separator: int = _WHITESPACE.match(window, end).end()
+        if separator >= len(window):
+            refill(window_start + end, _WINDOW_SIZE)
+            separator = _WHITESPACE.match(window, 0).end()
+        if window[separator:separator + 1] == ",":
+            position = window_start + separator + 1
+        elif window[separator:separator + 1] == "]":
+            return sample_count, sample_offsets, window_start + separator + 1
+        else:
+            raise ProtocolFileError(f"Expected ',' or ']' after a sample at byte offset {window_start + separator}.")
@@ -1,16 +1,25 @@
+import itertools
 from dataclasses import dataclass, field
-from typing import Collection, List, Dict, Set
+from typing import Any, Callable, Collection, Iterable, List, Dict, Optional, Set, TextIO, Iterator, Tuple, Union
 
 from packaging.version import Version
 
 from model_train_protocol import Token, NumToken
-from model_train_protocol.common.instructions import BaseInstruction
-from model_train_protocol_schemas.structures.protocol import Instruction, TokenInfo, Sample, \
-    InstructionSet, Guardrail
-from model_train_protocol_schemas.structures.protocol import Protocol
+from model_train_protocol.common.instructions import BaseInstruction, SampleStore
+from model_train_protocol.common.instructions.BaseInstruction import Sample as InstructionSample
+from model_train_protocol_schemas.structures.protocol import Guardrail
 from model_train_protocol_schemas.utils import get_bloom_schema_url
-from model_train_protocol.common.tokens import SpecialToken
-from model_train_protocol.errors import ProtocolFileLayerDepthError
+from model_train_protocol.common.tokens import FinalToken, SpecialToken
+from model_train_protocol.errors import ProtocolFileError, ProtocolFileLayerDepthError
+from model_train_protocol.v1.protocol_file.checksum import ChecksumWriter
+from model_train_protocol.v1.protocol_file.fragment_cache import FragmentCache
+from model_train_protocol.v1.protocol_file.json_encoder import INDENT, JSONEncoder
+from model_train_protocol.v1.protocol_file.shards import SHARDS_FIELD
+from model_train_protocol.v1.protocol_file.stream_writer import ProtocolStreamWriter, RawJSON, StreamedArray, \
+    StreamedObject
+
+# Indentation level of the instruction set objects in the protocol file: document, instruction, sets, set
+_INSTRUCTION_SET_LEVEL: int = 3
 
 
 class ProtocolFileV1:
@@ -30,8 +39,9 @@ class ProtocolFileV1:
         guardrails: List[Guardrail]
         context: List[str]
         set: List[List[str]]
-        samples: List
+        samples: List[InstructionSample]
         ppo: List
+        instruction: Optional[BaseInstruction] = field(default=None, repr=False)  # The Instruction of the set
 
     @dataclass
     class Batches:
@@ -73,9 +83,7 @@ class ProtocolFileV1:
     def add_tokens(self, tokens: Collection[Token]):
         """Adds tokens to the template."""
         for token in tokens:
-            token_dict: Dict[str, dict] = token.to_dict()
-            token_dict.pop("value")
-            self.tokens[token.value] = token_dict
+            self.tokens[token.value] = self._get_token_info(token)
 
             # Add numbers to the numbers dictionary
             if isinstance(token, NumToken):
@@ -86,15 +94,21 @@ class ProtocolFileV1:
                 self.special_token_keys.add(token.key)
 
     def add_instructions(self, instructions: Collection[BaseInstruction]):
-        """Adds instructions to the template."""
-        for instruction in instructions:
+        """
+        Adds instructions to the template, ordered by name.
+
+        Protocols hold their instructions in a set, whose order varies between processes and between protocols built
+        in a different order, so the instruction sets are ordered by their unique names to write the same file.
+        """
+        for instruction in sorted(instructions, key=lambda instruction: instruction.name):
             instruction_set: ProtocolFileV1.ProtocolInstructionSet = ProtocolFileV1.ProtocolInstructionSet(
                 name=instruction.name,
                 guardrails=instruction.serialize_guardrails(),
                 context=instruction.context,
                 set=instruction.serialize_memory_set(),
-                samples=instruction.serialize_samples(),
+                samples=instruction.samples,
                 ppo=instruction.serialize_ppo(),
+                instruction=instruction,
             )
             self.instruction.sets.append(instruction_set)
 
@@ -102,16 +116,30 @@ class ProtocolFileV1:
             for token_set in instruction.get_token_sets():
                 self._add_instruction_token_key(token_set.get_token_key_set())
 
-            # Add the result token in each sample as a special token and to tokens dictionary
-            for sample in instruction.samples:
-                result_token = sample.result
+            # Add the result token of the samples as a special token and to tokens dictionary
+            for result_token in self._get_result_tokens(instruction.samples):
                 # Add to instruction token keys
                 self._add_instruction_token_key(result_token.key)
                 # Add to tokens dictionary if not already present
                 if result_token.value not in self.tokens:
-                    token_dict = result_token.to_dict()
-                    token_dict.pop("value")
-                    self.tokens[result_token.value] = token_dict
+                    self.tokens[result_token.value] = self._get_token_info(result_token)
+
+    @classmethod
+    def _get_token_info(cls, token: Token) -> dict:
+        """Returns the token info written to the protocol file for a token, with its keys in alphabetical order."""
+        token_dict: dict = token.to_dict()
+        return {key: token_dict[key] for key in sorted(token_dict.keys()) if key != "value"}
+
+    @classmethod
+    def _get_result_tokens(cls, samples: Union[List[InstructionSample], SampleStore]) -> List[FinalToken]:
+        """Returns the distinct result token objects of the samples, in order of first use."""
+        if isinstance(samples, SampleStore):
+            return samples.result_tokens
+        result_tokens: Dict[int, FinalToken] = {}
+        for sample in samples:
+            if id(sample.result) not in result_tokens:
+                result_tokens[id(sample.result)] = sample.result
+        return list(result_tokens.values())
 
     def _add_instruction_token_key(self, key: str):
         """Adds an instruction token key to the template."""
@@ -184,8 +212,23 @@ class ProtocolFileV1:
         # Non-dictionary items are placed at the end
         return sorted_dict_items + non_dict_items
 
-    def to_json(self) -> dict:
+    def to_json(self, strict: bool = False) -> dict:
+        """
+        Converts the protocol file to a JSON-compatible dictionary.
+
+        :param strict: Whether to build the dictionary through the Pydantic models of model_train_protocol_schemas,
+            which validates every token and sample against the schema. The default builds the same dictionary
+            directly, which is much faster for large sample counts, but shares the sample lists with the protocol.
+        :return: The protocol file as a dictionary.
+        """
+        if not strict:
+            return self._get_document(stream=False)
+        return self._to_json_strict()
+
+    def _to_json_strict(self) -> dict:
         """Converts the template to a JSON-compatible dictionary using Pydantic models."""
+        from model_train_protocol_schemas.structures.protocol import Instruction, TokenInfo, Sample, \
+            InstructionSet, Protocol
 
         # Create TokenInfo objects for each token
         token_info_dict = {}
@@ -208,8 +251,8 @@ class ProtocolFileV1:
         for instruction_set in self.instruction.sets:
             # Create Sample objects
             samples = []
-            for sample_data in instruction_set.samples:
-                sample = Sample(**sample_data)
+            for instruction_sample in instruction_set.samples:
+                sample = Sample(**instruction_sample.to_dict())
                 samples.append(sample)
 
             instruction_set_obj = InstructionSet(
@@ -272,3 +315,195 @@ class ProtocolFileV1:
         final_json.update(json_dict)
 
         return final_json
+
+    def write(self, file: TextIO, stream: bool = False, strict: bool = False, encoder: Optional[JSONEncoder] = None,
+              fragment_cache: Optional[FragmentCache] = None):
+        """
+        Writes the protocol file to a file handle, followed by a checksum of its contents.
+
+        The file is laid out exactly as encoder.dump(self.to_json(), file), by default the same as
+        json.dump(self.to_json(), file, indent=4, ensure_ascii=False), with a final "checksum" member holding the
+        SHA-256 digest of every byte before it.
+
+        :param file: The text file handle to write to.
+        :param stream: Whether to stream tokens, special tokens and samples to the file one at a time instead of
+            building the full protocol dictionary in memory. The output is identical either way.
+        :param strict: Whether to validate the protocol file against the Pydantic schema models before writing it.
+        :param encoder: The JSON encoder, indented by INDENT spaces or compact. Defaults to JSONEncoder().
+        :param fragment_cache: A cache of encoded instruction sets. If given, the file is streamed, and only instruction
+            sets whose Instruction changed since they were cached are encoded; the others are copied from the cache.
+        """
+        if encoder is None:
+            encoder = JSONEncoder()
+        if encoder.indent not in (INDENT, None):
+            raise ProtocolFileError(f"Protocol files must be indented by {INDENT} spaces or compact. "
+                                    f"Got an indent of {encoder.indent}.")
+        checksum_writer: ChecksumWriter = ChecksumWriter(file, compact=encoder.compact)
+        if stream or fragment_cache is not None:
+            if strict:
+                self._to_json_strict()
+            self._stream(checksum_writer, encoder=encoder, fragment_cache=fragment_cache)
+        else:
+            encoder.dump(self.to_json(strict=strict), checksum_writer)
+        checksum_writer.finish()
+        if fragment_cache is not None:
+            fragment_cache.retain_used()
+
+    def _stream(self, file: TextIO, encoder: Optional[JSONEncoder] = None,
+                fragment_cache: Optional[FragmentCache] = None):
+        """Streams the protocol file to a file handle without building the full protocol dictionary."""
+        writer: ProtocolStreamWriter = ProtocolStreamWriter(file, encoder=encoder)
+        writer.write(self._get_document(stream=True, fragment_cache=fragment_cache, encoder=writer.encoder))
+
+    def get_shard_count(self, max_samples_per_shard: int) -> int:
+        """
+        Returns the number of shards iter_shards() yields.
+
+        :param max_samples_per_shard: The maximum number of samples in each shard.
+        """
+        self._validate_max_samples_per_shard(max_samples_per_shard)
+        return sum(-(-len(instruction_set.samples) // max_samples_per_shard)
+                   for instruction_set in self.instruction.sets)
+
+    def iter_shards(self, max_samples_per_shard: int) -> Iterator[Tuple[int, List[dict]]]:
+        """
+        Splits the samples of each instruction set into shards of consecutive samples, in file order.
+
+        Concatenating the samples of the shards of an instruction set gives the samples of the set in the protocol
+        file. Sets without samples have no shards.
+        :param max_samples_per_shard: The maximum number of samples in each shard.
+        :return: An iterator of (instruction set index, serialized samples) pairs.
+        """
+        self._validate_max_samples_per_shard(max_samples_per_shard)
+        for set_index, instruction_set in enumerate(self.instruction.sets):
+            sample_dicts: Iterator[dict] = self._iter_sample_dicts(instruction_set.samples)
+            while shard := list(itertools.islice(sample_dicts, max_samples_per_shard)):
+                yield set_index, shard
+
+    @classmethod
+    def _validate_max_samples_per_shard(cls, max_samples_per_shard: int):
+        """Validates that shards can hold at least one sample."""
+        if max_samples_per_shard < 1:
+            raise ProtocolFileError(f"max_samples_per_shard must be at least 1. Got: {max_samples_per_shard}")
+
+    def get_manifest(self, shards: List[dict]) -> dict:
+        """
+        Builds the manifest of a sharded protocol file.
+
+        The manifest is the protocol file document with empty sample arrays, followed by a "shards" member listing
+        the shard files that hold the samples.
+        :param shards: The shard entries, in order.
+        :return: The manifest document.
+        """
+        manifest: dict = self._get_document(stream=False, samples=False)
+        manifest[SHARDS_FIELD] = shards
+        return manifest
+
+    def _get_document(self, stream: bool, samples: bool = True, fragment_cache: Optional[FragmentCache] = None,
+                      encoder: Optional[JSONEncoder] = None) -> dict:
+        """
+        Builds the protocol file document in the layout of the Pydantic Protocol model, with alphabetized keys below
+        the top level.
+
+        :param stream: Whether tokens and samples are produced lazily as StreamedObject and StreamedArray nodes for
+            ProtocolStreamWriter, instead of being collected into dictionaries and lists.
+        :param samples: Whether to include the samples of each instruction set. If False, sample arrays are empty.
+        :param fragment_cache: A cache of encoded instruction sets, for a streamed document. If given, instruction
+            sets are RawJSON nodes encoded with the encoder, copied from the cache where possible.
+        :param encoder: The encoder of the cached instruction sets.
+        :return: The protocol file document.
+        """
+        as_object: Callable[[Iterable[Tuple[str, Any]]], Any] = StreamedObject if stream else dict
+        as_array: Callable[[Iterable[Any]], Any] = StreamedArray if stream else list
+        instruction_sets: Iterable[Any]
+        if fragment_cache is not None:
+            instruction_sets = self._iter_cached_instruction_sets(fragment_cache=fragment_cache, encoder=encoder)
+        else:
+            instruction_sets = self._iter_instruction_set_objects(as_object=as_object, as_array=as_array,
+                                                                  samples=samples)
+        return {
+            "$schema": get_bloom_schema_url(version=self.bloom_version),
+            "name": self.name,
+            "inputs": self.inputs,
+            "state_machine": self.state_machine,
+            "encrypted": self.encrypted,
+            "valid": self.valid,
+            "context": list(self.context),
+            "tokens": as_object(self._iter_token_members()),
+            "special_tokens": self._get_special_token_keys(),
+            "instruction": as_object([
+                ("memory", self.instruction.inputs + 1),  # +1 for the response line
+                ("sets", as_array(instruction_sets)),
+            ]),
+        }
+
+    def _iter_token_members(self) -> Iterator[Tuple[str, dict]]:
+        """Yields (token value, token info) pairs in alphabetical order. Token info keys are already alphabetized."""
+        for token_value in sorted(self.tokens.keys()):
+            yield token_value, self.tokens[token_value]
+
+    def _iter_instruction_set_objects(self, as_object: Callable[[Iterable[Tuple[str, Any]]], Any],
+                                      as_array: Callable[[Iterable[Any]], Any], samples: bool = True) -> Iterator[Any]:
+        """
+        Yields each instruction set with alphabetized keys.
+
+        :param as_object: Builds a JSON object from (key, value) pairs.
+        :param as_array: Builds a JSON array from its items.
+        :param samples: Whether to include the samples. If False, the samples array is empty.
+        """
+        for instruction_set in self.instruction.sets:
+            yield self._get_instruction_set_object(instruction_set, as_object=as_object, as_array=as_array,
+                                                   samples=samples)
+
+    def _iter_cached_instruction_sets(self, fragment_cache: FragmentCache, encoder: JSONEncoder) -> Iterator[RawJSON]:
+        """
+        Yields each instruction set encoded at its level, copied from the cache if its Instruction is unchanged, or
+        encoded and added to the cache otherwise.
+        """
+        for instruction_set in self.instruction.sets:
+            key: str = fragment_cache.get_key(instruction_set.instruction.get_content_fingerprint(), encoder=encoder)
+            fragment: Optional[str] = fragment_cache.get(key)
+            if fragment is None:
+                fragment = encoder.dumps(self._get_instruction_set_object(instruction_set, as_object=dict,
+                                                                          as_array=list),
+                                         level=_INSTRUCTION_SET_LEVEL)
+                fragment_cache.put(key, fragment)
+            yield RawJSON(fragment)
+
+    @classmethod
+    def _get_instruction_set_object(cls, instruction_set: 'ProtocolFileV1.ProtocolInstructionSet',
+                                    as_object: Callable[[Iterable[Tuple[str, Any]]], Any],
+                                    as_array: Callable[[Iterable[Any]], Any], samples: bool = True) -> Any:
+        """Builds an instruction set with alphabetized keys."""
+        guardrails: List[dict] = [
+            {key: guardrail[key] for key in sorted(guardrail.keys())} for guardrail in instruction_set.guardrails
+        ]
+        return as_object([
+            ("context", list(instruction_set.context)),
+            ("guardrails", guardrails),
+            ("name", instruction_set.name),
+            ("ppo", instruction_set.ppo),
+            ("samples", as_array(cls._iter_sample_dicts(instruction_set.samples) if samples else [])),
+            ("set", instruction_set.set),
+        ])
+
+    @classmethod
+    def _iter_sample_dicts(cls, samples: Union[List[InstructionSample], SampleStore]) -> Iterator[dict]:
+        """
+        Yields serialized samples ordered by result, one sample at a time.
+
+        Samples are grouped by the value of their result token instead of being sorted, which gives the order of a
+        stable sort by result. Sample.to_dict() already returns its keys in alphabetical order.
+        """
+        if isinstance(samples, SampleStore):
+            ordered_samples: Iterable[InstructionSample] = samples.iter_by_result()
+        else:
+            buckets: Dict[str, List[InstructionSample]] = {}
+            for sample in samples:
+                bucket: Optional[List[InstructionSample]] = buckets.get(sample.result.value)
+                if bucket is None:
+                    buckets[sample.result.value] = bucket = []
+                bucket.append(sample)
+            ordered_samples = itertools.chain.from_iterable(buckets[value] for value in sorted(buckets.keys()))
+        for sample in ordered_samples:
+            yield sample.to_dict()
@@ -0,0 +1,220 @@
+import mmap
+import os
+from typing import Any, Dict, Iterator, List, Optional, Union
+
+from model_train_protocol.errors import ProtocolError, ProtocolFileError
+from model_train_protocol.v1.protocol_file.checksum import read_embedded_checksum
+from model_train_protocol.v1.protocol_file.offset_index import IndexedInstructionSet, OffsetIndex, read_index
+from model_train_protocol.v1.protocol_file.segments import Segment, read_segments, verify_segment_chain
+from model_train_protocol.v1.protocol_file.stream_reader import JSONStreamReader
+
+# Samples are small, so random reads only read a little past the value they decode
+_READ_CHUNK_SIZE: int = 1 << 12
+
+
+class _MappedView:
+    """Binary file view of a memory map with its own position, so readers of the same map do not move each other."""
+
+    def __init__(self, buffer: mmap.mmap, offset: int):
+        self._buffer: mmap.mmap = buffer
+        self._position: int = offset
+
+    def read(self, size: int) -> bytes:
+        data: bytes = self._buffer[self._position:self._position + size]
+        self._position += len(data)
+        return data
+
+    def seek(self, offset: int):
+        self._position = offset
+
+    def tell(self) -> int:
+        return self._position
+
+    def seekable(self) -> bool:
+        return True
+
+
+class ProtocolReader:
+    """
+    Random-access reader of a saved bloom file, using its offset index.
+
+    The file is memory-mapped, and each read seeks to the nearest indexed offset and decodes only the values it
+    returns, so a few instruction sets or samples can be inspected without loading the file. Values are returned as
+    they are in the file: tokens carry their "_" suffix and samples are dictionaries. Instruction sets are identified
+    by their index in the file or by their name.
+
+    Samples appended to the file by append_samples() are read from its segment files when the reader is opened, and
+    follow the samples of their instruction set, as they do in Protocol.load(). The "tokens" and "valid" members
+    likewise include the segments.
+
+    The index is checked against the size and embedded checksum of the file when the reader is opened, and the segments
+    against the file they were appended to. The file contents are not verified; use Protocol.load(path, trusted=True)
+    for that.
+    """
+
+    def __init__(self, path: str):
+        """
+        Opens a bloom file and its offset index.
+
+        :param path: The path to an uncompressed bloom file indexed by save(index=True) or write_index().
+        """
+        self.path: str = path
+        self.index: OffsetIndex = read_index(path)
+        self._file = open(path, 'rb')
+        try:
+            self._mmap: mmap.mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            if len(self._mmap) != self.index.size or read_embedded_checksum(self._mmap) != self.index.file_checksum:
+                raise ProtocolFileError(
+                    f"The offset index of '{path}' was built from another version of the file. Index the file again "
+                    f"with write_index().")
+            self.segments: List[Segment] = read_segments(path)
+            verify_segment_chain(path, checksum=self.index.file_checksum, segments=self.segments)
+            # The samples of the segments of each instruction set, in the order they were appended, by set index
+            self._appended_samples: Dict[int, List[dict]] = {}
+            for segment in self.segments:
+                if not 0 <= segment.set < len(self.index.sets) or segment.name != self.index.sets[segment.set].name:
+                    raise ProtocolFileError(
+                        f"Segment file '{os.path.basename(segment.filename)}' belongs to instruction set "
+                        f"'{segment.name}', which is not instruction set {segment.set} of '{os.path.basename(path)}'.")
+                self._appended_samples.setdefault(segment.set, []).extend(segment.samples)
+        except BaseException:
+            self.close()
+            raise
+
+    def __enter__(self) -> 'ProtocolReader':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        """Closes the memory map and the file."""
+        if getattr(self, "_mmap", None) is not None:
+            self._mmap.close()
+            self._mmap = None
+        self._file.close()
+
+    @property
+    def names(self) -> List[str]:
+        """The names of the instruction sets, in file order."""
+        return [instruction_set.name for instruction_set in self.index.sets]
+
+    def read_member(self, key: str) -> Any:
+        """
+        Decodes a top-level member of the file, e.g. "name", "context" or "tokens".
+
+        :param key: The key of the member. The instruction is read with the other methods.
+        :return: The value of the member.
+        """
+        if key not in self.index.members:
+            raise ProtocolError(f"Protocol file '{self.path}' has no top-level member '{key}'.")
+        value: Any = self._get_stream_reader(self.index.members[key]).read_value()
+        if key == "tokens":
+            for segment in self.segments:
+                value.update(segment.tokens)
+        elif key == "valid" and self.segments:
+            value = self.segments[-1].valid
+        return value
+
+    def get_sample_count(self, instruction_set: Union[int, str]) -> int:
+        """
+        Returns the number of samples of an instruction set.
+
+        :param instruction_set: The index or the name of the instruction set.
+        """
+        set_index: int = self._get_set_index(instruction_set)
+        return self.index.sets[set_index].samples + len(self._appended_samples.get(set_index, []))
+
+    def read_instruction_set(self, instruction_set: Union[int, str], samples: bool = False) -> dict:
+        """
+        Decodes an instruction set.
+
+        :param instruction_set: The index or the name of the instruction set.
+        :param samples: Whether to decode the samples. If False, the "samples" member is left out.
+        :return: The instruction set.
+        """
+        set_index: int = self._get_set_index(instruction_set)
+        reader: JSONStreamReader = self._get_stream_reader(self.index.sets[set_index].offset)
+        value: dict = {}
+        for key in reader.iter_object():
+            if key == "samples" and not samples:
+                reader.skip_value()
+            else:
+                value[key] = reader.read_value()
+        if samples:
+            value["samples"].extend(self._appended_samples.get(set_index, []))
+        return value
+
+    def read_sample(self, instruction_set: Union[int, str], index: int) -> dict:
+        """
+        Decodes one sample of an instruction set.
+
+        :param instruction_set: The index or the name of the instruction set.
+        :param index: The index of the sample. Negative indexes count from the last sample.
+        :return: The sample.
+        """
+        set_index: int = self._get_set_index(instruction_set)
+        sample_count: int = self.get_sample_count(set_index)
+        position: int = index + sample_count if index < 0 else index
+        if not 0 <= position < sample_count:
+            raise ProtocolError(
+                f"Sample index {index} is out of range for instruction set '{self.index.sets[set_index].name}' with "
+                f"{sample_count} samples.")
+        return next(self.iter_samples(set_index, start=position, stop=position + 1))
+
+    def iter_samples(self, instruction_set: Union[int, str], start: int = 0,
+                     stop: Optional[int] = None) -> Iterator[dict]:
+        """
+        Decodes a range of consecutive samples of an instruction set, one at a time.
+
+        :param instruction_set: The index or the name of the instruction set.
+        :param start: The index of the first sample.
+        :param stop: The index after the last sample. If None, reads to the last sample.
+        :return: An iterator over the samples.
+        """
+        set_index: int = self._get_set_index(instruction_set)
+        indexed_set: IndexedInstructionSet = self.index.sets[set_index]
+        sample_count: int = self.get_sample_count(set_index)
+        stop = sample_count if stop is None else min(stop, sample_count)
+        if start < 0 or start >= stop:
+            return
+        if start < indexed_set.samples:
+            yield from self._iter_file_samples(indexed_set, start=start, stop=min(stop, indexed_set.samples))
+        if stop > indexed_set.samples:
+            appended_samples: List[dict] = self._appended_samples[set_index]
+            yield from appended_samples[max(start - indexed_set.samples, 0):stop - indexed_set.samples]
+
+    def _iter_file_samples(self, indexed_set: IndexedInstructionSet, start: int, stop: int) -> Iterator[dict]:
+        """Decodes the samples start to stop of an instruction set from the file, where start < stop."""
+        # Start from the nearest indexed sample and skip the samples up to the first one read
+        position: int = start - start % self.index.interval
+        reader: JSONStreamReader = self._get_stream_reader(indexed_set.sample_offsets[position // self.index.interval])
+        while position < start:
+            reader.skip_value()
+            reader.read_separator()
+            position += 1
+        while True:
+            yield reader.read_value()
+            position += 1
+            if position == stop:
+                return
+            reader.read_separator()
+
+    def _get_set_index(self, instruction_set: Union[int, str]) -> int:
+        """Returns the index of the instruction set with an index or a name."""
+        if isinstance(instruction_set, str):
+            for set_index, indexed_set in enumerate(self.index.sets):
+                if indexed_set.name == instruction_set:
+                    return set_index
+            raise ProtocolError(f"Protocol file '{self.path}' has no instruction set named '{instruction_set}'.")
+        if not 0 <= instruction_set < len(self.index.sets):
+            raise ProtocolError(
+                f"Instruction set index {instruction_set} is out of range for '{self.path}' with "
+                f"{len(self.index.sets)} instruction sets.")
+        return instruction_set
+
+    def _get_stream_reader(self, offset: int) -> JSONStreamReader:
+        """Returns a reader over the memory-mapped file, at an offset of the index."""
+        if self._mmap is None:
+            raise ProtocolError(f"The reader of '{self.path}' is closed.")
+        return JSONStreamReader(_MappedView(self._mmap, offset), chunk_size=_READ_CHUNK_SIZE)
@@ -0,0 +1,130 @@
+import json
+import os
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from model_train_protocol.errors import ProtocolError, ProtocolFileError
+from model_train_protocol.v1.protocol_file.checksum import CHECKSUM_FIELD, ChecksumWriter, read_file_checksum
+from model_train_protocol.v1.protocol_file.compression import COMPRESSION_SUFFIXES
+from model_train_protocol.v1.protocol_file.json_encoder import JSONEncoder
+
+SEGMENT_INFIX: str = "_segment_"
+
+
+@dataclass
+class Segment:
+    """Samples appended to an instruction set of a saved bloom file."""
+
+    filename: str
+    name: str  # Name of the instruction set the samples belong to
+    set: int  # Index of the instruction set the samples belong to
+    previous: str  # Checksum of the file the segment was appended to: the bloom file or the previous segment
+    tokens: Dict[str, dict]  # Result tokens of the samples that are not in the bloom file or previous segments
+    samples: List[dict]
+    # Sample count of each result token of the instruction set, with the samples of this segment and those before it
+    results: Dict[str, int]
+    valid: bool  # Whether the bloom file with this segment and those before it is valid
+    checksum: Optional[str]
+
+
+def get_segment_filename(path: str, index: int) -> str:
+    """
+    Returns the path of a segment file of a bloom file, e.g. "my_protocol_model_segment_00001.json" for
+    "my_protocol_model.json". Segments are numbered from 1, in the order they were appended.
+    """
+    root: str = path
+    for suffix in COMPRESSION_SUFFIXES.values():
+        if root.endswith(suffix):
+            root = root[:-len(suffix)]
+            break
+    if root.endswith(".json"):
+        root = root[:-len(".json")]
+    return f"{root}{SEGMENT_INFIX}{index:05d}.json"
+
+
+def get_segment_filenames(path: str) -> List[str]:
+    """Returns the paths of the segment files of a bloom file, in the order they were appended."""
+    filenames: List[str] = []
+    while os.path.exists(filename := get_segment_filename(path, len(filenames) + 1)):
+        filenames.append(filename)
+    return filenames
+
+
+def read_segments(path: str, trusted: bool = False) -> List[Segment]:
+    """
+    Reads the segment files of a bloom file, in the order they were appended.
+
+    :param path: The path to the bloom file.
+    :param trusted: Whether to verify that each segment file is unmodified, i.e. that its embedded checksum matches its
+        contents.
+    :return: The segments.
+    """
+    segments: List[Segment] = []
+    for filename in get_segment_filenames(path):
+        with open(filename, 'rb') as file:
+            checksum: Optional[str] = read_file_checksum(file) if trusted else None
+            file.seek(0)
+            try:
+                document: dict = json.load(file)
+            except json.JSONDecodeError as e:
+                raise ProtocolFileError(f"Invalid segment file '{os.path.basename(filename)}': {e}")
+        if trusted and checksum is None:
+            raise ProtocolError(
+                f"Segment file '{os.path.basename(filename)}' checksum is missing or does not match its contents. Only "
+                f"unmodified segments written by append_samples() can be loaded in trusted mode.")
+        segments.append(Segment(filename=filename, name=document["name"], set=document["set"],
+                                previous=document["previous"], tokens=document["tokens"],
+                                samples=document["samples"], results=document["results"], valid=document["valid"],
+                                checksum=document.get(CHECKSUM_FIELD) if checksum is None else checksum))
+    return segments
+
+
+def verify_segment_chain(path: str, checksum: Optional[str], segments: List[Segment]):
+    """
+    Verifies that each segment was appended to the bloom file as it is now, followed by the segments before it.
+
+    :param path: The path to the bloom file.
+    :param checksum: The checksum embedded in the bloom file.
+    :param segments: The segments of the bloom file, in order.
+    """
+    previous: Optional[str] = checksum
+    for segment in segments:
+        if previous is None or segment.previous != previous:
+            raise ProtocolFileError(
+                f"Segment file '{os.path.basename(segment.filename)}' was not appended to '{os.path.basename(path)}' "
+                f"as it is now. Remove segment files left from an earlier version of the file.")
+        previous = segment.checksum
+
+
+def write_segment(path: str, segment: Segment, encoder: Optional[JSONEncoder] = None) -> str:
+    """
+    Writes a segment file after the existing segments of a bloom file, followed by a checksum of its contents.
+
+    :param path: The path to the bloom file.
+    :param segment: The segment to write. Its filename and checksum are set once it is written.
+    :param encoder: The JSON encoder of the file. Defaults to JSONEncoder().
+    :return: The path of the segment file.
+    """
+    if encoder is None:
+        encoder = JSONEncoder()
+    segment.filename = get_segment_filename(path, len(get_segment_filenames(path)) + 1)
+    # Created exclusively, so a concurrent append cannot overwrite the segment
+    with open(segment.filename, 'x', encoding="utf-8") as file:
+        checksum_writer: ChecksumWriter = ChecksumWriter(file, compact=encoder.compact)
+        encoder.dump({
+            "name": segment.name,
+            "previous": segment.previous,
+            "results": segment.results,
+            "samples": segment.samples,
+            "set": segment.set,
+            "tokens": segment.tokens,
+            "valid": segment.valid,
+        }, checksum_writer)
+        segment.checksum = checksum_writer.finish()
+    return segment.filename
+
+
+def remove_segments(path: str):
+    """Removes the segment files of a bloom file."""
+    for filename in get_segment_filenames(path):
+        os.remove(filename)
@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+import json
+import os
+from collections import deque
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Callable, Deque, Iterable, Iterator, List, Optional, Tuple
+
+from model_train_protocol.errors import ProtocolFileError
+from model_train_protocol.v1.protocol_file.checksum import ChecksumWriter, read_file_checksum
+from model_train_protocol.v1.protocol_file.compression import COMPRESSION_SUFFIXES, open_for_reading, \
+    open_for_writing
+from model_train_protocol.v1.protocol_file.json_encoder import JSONEncoder
+
+if TYPE_CHECKING:
+    from concurrent.futures import Executor, Future
+    from model_train_protocol.v1.protocol_file.protocol_file_v1 import ProtocolFileV1
+
+SHARDS_FIELD: str = "shards"
+MANIFEST_SUFFIX: str = "_manifest.json"
+DEFAULT_MAX_SAMPLES_PER_SHARD: int = 100_000
+
+# Shards submitted to the process pool ahead of the one being collected, per worker
+_PENDING_SHARDS_PER_WORKER: int = 2
+
+
+@dataclass
+class Shard:
+    """The samples of one shard file of a sharded protocol."""
+
+    set: int  # Index of the instruction set the samples belong to
+    samples: List[dict]
+
+
+def get_manifest_filename(name: str) -> str:
+    """Returns the file name of the manifest of a sharded protocol."""
+    return f"{name}{MANIFEST_SUFFIX}"
+
+
+def get_shard_filename(name: str, index: int, compression: Optional[str] = None) -> str:
+    """Returns the file name of a shard of a sharded protocol."""
+    return f"{name}_shard_{index:05d}.json{COMPRESSION_SUFFIXES.get(compression, '')}"
+
+
+def write_sharded(protocol_file: ProtocolFileV1, path: str, name: str,
+                  max_samples_per_shard: int = DEFAULT_MAX_SAMPLES_PER_SHARD, workers: Optional[int] = None,
+                  encoder: Optional[JSONEncoder] = None, compression: Optional[str] = None) -> str:
+    """
+    Writes a protocol file as a manifest and shard files.
+
+    The manifest holds everything but the samples: tokens, special tokens, context and the instruction sets with
+    empty sample arrays, followed by a "shards" member listing each shard file with the index of its instruction set,
+    its sample count and its checksum. Each shard file holds consecutive samples of one instruction set, in file order.
+    Samples are serialized in this process, and shard files are encoded and written concurrently by a process pool.
+    :param protocol_file: The protocol file to write.
+    :param path: The directory to write the files to.
+    :param name: The name the file names start with.
+    :param max_samples_per_shard: The maximum number of samples in each shard file.
+    :param workers: The number of processes writing shards. If None, uses one per CPU, up to the number of shards.
+        With 1, shards are written in this process.
+    :param encoder: The JSON encoder of every file. Defaults to JSONEncoder().
+    :param compression: "gzip", "xz" or "bz2" to compress the shard files. The manifest is not compressed.
+    :return: The path of the manifest.
+    """
+    if encoder is None:
+        encoder = JSONEncoder()
+    workers = _get_worker_count(workers, task_count=protocol_file.get_shard_count(max_samples_per_shard))
+    tasks: Iterator[Tuple[Any, ...]] = (
+        (os.path.join(path, get_shard_filename(name, index, compression)), set_index, samples, encoder, compression)
+        for index, (set_index, samples) in enumerate(protocol_file.iter_shards(max_samples_per_shard)))
+
+    shards: List[dict] = [
+        {"checksum": checksum, "file": os.path.basename(filename), "samples": sample_count, "set": set_index}
+        for filename, set_index, sample_count, checksum in _map_ordered(_write_shard, tasks, workers=workers)
+    ]
+
+    manifest_filename: str = os.path.join(path, get_manifest_filename(name))
+    with open(manifest_filename, 'w', encoding="utf-8") as file:
+        checksum_writer: ChecksumWriter = ChecksumWriter(file, compact=encoder.compact)
+        encoder.dump(protocol_file.get_manifest(shards), checksum_writer)
+        checksum_writer.finish()
+    return manifest_filename
+
+
+def iter_shards(manifest_path: str, manifest: dict, trusted: bool = False,
+                workers: Optional[int] = None) -> Iterator[Shard]:
+    """
+    Reads the shard files of a sharded protocol, in manifest order.
+
+    Shard files are read and parsed concurrently by a process pool, a few shards ahead of the one being yielded,
+    so memory stays bounded by the size of a few shards.
+    :param manifest_path: The path of the manifest. Shard files are read from the same directory.
+    :param manifest: The parsed manifest.
+    :param trusted: Whether to verify that each shard file is unmodified, i.e. that its embedded checksum matches its
+        contents and the checksum listed in the manifest.
+    :param workers: The number of processes reading shards. If None, uses one per CPU, up to the number of shards.
+        With 1, shards are read in this process.
+    :return: An iterator of the shards.
+    """
+    entries: List[dict] = manifest.get(SHARDS_FIELD, [])
+    directory: str = os.path.dirname(os.path.abspath(manifest_path))
+    tasks: Iterator[Tuple[Any, ...]] = ((os.path.join(directory, entry["file"]), trusted) for entry in entries)
+    workers = _get_worker_count(workers, task_count=len(entries))
+
+    for entry, (set_index, samples, checksum) in zip(entries, _map_ordered(_read_shard, tasks, workers=workers)):
+        if set_index != entry["set"] or len(samples) != entry["samples"]:
+            raise ProtocolFileError(f"Shard file '{entry['file']}' does not match its entry in the manifest.")
+        if trusted and checksum != entry["checksum"]:
+            raise ProtocolFileError(
+                f"Shard file '{entry['file']}' checksum is missing or does not match the manifest. Only unmodified "
+                f"files written by save_sharded() can be loaded in trusted mode.")
+        yield Shard(set=set_index, samples=samples)
+
+
+def _write_shard(filename: str, set_index: int, samples: List[dict], encoder: JSONEncoder,
+                 compression: Optional[str]) -> Tuple[str, int, int, str]:
+    """Writes a shard file. Runs in a worker process. Returns (file name, set index, sample count, checksum)."""
+    with open_for_writing(filename, compression=compression) as file:
+        checksum_writer: ChecksumWriter = ChecksumWriter(file, compact=encoder.compact)
+        encoder.dump({"samples": samples, "set": set_index}, checksum_writer)
+        checksum: str = checksum_writer.finish()
+    return filename, set_index, len(samples), checksum
+
+
+def _read_shard(filename: str, trusted: bool) -> Tuple[int, List[dict], Optional[str]]:
+    """Reads a shard file. Runs in a worker process. Returns (set index, samples, verified checksum or None)."""
+    with open_for_reading(filename) as file:
+        checksum: Optional[str] = read_file_checksum(file) if trusted else None
+        file.seek(0)
+        try:
+            shard: dict = json.load(file)
+        except json.JSONDecodeError as e:
+            raise ProtocolFileError(f"Invalid shard file '{os.path.basename(filename)}': {e}")
+    return shard["set"], shard["samples"], checksum
+
+
+def _get_worker_count(workers: Optional[int], task_count: int) -> int:
+    """Returns the number of worker processes for a number of tasks."""
+    if workers is None:
+        return max(1, min(os.cpu_count() or 1, task_count))
+    if workers < 1:
+        raise ProtocolFileError(f"workers must be at least 1. Got: {workers}")
+    return workers
+
+
+def _map_ordered(function: Callable[..., Any], tasks: Iterable[Tuple[Any, ...]], workers: int) -> Iterator[Any]:
+    """
+    Calls a function on the arguments of each task in a process pool, yielding the results in task order.
+
+    Only a few tasks per worker are submitted ahead of the result being yielded, so tasks are produced lazily and
+    finished results do not pile up. With a single worker, tasks run in this process.
+    """
+    if workers == 1:
+        for task in tasks:
+            yield function(*task)
+        return
+
+    from concurrent.futures import ProcessPoolExecutor  # Imports multiprocessing, so only when a pool is needed
+    executor: Executor
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending: Deque[Future] = deque()
+        for task in tasks:
+            pending.append(executor.submit(function, *task))
+            if len(pending) >= workers * _PENDING_SHARDS_PER_WORKER:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
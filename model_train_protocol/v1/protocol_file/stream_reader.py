@@ -0,0 +1,229 @@
+import json
+import re
+from typing import Any, BinaryIO, Iterator, Optional
+
+from model_train_protocol.errors import ProtocolFileError
+
+_WHITESPACE = re.compile(rb"[ \t\n\r]*")
+_STRING_BODY = re.compile(rb'[^"\\]*(?:\\.[^"\\]*)*"', re.DOTALL)
+_STRUCTURAL = re.compile(rb'["{}\[\]]')
+_SCALAR = re.compile(rb"[^ \t\n\r,\]}]*")
+
+DEFAULT_CHUNK_SIZE: int = 1 << 16
+
+
+class JSONStreamReader:
+    """
+    Incremental pull parser over a binary JSON file stream.
+
+    The reader walks the document structurally: objects and arrays are entered with iter_object() and iter_array(),
+    which yield one member at a time, and leaf values are decoded with read_value(). Only the value currently being
+    decoded is held in memory, so arbitrarily large documents can be traversed with bounded memory.
+
+    After each key yielded by iter_object() or each index yielded by iter_array(), the caller must consume exactly
+    one value with read_value(), skip_value(), iter_object() or iter_array().
+    """
+
+    def __init__(self, file: BinaryIO, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        """
+        Initializes the JSONStreamReader.
+
+        :param file: The binary file handle to read from.
+        :param chunk_size: The number of bytes to read from the file at a time.
+        """
+        self.file: BinaryIO = file
+        self.chunk_size: int = chunk_size
+        self._buffer: bytes = b""
+        self._pos: int = 0
+        self._offset: int = file.tell() if file.seekable() else 0  # Absolute file offset of _buffer[0]
+        self._eof: bool = False
+
+    def tell(self) -> int:
+        """Returns the absolute byte offset of the reader in the file."""
+        return self._offset + self._pos
+
+    def seek(self, offset: int):
+        """
+        Moves the reader to an absolute byte offset previously returned by tell().
+
+        :param offset: The absolute byte offset to move to.
+        """
+        self.file.seek(offset)
+        self._buffer = b""
+        self._pos = 0
+        self._offset = offset
+        self._eof = False
+
+    def peek(self) -> Optional[str]:
+        """Returns the next non-whitespace character without consuming it, or None at the end of the stream."""
+        self._skip_whitespace()
+        if self._pos >= len(self._buffer):
+            return None
+        return chr(self._buffer[self._pos])
+
+    def iter_object(self) -> Iterator[str]:
+        """Enters a JSON object and yields its keys. The value of each key must be consumed before continuing."""
+        self._expect(b"{")
+        if self.peek() == "}":
+            self._pos += 1
+            return
+        while True:
+            if self.peek() != '"':
+                raise self._error("Expected an object key")
+            key: str = self.read_value()
+            self._expect(b":")
+            yield key
+            if self.peek() == ",":
+                self._pos += 1
+                continue
+            self._expect(b"}")
+            return
+
+    def iter_array(self) -> Iterator[int]:
+        """Enters a JSON array and yields the index of each item. Each item must be consumed before continuing."""
+        self._expect(b"[")
+        if self.peek() == "]":
+            self._pos += 1
+            return
+        index: int = 0
+        while True:
+            yield index
+            index += 1
+            if self.peek() == ",":
+                self._pos += 1
+                continue
+            self._expect(b"]")
+            return
+
+    def read_separator(self):
+        """Consumes the comma between two array items, for readers moved to an item inside an array with seek()."""
+        self._expect(b",")
+
+    def read_value(self) -> Any:
+        """Decodes and returns the next JSON value."""
+        self._skip_whitespace()
+        self._compact()
+        start: int = self._pos
+        end: int = self._scan_value(discard=False)
+        try:
+            value: Any = json.loads(self._buffer[start:end])
+        except json.JSONDecodeError as e:
+            raise self._error(f"Invalid JSON value: {e}")
+        self._pos = end
+        return value
+
+    def skip_value(self):
+        """Skips the next JSON value without decoding it, discarding consumed bytes as it goes."""
+        self._skip_whitespace()
+        self._pos = self._scan_value(discard=True)
+
+    def _scan_value(self, discard: bool) -> int:
+        """
+        Finds the end of the value starting at the current position, reading more of the stream as needed.
+
+        :param discard: Whether bytes already scanned may be dropped from the buffer. Only valid when skipping.
+        :return: The buffer index just past the end of the value.
+        """
+        self._require(1)
+        first: int = self._buffer[self._pos]
+        if first == ord('"'):
+            return self._scan_string(self._pos + 1, discard=discard)
+        if first in b"{[":
+            depth: int = 0
+            index: int = self._pos
+            while True:
+                match = _STRUCTURAL.search(self._buffer, index)
+                if match is None:
+                    if discard:
+                        self._pos = len(self._buffer)
+                        self._compact(force=True)
+                        index = 0
+                    if not self._fill():
+                        raise self._error("Unexpected end of stream inside a JSON value")
+                    continue
+                char: bytes = match.group()
+                if char == b'"':
+                    if discard:
+                        self._pos = match.start()
+                        self._compact(force=True)
+                        index = self._scan_string(self._pos + 1, discard=True)
+                    else:
+                        index = self._scan_string(match.end(), discard=False)
+                    continue
+                index = match.end()
+                depth += 1 if char in b"{[" else -1
+                if depth == 0:
+                    return index
+        while True:
+            match = _SCALAR.match(self._buffer, self._pos)
+            if match.end() < len(self._buffer) or self._eof:
+                if match.end() == self._pos:
+                    raise self._error("Expected a JSON value")
+                return match.end()
+            self._fill()
+
+    def _scan_string(self, index: int, discard: bool) -> int:
+        """Returns the buffer index just past the closing quote of a string whose body starts at index."""
+        while True:
+            match = _STRING_BODY.match(self._buffer, index)
+            if match is not None:
+                return match.end()
+            if discard:
+                # Keep the partial string so the match can be retried once more data is available
+                consumed: int = index - self._pos
+                self._compact(force=True)
+                index = self._pos + consumed
+            if not self._fill():
+                raise self._error("Unterminated string")
+
+    def _expect(self, char: bytes):
+        """Consumes the expected structural character."""
+        self._skip_whitespace()
+        if self._buffer[self._pos:self._pos + 1] != char:
+            raise self._error(f"Expected '{char.decode()}'")
+        self._pos += 1
+
+    def _skip_whitespace(self):
+        """Advances past any whitespace, reading more of the stream as needed."""
+        while True:
+            self._pos = _WHITESPACE.match(self._buffer, self._pos).end()
+            if self._pos < len(self._buffer) or not self._fill():
+                return
+
+    def _require(self, count: int):
+        """Ensures at least count unread bytes are buffered."""
+        while len(self._buffer) - self._pos < count:
+            if not self._fill():
+                raise self._error("Unexpected end of stream")
+
+    def _fill(self) -> bool:
+        """
+        Reads more of the stream into the buffer.
+
+        Reads grow with the amount already buffered so that large values are decoded in amortized linear time.
+        :return: True if any bytes were read, False at the end of the stream.
+        """
+        if self._eof:
+            return False
+        chunk: bytes = self.file.read(max(self.chunk_size, len(self._buffer) - self._pos))
+        if not chunk:
+            self._eof = True
+            return False
+        self._buffer += chunk
+        return True
+
+    def _compact(self, force: bool = False):
+        """
+        Drops consumed bytes from the front of the buffer.
+
+        :param force: Whether to compact regardless of how much has been consumed. By default the buffer is only
+            compacted once a full chunk has been consumed, so small values do not each copy the buffer.
+        """
+        if self._pos > 0 and (force or self._pos >= self.chunk_size):
+            self._offset += self._pos
+            self._buffer = self._buffer[self._pos:]
+            self._pos = 0
+
+    def _error(self, message: str) -> ProtocolFileError:
+        """Creates a parse error annotated with the current file offset."""
+        return ProtocolFileError(f"{message} at byte offset {self.tell()}.")
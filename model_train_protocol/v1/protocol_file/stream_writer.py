@@ -0,0 +1,96 @@
+import json
+from typing import Any, Iterable, Optional, TextIO, Tuple
+
+from model_train_protocol.v1.protocol_file.json_encoder import JSONEncoder
+
+
+class StreamedArray:
+    """A JSON array whose items are produced lazily while the file is being written."""
+
+    def __init__(self, items: Iterable[Any]):
+        self.items: Iterable[Any] = items
+
+
+class StreamedObject:
+    """A JSON object whose (key, value) members are produced lazily while the file is being written."""
+
+    def __init__(self, members: Iterable[Tuple[str, Any]]):
+        self.members: Iterable[Tuple[str, Any]] = members
+
+
+class RawJSON:
+    """A JSON value that is already encoded at its indentation level, written to the file as is."""
+
+    def __init__(self, text: str):
+        self.text: str = text
+
+
+class ProtocolStreamWriter:
+    """
+    Writes a JSON document to a file handle incrementally.
+
+    The document may contain StreamedArray and StreamedObject nodes, which are consumed one item at a time
+    and written directly to the file, and RawJSON nodes, which are written as is. All other values are encoded with
+    the JSONEncoder.
+
+    The output is byte-for-byte identical to encoder.dump(document, file) for the equivalent fully materialized
+    document, which by default is json.dump(document, file, indent=4, ensure_ascii=False).
+    """
+
+    def __init__(self, file: TextIO, encoder: Optional[JSONEncoder] = None):
+        """
+        Initializes the ProtocolStreamWriter.
+
+        :param file: The text file handle to write to.
+        :param encoder: The encoder of the output layout and of materialized values. Defaults to JSONEncoder().
+        """
+        self.file: TextIO = file
+        self.encoder: JSONEncoder = encoder if encoder is not None else JSONEncoder()
+
+    def write(self, document: Any):
+        """
+        Writes the document to the file handle.
+
+        :param document: The JSON document, optionally containing StreamedArray, StreamedObject and RawJSON nodes.
+        """
+        self._write_value(document, level=0)
+
+    def _write(self, text: str):
+        """Writes raw text to the file handle."""
+        self.file.write(text)
+
+    def _write_value(self, value: Any, level: int):
+        """Writes a single JSON value at the given indentation level."""
+        if isinstance(value, StreamedObject):
+            self._write_object(value.members, level)
+        elif isinstance(value, StreamedArray):
+            self._write_array(value.items, level)
+        elif isinstance(value, RawJSON):
+            self._write(value.text)
+        elif isinstance(value, dict) and any(isinstance(v, (StreamedObject, StreamedArray)) for v in value.values()):
+            self._write_object(value.items(), level)
+        else:
+            self._write(self.encoder.dumps(value, level=level))
+
+    def _write_object(self, members: Iterable[Tuple[str, Any]], level: int):
+        """Writes a JSON object member by member."""
+        separator: str = self.encoder.newline(level + 1)
+        key_separator: str = self.encoder.key_separator
+        empty: bool = True
+        self._write("{")
+        for key, value in members:
+            self._write(("" if empty else ",") + separator + json.dumps(key, ensure_ascii=False) + key_separator)
+            self._write_value(value, level + 1)
+            empty = False
+        self._write("}" if empty else self.encoder.newline(level) + "}")
+
+    def _write_array(self, items: Iterable[Any], level: int):
+        """Writes a JSON array item by item."""
+        separator: str = self.encoder.newline(level + 1)
+        empty: bool = True
+        self._write("[")
+        for item in items:
+            self._write(("" if empty else ",") + separator)
+            self._write_value(item, level + 1)
+            empty = False
+        self._write("]" if empty else self.encoder.newline(level) + "]")
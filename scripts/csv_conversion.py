@@ -1,7 +1,7 @@
 import pandas as pd
 
 from model_train_protocol import ProtocolV1
-from model_train_protocol.csv import CSVConversion
+from model_train_protocol.csv import CSVConversion, CSVStreamConversion
 
 
 def main():
@@ -11,12 +11,12 @@ def main():
 
     if local_path.endswith('.xlsx'):
         csv_data: pd.DataFrame = pd.read_excel(local_path)
+        protocol: ProtocolV1 = CSVConversion(csv_data=csv_data, protocol_name=file_name).to_mtp()
     elif local_path.endswith('.csv'):
-        csv_data: pd.DataFrame = pd.read_csv(local_path)
+        # CSV files are streamed in chunks instead of being loaded into memory
+        protocol: ProtocolV1 = CSVStreamConversion(path=local_path, protocol_name=file_name).to_mtp()
     else:
         raise ValueError("Unsupported file format. Please provide a .csv or .xlsx file.")
-    csv_conversion: CSVConversion = CSVConversion(csv_data=csv_data, protocol_name=file_name)
-    protocol: ProtocolV1 = csv_conversion.to_mtp()
     protocol.save()
     protocol.template()
 
@@ -19,6 +19,7 @@ from tests.fixtures.protocol_fixtures import *
 from tests.fixtures.guardrails import *
 from tests.fixtures.state_machine_protocols import *
 from tests.fixtures.csv_fixtures import *
+from tests.fixtures.round_trip_protocols import *
 
 
 @pytest.fixture
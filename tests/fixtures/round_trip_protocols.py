@@ -0,0 +1,36 @@
+"""
+Protocol fixtures and helpers for tests that save, copy or reload whole protocols and compare the saved files.
+"""
+import pickle
+from pathlib import Path
+
+import pytest
+from model_train_protocol.v1 import ProtocolV1
+
+# Protocols covering each kind of token and instruction, guardrails, encryption and state machines
+ROUND_TRIP_PROTOCOL_FIXTURES = [
+    "basic_simple_protocol",
+    "basic_simple_protocol_with_guardrail",
+    "numtoken_protocol",
+    "numlisttoken_protocol",
+    "numtoken_workflow_5context_protocol",
+    "multi_instruction_protocol",
+    "encrypted_protocol",
+    "state_machine_protocol",
+]
+
+
+@pytest.fixture(params=ROUND_TRIP_PROTOCOL_FIXTURES)
+def round_trip_protocol(request) -> ProtocolV1:
+    """Each protocol of ROUND_TRIP_PROTOCOL_FIXTURES in turn."""
+    return request.getfixturevalue(request.param)
+
+
+def copy_protocol(protocol: ProtocolV1) -> ProtocolV1:
+    """Returns a copy of a protocol that shares no instructions or samples with it."""
+    return pickle.loads(pickle.dumps(protocol))
+
+
+def read_saved_protocol(directory: Path, name: str) -> bytes:
+    """Returns the bytes of the protocol file saved with save(name=name, path=directory)."""
+    return (directory / f"{name}_model.json").read_bytes()
@@ -0,0 +1,147 @@
+"""
+Integration tests for appending samples to saved protocol files.
+"""
+import json
+import shutil
+
+import pytest
+
+from model_train_protocol import FinalToken
+from model_train_protocol.errors import ProtocolError, ProtocolFileError
+from model_train_protocol.v1 import ProtocolV1
+from model_train_protocol.v1.protocol_file.segments import get_segment_filename
+from tests.fixtures.round_trip_protocols import copy_protocol, read_saved_protocol
+
+
+def _first_instruction(protocol: ProtocolV1):
+    """Returns the instruction of a protocol that sorts first by name."""
+    return sorted(protocol.instructions, key=lambda instruction: instruction.name)[0]
+
+
+class TestAppendSamples:
+    """Integration tests for ProtocolV1.append_samples and loading appended segments."""
+
+    def test_appended_samples_load_in_canonical_order(self, temp_directory, round_trip_protocol):
+        """Test that a file with appended samples loads as the protocol with every sample added in order."""
+        protocol: ProtocolV1 = round_trip_protocol
+        protocol.save(name="base", path=str(temp_directory))
+        appended: ProtocolV1 = copy_protocol(protocol)
+        expected: ProtocolV1 = copy_protocol(protocol)
+        for instruction in expected.instructions:
+            instruction.samples = list(instruction.samples) * 3
+        expected.save(name="expected", path=str(temp_directory))
+
+        base_path: str = str(temp_directory / "base_model.json")
+        for _ in range(2):
+            for instruction in appended.instructions:
+                ProtocolV1.append_samples(base_path, instruction=instruction)
+
+        for trusted in (False, True):
+            ProtocolV1.load(base_path, trusted=trusted).save(name="appended", path=str(temp_directory))
+            ProtocolV1.load(str(temp_directory / "expected_model.json"), trusted=trusted).save(
+                name="reloaded", path=str(temp_directory))
+            assert read_saved_protocol(temp_directory, "appended") == read_saved_protocol(temp_directory, "reloaded")
+
+    def test_appended_samples_add_new_final_tokens(self, temp_directory, basic_simple_protocol):
+        """Test that result tokens the file does not have are written to the segment and loaded."""
+        basic_simple_protocol.save(name="base", path=str(temp_directory))
+        instruction = list(copy_protocol(basic_simple_protocol).instructions)[0]
+        sample = instruction.samples[0]
+        instruction.samples = []
+        final: FinalToken = FinalToken("Appended")
+        instruction.output.final.append(final)
+        for _ in range(3):
+            instruction.add_sample(input_snippets=list(sample.input), output_snippet=sample.output, final=final)
+
+        segment_path: str = ProtocolV1.append_samples(str(temp_directory / "base_model.json"), instruction=instruction)
+        with open(segment_path, 'r', encoding='utf-8') as f:
+            segment: dict = json.load(f)
+        assert list(segment["tokens"].keys()) == ["Appended_"]
+        assert segment["results"]["Appended_"] == 3
+        assert segment["valid"]
+        loaded: ProtocolV1 = ProtocolV1.load(str(temp_directory / "base_model.json"), trusted=True)
+        loaded_instruction = list(loaded.instructions)[0]
+        assert loaded_instruction.samples[-1].result.value == "Appended_"
+        assert loaded.validate_protocol() == (True, None)
+
+    def test_too_few_samples_for_final_token_are_not_trusted(self, temp_directory, basic_simple_protocol):
+        """Test that a file is not valid while a new result token has too few samples, until more are appended."""
+        basic_simple_protocol.save(name="base", path=str(temp_directory))
+        base_path: str = str(temp_directory / "base_model.json")
+        instruction = list(copy_protocol(basic_simple_protocol).instructions)[0]
+        sample = instruction.samples[0]
+        instruction.samples = []
+        final: FinalToken = FinalToken("Appended")
+        instruction.output.final.append(final)
+        instruction.add_sample(input_snippets=list(sample.input), output_snippet=sample.output, final=final)
+
+        ProtocolV1.append_samples(base_path, instruction=instruction)
+        with pytest.raises(ProtocolError, match="is not valid with the samples appended"):
+            ProtocolV1.load(base_path, trusted=True)
+        with pytest.raises(ProtocolError, match="must have at least"):
+            ProtocolV1.load(base_path).validate_protocol()
+
+        instruction.samples = instruction.samples * 2
+        segment_path: str = ProtocolV1.append_samples(base_path, instruction=instruction)
+        with open(segment_path, 'r', encoding='utf-8') as f:
+            assert json.load(f)["results"]["Appended_"] == 3
+        assert ProtocolV1.load(base_path, trusted=True).validate_protocol() == (True, None)
+
+    def test_save_removes_segments(self, temp_directory, basic_simple_protocol):
+        """Test that saving over a file removes the samples appended to it."""
+        basic_simple_protocol.save(name="base", path=str(temp_directory))
+        base_path: str = str(temp_directory / "base_model.json")
+        ProtocolV1.append_samples(base_path, instruction=list(copy_protocol(basic_simple_protocol).instructions)[0])
+
+        ProtocolV1.load(base_path).save(name="base", path=str(temp_directory))
+        assert not (temp_directory / "base_model_segment_00001.json").exists()
+
+    def test_modified_segment_is_not_trusted(self, temp_directory, basic_simple_protocol):
+        """Test that a modified segment file is rejected in trusted mode."""
+        basic_simple_protocol.save(name="base", path=str(temp_directory))
+        base_path: str = str(temp_directory / "base_model.json")
+        instruction = list(copy_protocol(basic_simple_protocol).instructions)[0]
+        segment_path: str = ProtocolV1.append_samples(base_path, instruction=instruction)
+        with open(segment_path, 'r', encoding='utf-8') as f:
+            segment_text: str = f.read()
+        with open(segment_path, 'w', encoding='utf-8') as f:
+            f.write(segment_text.replace('"prompt": null', '"prompt": "changed"', 1))
+
+        with pytest.raises(ProtocolError, match="does not match its contents"):
+            ProtocolV1.load(base_path, trusted=True)
+
+    def test_segment_of_replaced_file_raises_error(self, temp_directory, basic_simple_protocol, numtoken_protocol):
+        """Test that segments appended to an earlier version of a file are not loaded with the new version."""
+        basic_simple_protocol.save(name="base", path=str(temp_directory))
+        base_path: str = str(temp_directory / "base_model.json")
+        ProtocolV1.append_samples(base_path, instruction=list(copy_protocol(basic_simple_protocol).instructions)[0])
+        basic_simple_protocol.add_context("Added after the samples were appended.")
+        basic_simple_protocol.save(name="replacement", path=str(temp_directory))
+        shutil.copyfile(temp_directory / "replacement_model.json", base_path)
+
+        assert get_segment_filename(base_path, 1) == str(temp_directory / "base_model_segment_00001.json")
+        with pytest.raises(ProtocolFileError, match="was not appended"):
+            ProtocolV1.load(base_path)
+
+    def test_unknown_instruction_raises_error(self, temp_directory, basic_simple_protocol, multi_instruction_protocol):
+        """Test that samples can only be appended to an instruction set of the file."""
+        basic_simple_protocol.save(name="base", path=str(temp_directory))
+        with pytest.raises(ProtocolError, match="no instruction set named"):
+            ProtocolV1.append_samples(str(temp_directory / "base_model.json"),
+                                      instruction=_first_instruction(multi_instruction_protocol))
+
+    def test_different_tokensets_raise_error(self, temp_directory, basic_simple_protocol, multi_instruction_protocol):
+        """Test that the Instruction must have the TokenSets of the instruction set."""
+        basic_simple_protocol.save(name="base", path=str(temp_directory))
+        instruction = _first_instruction(multi_instruction_protocol)
+        instruction.name = list(basic_simple_protocol.instructions)[0].name
+        with pytest.raises(ProtocolError, match="different TokenSets"):
+            ProtocolV1.append_samples(str(temp_directory / "base_model.json"), instruction=instruction)
+
+    def test_instruction_without_samples_raises_error(self, temp_directory, basic_simple_protocol):
+        """Test that an Instruction without samples cannot be appended."""
+        basic_simple_protocol.save(name="base", path=str(temp_directory))
+        instruction = list(copy_protocol(basic_simple_protocol).instructions)[0]
+        instruction.samples = []
+        with pytest.raises(ProtocolError, match="no samples to append"):
+            ProtocolV1.append_samples(str(temp_directory / "base_model.json"), instruction=instruction)
@@ -0,0 +1,119 @@
+"""
+Integration tests for saving protocols with a cache of encoded instruction sets.
+"""
+import sys
+
+import pytest
+
+from model_train_protocol.common.instructions import BaseInstruction
+from model_train_protocol.v1 import ProtocolV1
+from model_train_protocol.v1.protocol_file.fragment_cache import FRAGMENT_SUFFIX
+from tests.fixtures.round_trip_protocols import copy_protocol, read_saved_protocol
+
+
+class TestFragmentCache:
+    """Integration tests for ProtocolV1.use_fragment_cache and BaseInstruction.get_content_fingerprint."""
+
+    @pytest.mark.parametrize("compact", [False, True])
+    def test_cached_save_matches_save(self, temp_directory, round_trip_protocol, compact):
+        """Test that saves with a fragment cache write the same file as saves without one."""
+        protocol: ProtocolV1 = round_trip_protocol
+        protocol.save(name="original", path=str(temp_directory), compact=compact)
+
+        protocol.use_fragment_cache()
+        for name in ("first", "second"):
+            protocol.save(name=name, path=str(temp_directory), compact=compact)
+            assert read_saved_protocol(temp_directory, name) == read_saved_protocol(temp_directory, "original")
+        assert protocol._fragment_cache.hits == len(protocol.instructions)
+
+    def test_only_changed_instruction_sets_are_encoded(self, temp_directory, multi_instruction_protocol):
+        """Test that after one instruction changes, only its instruction set is encoded again."""
+        protocol: ProtocolV1 = multi_instruction_protocol
+        protocol.use_fragment_cache()
+        protocol.save(name="first", path=str(temp_directory))
+        sorted(protocol.instructions, key=lambda i: i.name)[0].add_context("Added after the first save.")
+
+        misses: int = protocol._fragment_cache.misses
+        protocol.save(name="cached", path=str(temp_directory))
+        assert protocol._fragment_cache.misses == misses + 1
+        protocol._fragment_cache = None
+        protocol.save(name="uncached", path=str(temp_directory))
+        assert read_saved_protocol(temp_directory, "cached") == read_saved_protocol(temp_directory, "uncached")
+
+    def test_fragment_files_are_reused(self, temp_directory, multi_instruction_protocol):
+        """Test that fragment files written by one protocol are reused by a copy of it, and removed by clear()."""
+        cache_directory = temp_directory / "fragments"
+        multi_instruction_protocol.use_fragment_cache(path=str(cache_directory))
+        multi_instruction_protocol.save(name="original", path=str(temp_directory))
+
+        copied: ProtocolV1 = copy_protocol(multi_instruction_protocol)
+        copied.use_fragment_cache(path=str(cache_directory))
+        copied.save(name="copied", path=str(temp_directory))
+        assert copied._fragment_cache.hits == len(copied.instructions)
+        assert copied._fragment_cache.misses == 0
+        assert read_saved_protocol(temp_directory, "copied") == read_saved_protocol(temp_directory, "original")
+
+        copied._fragment_cache.clear()
+        assert not [path for path in cache_directory.iterdir() if path.name.endswith(FRAGMENT_SUFFIX)]
+
+    def test_content_fingerprint_changes_with_content(self, basic_simple_protocol_with_guardrail):
+        """Test that the content fingerprint changes when samples or context are added, and not otherwise."""
+        instruction = list(basic_simple_protocol_with_guardrail.instructions)[0]
+        fingerprint: str = instruction.get_content_fingerprint()
+        assert instruction.get_content_fingerprint() == fingerprint
+        assert list(copy_protocol(basic_simple_protocol_with_guardrail).instructions)[0].get_content_fingerprint() == \
+               fingerprint
+
+        sample = instruction.samples[0]
+        instruction.add_sample(input_snippets=list(sample.input), output_snippet=sample.output, final=sample.result)
+        sample_fingerprint: str = instruction.get_content_fingerprint()
+        assert sample_fingerprint != fingerprint
+        instruction.add_context("Added after the fingerprint.")
+        assert instruction.get_content_fingerprint() not in (fingerprint, sample_fingerprint)
+
+    def test_incremental_fingerprint_matches_full_fingerprint(self, basic_simple_protocol):
+        """Test that a fingerprint updated as samples are appended matches one computed over all samples at once."""
+        instruction = list(basic_simple_protocol.instructions)[0]
+        samples: list = list(instruction.samples) * 1000
+        instruction.samples = samples[:2500]
+        instruction.get_content_fingerprint()
+        instruction.samples.extend(samples[2500:])
+
+        copied = list(copy_protocol(basic_simple_protocol).instructions)[0]
+        copied.samples = list(samples)
+        assert instruction.get_content_fingerprint() == copied.get_content_fingerprint()
+        copied.samples = samples[:2500]
+        assert instruction.get_content_fingerprint() != copied.get_content_fingerprint()
+
+    @pytest.mark.parametrize("change, sample_store", [("pop", False), ("replace", False), ("clear", False),
+                                                      ("clear", True)])
+    def test_changed_samples_are_rehashed(self, temp_directory, basic_simple_protocol, monkeypatch, change,
+                                          sample_store):
+        """Test that digests of samples removed or replaced before more samples are added are not reused."""
+        monkeypatch.setattr(sys.modules[BaseInstruction.__module__], "_FINGERPRINT_CHUNK_SIZE", 2)
+        protocol: ProtocolV1 = basic_simple_protocol
+        instruction = list(protocol.instructions)[0]
+        sample = instruction.samples[0]
+        if sample_store:
+            instruction.use_sample_store()
+        instruction.add_sample(input_snippets=list(sample.input), output_snippet="The fourth response",
+                               final=sample.result)
+        protocol.use_fragment_cache()
+        protocol.save(name="first", path=str(temp_directory))
+
+        if change == "pop":
+            instruction.samples.pop()
+        elif change == "replace":
+            instruction.samples[3] = sample
+        else:
+            instruction.samples.clear()
+        while len(instruction.samples) < 5:
+            instruction.add_sample(input_snippets=list(sample.input), output_snippet="The added response",
+                                   final=sample.result)
+        assert instruction.get_content_fingerprint() == \
+               list(copy_protocol(protocol).instructions)[0].get_content_fingerprint()
+
+        protocol.save(name="cached", path=str(temp_directory))
+        protocol._fragment_cache = None
+        protocol.save(name="uncached", path=str(temp_directory))
+        assert read_saved_protocol(temp_directory, "cached") == read_saved_protocol(temp_directory, "uncached")
@@ -0,0 +1,74 @@
+"""
+Test that importing the package stays cheap, and that slow dependencies load only when they are needed.
+"""
+import subprocess
+import sys
+
+import pytest
+
+import model_train_protocol
+
+# Modules that are slow to import and are only needed for serialization, validation or batched numeric checks
+HEAVY_MODULES = ["emoji", "numpy", "pydantic", "model_train_protocol_schemas", "importlib.metadata"]
+
+# Budget for a bare "import model_train_protocol", in milliseconds. Importing everything eagerly takes over 250ms.
+IMPORT_TIME_BUDGET_MS = 100
+IMPORT_TIME_RUNS = 5
+
+
+def _run_python(code: str) -> str:
+    """Runs code in a fresh interpreter, so modules imported by the test session do not count."""
+    return subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True).stdout.strip()
+
+
+def _loaded_heavy_modules(code: str) -> list[str]:
+    """Runs code in a fresh interpreter and returns the heavy modules it loaded."""
+    output: str = _run_python(
+        f"import sys\n{code}\nprint(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))")
+    return output.split(",") if output else []
+
+
+class TestImportTime:
+    """Test cases for lazy imports."""
+
+    def test_import_loads_no_heavy_modules(self):
+        """Test that importing the package does not import its slow dependencies."""
+        assert _loaded_heavy_modules("import model_train_protocol") == []
+
+    def test_building_instructions_loads_no_heavy_modules(self):
+        """Test that tokens, instructions and protocols can be built without the schemas or NumPy."""
+        code = (
+            "import model_train_protocol as mtp\n"
+            "token_set = mtp.TokenSet(tokens=[mtp.Token('Hello'), mtp.NumToken('Count', min_value=0, max_value=9)])\n"
+            "instruction = mtp.Instruction(name='greet', input=mtp.InstructionInput(tokensets=[token_set]),\n"
+            "    output=mtp.InstructionOutput(tokenset=mtp.TokenSet(tokens=[mtp.Token('Reply')]),\n"
+            "                                 final=mtp.FinalToken('End')))\n"
+            "protocol = mtp.Protocol('lazy', inputs=1)\n"
+        )
+        assert _loaded_heavy_modules(code) == []
+
+    def test_saving_loads_schemas(self, temp_directory, basic_simple_protocol):
+        """Test that the schemas are still imported when a protocol is serialized."""
+        basic_simple_protocol.save(name="lazy", path=str(temp_directory))
+        assert "model_train_protocol_schemas" in sys.modules
+
+    def test_public_names_resolve(self):
+        """Test that every public name can be imported and is listed by dir()."""
+        for name in model_train_protocol.__all__:
+            assert getattr(model_train_protocol, name) is not None
+            assert name in dir(model_train_protocol)
+        with pytest.raises(AttributeError):
+            _ = model_train_protocol.NotAName
+
+    @pytest.mark.slow
+    def test_import_time_budget(self):
+        """Test that a bare import of the package stays within its time budget."""
+        code = (
+            "import time\n"
+            "start = time.perf_counter()\n"
+            "import model_train_protocol\n"
+            "print((time.perf_counter() - start) * 1000)"
+        )
+        fastest_ms: float = min(float(_run_python(code)) for _ in range(IMPORT_TIME_RUNS))
+        assert fastest_ms < IMPORT_TIME_BUDGET_MS, \
+            f"Importing model_train_protocol took {fastest_ms:.1f}ms, over the {IMPORT_TIME_BUDGET_MS}ms budget."
@@ -0,0 +1,102 @@
+"""
+Integration tests for journaling protocol builds and replaying them.
+"""
+import pytest
+
+from model_train_protocol.errors import ProtocolError
+from model_train_protocol.v1 import ProtocolV1
+from tests.fixtures.round_trip_protocols import read_saved_protocol
+
+
+def _build_journaled(protocol: ProtocolV1, journal) -> ProtocolV1:
+    """Rebuilds a protocol with the same context and instructions, journaling it."""
+    journaled: ProtocolV1 = ProtocolV1(protocol.name, inputs=protocol.input_count, encrypt=protocol.encrypt,
+                                       state_machine=protocol.state_machine, journal=str(journal))
+    for line in protocol.context:
+        journaled.add_context(line)
+    for instruction in protocol.instructions:
+        journaled.add_instruction(instruction)
+    return journaled
+
+
+class TestProtocolJournal:
+    """Integration tests for ProtocolV1 journals and ProtocolV1.replay."""
+
+    def test_replay_round_trip(self, temp_directory, round_trip_protocol):
+        """Test that a replayed protocol saves to the same file as the protocol that was journaled."""
+        journal = temp_directory / "build.journal"
+        journaled: ProtocolV1 = _build_journaled(round_trip_protocol, journal)
+        journaled.save(name="original", path=str(temp_directory))
+        journaled.close_journal()
+
+        ProtocolV1.replay(str(journal)).save(name="replayed", path=str(temp_directory))
+        assert read_saved_protocol(temp_directory, "replayed") == read_saved_protocol(temp_directory, "original")
+
+    def test_changes_to_added_instructions_are_journaled(self, temp_directory, basic_simple_protocol,
+                                                         content_guardrail):
+        """Test that samples, guardrails and context added to an instruction after it was added are replayed."""
+        journal = temp_directory / "build.journal"
+        journaled: ProtocolV1 = _build_journaled(basic_simple_protocol, journal)
+        instruction = list(journaled.instructions)[0]
+        sample = instruction.samples[0]
+        instruction.add_sample(input_snippets=list(sample.input), output_snippet=sample.output, final=sample.result)
+        instruction.add_samples(inputs_columns=[[string] * 2 for string in sample.input], outputs=[sample.output] * 2)
+        instruction.add_guardrail(content_guardrail, tokenset_index=0)
+        instruction.add_contexts(["Added after the instruction.", "Added after the instruction."])
+        journaled.save(name="original", path=str(temp_directory))
+        journaled.close_journal()
+
+        replayed: ProtocolV1 = ProtocolV1.replay(str(journal))
+        replayed_instruction = replayed.get_instruction(instruction.name)
+        assert len(replayed_instruction.samples) == 6
+        assert replayed_instruction.context == ["Added after the instruction."]
+        replayed.save(name="replayed", path=str(temp_directory))
+        assert read_saved_protocol(temp_directory, "replayed") == read_saved_protocol(temp_directory, "original")
+
+    def test_resumed_build_discards_incomplete_record(self, temp_directory, basic_simple_protocol):
+        """Test that a record cut short by a crash is discarded, and the resumed build keeps journaling."""
+        journal = temp_directory / "build.journal"
+        _build_journaled(basic_simple_protocol, journal).close_journal()
+        complete_bytes: bytes = journal.read_bytes()
+        with open(journal, 'ab') as f:
+            f.write(b'["context","Cut sh')
+
+        resumed: ProtocolV1 = ProtocolV1.replay(str(journal))
+        assert journal.read_bytes() == complete_bytes
+        assert resumed.context == basic_simple_protocol.context
+        resumed.add_context("Added after resuming.")
+        resumed.close_journal()
+
+        assert ProtocolV1.replay(str(journal)).context == basic_simple_protocol.context + ["Added after resuming."]
+
+    def test_resumed_build_skips_added_instructions(self, temp_directory, basic_simple_protocol):
+        """Test that instructions added before resuming can be found, and are not added twice."""
+        journal = temp_directory / "build.journal"
+        _build_journaled(basic_simple_protocol, journal).close_journal()
+        instruction = list(basic_simple_protocol.instructions)[0]
+
+        resumed: ProtocolV1 = ProtocolV1.replay(str(journal))
+        assert resumed.get_instruction(instruction.name) is not None
+        assert resumed.get_instruction("not_added") is None
+        with pytest.raises(ProtocolError):
+            resumed.add_instruction(instruction)
+        assert resumed.validate_protocol() == (True, None)
+
+    def test_existing_journal_raises_error(self, temp_directory, basic_simple_protocol):
+        """Test that a new protocol cannot overwrite the records of an existing journal."""
+        journal = temp_directory / "build.journal"
+        _build_journaled(basic_simple_protocol, journal).close_journal()
+
+        with pytest.raises(ProtocolError, match="Use ProtocolV1.replay"):
+            ProtocolV1("other", inputs=2, journal=str(journal))
+
+    def test_closed_journal_records_nothing(self, temp_directory, basic_simple_protocol):
+        """Test that changes made after the journal is closed are not journaled."""
+        journal = temp_directory / "build.journal"
+        journaled: ProtocolV1 = _build_journaled(basic_simple_protocol, journal)
+        journaled.close_journal()
+        journal_bytes: bytes = journal.read_bytes()
+
+        journaled.add_context("Not journaled.")
+        list(journaled.instructions)[0].add_context("Not journaled.")
+        assert journal.read_bytes() == journal_bytes
@@ -0,0 +1,294 @@
+"""
+Integration tests for loading saved protocol files.
+"""
+import bz2
+import gzip
+import io
+import json
+import lzma
+
+import pytest
+
+from model_train_protocol import FinalToken, Instruction, InstructionInput, InstructionOutput, Token, TokenSet
+from model_train_protocol.errors import ProtocolError, ProtocolFileError
+from model_train_protocol.v1 import ProtocolV1
+from model_train_protocol.v1.protocol_file.checksum import CHECKSUM_FIELD, verify_document_checksum, verify_file_checksum
+from model_train_protocol.v1.protocol_file.compression import COMPRESSION_SUFFIXES, detect_compression
+from tests.fixtures.round_trip_protocols import copy_protocol, read_saved_protocol
+
+PROTOCOL_FIXTURES = [
+    "basic_simple_protocol",
+    "basic_simple_protocol_with_guardrail",
+    "numtoken_protocol",
+    "numlisttoken_protocol",
+    "numtoken_workflow_5context_protocol",
+    "encrypted_protocol",
+    "state_machine_protocol",
+]
+
+# The class each compression is read with, by compression
+_DECOMPRESSORS: dict = {"gzip": (gzip, "GzipFile"), "xz": (lzma, "LZMAFile"), "bz2": (bz2, "BZ2File")}
+
+
+def _count_decompression_passes(monkeypatch, compression: str) -> list:
+    """
+    Counts the passes over the decompressed content of files of a compression: one each time a file is opened, and
+    one for every backward seek, which decompresses the file again from the start.
+
+    :return: A list holding the number of passes, updated as files are read.
+    """
+    module, class_name = _DECOMPRESSORS[compression]
+    passes: list = [0]
+
+    class CountingDecompressor(getattr(module, class_name)):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            passes[0] += 1
+
+        def seek(self, offset, whence=io.SEEK_SET):
+            if whence == io.SEEK_SET and offset < self.tell():
+                passes[0] += 1
+            return super().seek(offset, whence)
+
+    monkeypatch.setattr(module, class_name, CountingDecompressor)
+    return passes
+
+
+class TestProtocolLoading:
+    """Integration tests for ProtocolV1.load."""
+
+    @pytest.mark.parametrize("protocol_fixture", PROTOCOL_FIXTURES)
+    def test_load_round_trip(self, temp_directory, protocol_fixture, request):
+        """Test that a loaded protocol saves back to an identical file."""
+        protocol: ProtocolV1 = request.getfixturevalue(protocol_fixture)
+        protocol.save(name="original", path=str(temp_directory))
+
+        loaded_protocol: ProtocolV1 = ProtocolV1.load(str(temp_directory / "original_model.json"))
+        loaded_protocol.save(name="reloaded", path=str(temp_directory))
+
+        original_bytes: bytes = (temp_directory / "original_model.json").read_bytes()
+        reloaded_bytes: bytes = (temp_directory / "reloaded_model.json").read_bytes()
+        assert reloaded_bytes == original_bytes
+
+    def test_loaded_protocols_share_tokens(self, temp_directory, numtoken_protocol):
+        """Test that protocols loaded from the same file share interned tokens."""
+        numtoken_protocol.save(name="original", path=str(temp_directory))
+        path = str(temp_directory / "original_model.json")
+
+        first = {token.value: token for token in ProtocolV1.load(path).tokens}
+        second = {token.value: token for token in ProtocolV1.load(path).tokens}
+
+        assert first.keys() == second.keys()
+        assert all(first[value] is second[value] for value in first)
+
+    def test_load_matches_from_json(self, temp_directory, multi_instruction_protocol):
+        """Test that load() builds the same protocol as from_json() on the parsed file."""
+        multi_instruction_protocol.save(name="original", path=str(temp_directory))
+        model_file = temp_directory / "original_model.json"
+
+        with open(model_file, 'r', encoding='utf-8') as f:
+            from_json_protocol: ProtocolV1 = ProtocolV1.from_json(json.load(f))
+        loaded_protocol: ProtocolV1 = ProtocolV1.load(str(model_file))
+
+        assert loaded_protocol.name == from_json_protocol.name
+        assert loaded_protocol.context == from_json_protocol.context
+        assert {token.value for token in loaded_protocol.tokens} == {token.value for token in from_json_protocol.tokens}
+        assert sorted(len(instruction.samples) for instruction in loaded_protocol.instructions) == \
+               sorted(len(instruction.samples) for instruction in from_json_protocol.instructions)
+
+    def test_load_tokens_containing_special_token_names(self, temp_directory, content_guardrail):
+        """Test that tokens containing the names of the special tokens saved with them reload, and stay valid."""
+        protocol: ProtocolV1 = ProtocolV1("special_names", inputs=1, encrypt=False)
+        for i in range(10):
+            protocol.add_context(f"Context line {i} of the special names protocol.")
+        end: FinalToken = FinalToken("End")
+        instruction: Instruction = Instruction(
+            name="special_names",
+            input=InstructionInput(tokensets=[TokenSet([Token("Running"), Token("Padding"), Token("Bosun")])]),
+            output=InstructionOutput(tokenset=TokenSet([Token("Eosin"), Token("Nonsense"), Token("Unknown")]),
+                                     final=[end]))
+        for _ in range(3):
+            instruction.add_sample(input_snippets=["The input"], output_snippet="The output", final=end)
+        instruction.add_guardrail(content_guardrail, tokenset_index=0)
+        protocol.add_instruction(instruction)
+        protocol.save(name="original", path=str(temp_directory))
+        path: str = str(temp_directory / "original_model.json")
+        with open(path, 'r', encoding='utf-8') as f:
+            assert {"<RUN>", "<PAD>", "<BOS>", "<EOS>", "<NON>", "<UNK>"} <= set(json.load(f)["tokens"])
+
+        for trusted in (False, True):
+            loaded: ProtocolV1 = ProtocolV1.load(path, trusted=trusted)
+            assert loaded.validate_protocol() == (True, None)
+            loaded.save(name="loaded", path=str(temp_directory))
+            assert read_saved_protocol(temp_directory, "loaded") == read_saved_protocol(temp_directory, "original")
+            copy_protocol(loaded).save(name="copied", path=str(temp_directory))
+            assert read_saved_protocol(temp_directory, "copied") == read_saved_protocol(temp_directory, "original")
+        manifest_path: str = loaded.save_sharded(name="sharded", path=str(temp_directory), workers=1)
+        assert ProtocolV1.load_sharded(manifest_path, trusted=True, workers=1).validate_protocol() == (True, None)
+
+        ProtocolV1.append_samples(path, instruction=instruction)
+        assert sum(len(i.samples) for i in ProtocolV1.load(path, trusted=True).instructions) == 6
+
+    def test_load_with_instruction_before_header(self, temp_directory, basic_simple_protocol):
+        """Test that load() handles files whose instruction object precedes the other top-level fields."""
+        basic_simple_protocol.save(name="original", path=str(temp_directory))
+        with open(temp_directory / "original_model.json", 'r', encoding='utf-8') as f:
+            data: dict = json.load(f)
+        reordered: dict = {"instruction": data.pop("instruction"), **data}
+        with open(temp_directory / "reordered_model.json", 'w', encoding='utf-8') as f:
+            json.dump(reordered, f)
+
+        loaded_protocol: ProtocolV1 = ProtocolV1.load(str(temp_directory / "reordered_model.json"))
+
+        assert loaded_protocol.name == basic_simple_protocol.name
+        assert len(loaded_protocol.instructions) == len(basic_simple_protocol.instructions)
+
+    def test_load_missing_required_field(self, temp_directory, basic_simple_protocol):
+        """Test that load() raises when a required field is missing."""
+        basic_simple_protocol.save(name="original", path=str(temp_directory))
+        with open(temp_directory / "original_model.json", 'r', encoding='utf-8') as f:
+            data: dict = json.load(f)
+        data.pop("inputs")
+        with open(temp_directory / "missing_model.json", 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+
+        with pytest.raises(ProtocolError, match="Missing required field 'inputs'"):
+            ProtocolV1.load(str(temp_directory / "missing_model.json"))
+
+    @pytest.mark.parametrize("protocol_fixture", PROTOCOL_FIXTURES)
+    def test_trusted_load_round_trip(self, temp_directory, protocol_fixture, request):
+        """Test that a protocol loaded in trusted mode saves back to an identical file."""
+        protocol: ProtocolV1 = request.getfixturevalue(protocol_fixture)
+        protocol.save(name="original", path=str(temp_directory))
+        model_file = temp_directory / "original_model.json"
+
+        loaded_protocol: ProtocolV1 = ProtocolV1.load(str(model_file), trusted=True)
+        loaded_protocol.save(name="reloaded", path=str(temp_directory))
+        with open(model_file, 'r', encoding='utf-8') as f:
+            from_json_protocol: ProtocolV1 = ProtocolV1.from_json(json.load(f), trusted=True)
+        from_json_protocol.save(name="from_json", path=str(temp_directory))
+
+        original_bytes: bytes = model_file.read_bytes()
+        assert (temp_directory / "reloaded_model.json").read_bytes() == original_bytes
+        assert (temp_directory / "from_json_model.json").read_bytes() == original_bytes
+
+    @pytest.mark.parametrize("protocol_fixture", PROTOCOL_FIXTURES)
+    def test_compact_trusted_load_round_trip(self, temp_directory, protocol_fixture, request):
+        """Test that compact files hold the same document, and load in trusted mode like indented files."""
+        protocol: ProtocolV1 = request.getfixturevalue(protocol_fixture)
+        protocol.save(name="indented", path=str(temp_directory))
+        protocol.save(name="compact", path=str(temp_directory), compact=True)
+        protocol.save(name="streamed", path=str(temp_directory), compact=True, stream=True)
+        compact_file = temp_directory / "compact_model.json"
+
+        compact_bytes: bytes = compact_file.read_bytes()
+        assert b"\n" not in compact_bytes
+        assert (temp_directory / "streamed_model.json").read_bytes() == compact_bytes
+        with open(compact_file, 'r', encoding='utf-8') as f:
+            compact_data: dict = json.load(f)
+        with open(temp_directory / "indented_model.json", 'r', encoding='utf-8') as f:
+            indented_data: dict = json.load(f)
+        compact_data.pop(CHECKSUM_FIELD)
+        indented_data.pop(CHECKSUM_FIELD)
+        assert compact_data == indented_data
+
+        ProtocolV1.load(str(compact_file), trusted=True).save(name="reloaded", path=str(temp_directory))
+        with open(compact_file, 'r', encoding='utf-8') as f:
+            ProtocolV1.from_json(json.load(f), trusted=True).save(name="from_json", path=str(temp_directory))
+        indented_bytes: bytes = (temp_directory / "indented_model.json").read_bytes()
+        assert (temp_directory / "reloaded_model.json").read_bytes() == indented_bytes
+        assert (temp_directory / "from_json_model.json").read_bytes() == indented_bytes
+
+    @pytest.mark.parametrize("compression", list(COMPRESSION_SUFFIXES))
+    @pytest.mark.parametrize("protocol_fixture", PROTOCOL_FIXTURES)
+    def test_compressed_load_round_trip(self, temp_directory, protocol_fixture, compression, request):
+        """Test that compressed files are detected on load, and load in both modes like uncompressed files."""
+        protocol: ProtocolV1 = request.getfixturevalue(protocol_fixture)
+        protocol.save(name="original", path=str(temp_directory))
+        protocol.save(name="compressed", path=str(temp_directory), compression=compression)
+        compressed_file = temp_directory / f"compressed_model.json{COMPRESSION_SUFFIXES[compression]}"
+
+        with open(compressed_file, 'rb') as f:
+            assert detect_compression(f) == compression
+            assert f.tell() == 0
+        for trusted in (False, True):
+            ProtocolV1.load(str(compressed_file), trusted=trusted).save(name="reloaded", path=str(temp_directory))
+            assert (temp_directory / "reloaded_model.json").read_bytes() == \
+                   (temp_directory / "original_model.json").read_bytes()
+
+    @pytest.mark.parametrize("compression", list(COMPRESSION_SUFFIXES))
+    def test_compressed_file_is_decompressed_once(self, temp_directory, multi_instruction_protocol, compression,
+                                                  monkeypatch):
+        """Test that loading compressed files decompresses each file once, whatever the number of instruction sets."""
+        suffix: str = COMPRESSION_SUFFIXES[compression]
+        multi_instruction_protocol.save(name="compressed", path=str(temp_directory), compression=compression)
+        manifest_path: str = multi_instruction_protocol.save_sharded(
+            name="sharded", path=str(temp_directory), max_samples_per_shard=2, workers=1, compression=compression)
+        shard_count: int = len(list(temp_directory.glob(f"sharded_shard_*.json{suffix}")))
+        passes: list = _count_decompression_passes(monkeypatch, compression)
+
+        for trusted in (False, True):
+            passes[0] = 0
+            ProtocolV1.load(str(temp_directory / f"compressed_model.json{suffix}"), trusted=trusted)
+            assert passes[0] == 1
+            passes[0] = 0
+            ProtocolV1.load_sharded(manifest_path, trusted=trusted, workers=1)
+            assert passes[0] == shard_count
+
+    def test_gzip_file_is_reproducible(self, temp_directory, basic_simple_protocol):
+        """Test that gzip files decompress to the uncompressed file, and saving twice gives the same bytes."""
+        basic_simple_protocol.save(name="original", path=str(temp_directory))
+        basic_simple_protocol.save(name="original", path=str(temp_directory), compression="gzip")
+        gzip_file = temp_directory / "original_model.json.gz"
+        first_bytes: bytes = gzip_file.read_bytes()
+        basic_simple_protocol.save(name="original", path=str(temp_directory), compression="gzip")
+
+        assert gzip_file.read_bytes() == first_bytes
+        assert gzip.decompress(first_bytes) == (temp_directory / "original_model.json").read_bytes()
+
+    def test_unknown_compression_raises_error(self, temp_directory, basic_simple_protocol):
+        """Test that an unknown compression is rejected before any file is written."""
+        with pytest.raises(ProtocolFileError, match="Unknown compression 'zip'"):
+            basic_simple_protocol.save(name="zipped", path=str(temp_directory), compression="zip")
+        assert list(temp_directory.glob("zipped_model.json*")) == []
+
+    def test_saved_file_checksum_verifies(self, temp_directory, basic_simple_protocol):
+        """Test that saved files carry a checksum matching their contents."""
+        basic_simple_protocol.save(name="original", path=str(temp_directory))
+        model_file = temp_directory / "original_model.json"
+
+        with open(model_file, 'rb') as f:
+            assert verify_file_checksum(f)
+        with open(model_file, 'r', encoding='utf-8') as f:
+            data: dict = json.load(f)
+        assert list(data.keys())[-1] == CHECKSUM_FIELD
+        assert verify_document_checksum(data)
+
+    def test_trusted_load_tampered_file_raises(self, temp_directory, basic_simple_protocol):
+        """Test that trusted loading rejects a file modified after it was saved."""
+        basic_simple_protocol.save(name="original", path=str(temp_directory))
+        model_file = temp_directory / "original_model.json"
+        model_file.write_bytes(model_file.read_bytes().replace(b'"valid": true', b'"valid":  true'))
+
+        with pytest.raises(ProtocolError, match="checksum"):
+            ProtocolV1.load(str(model_file), trusted=True)
+        with open(model_file, 'r', encoding='utf-8') as f:
+            data: dict = json.load(f)
+        data["name"] = "tampered"
+        with pytest.raises(ProtocolError, match="checksum"):
+            ProtocolV1.from_json(data, trusted=True)
+
+    def test_trusted_load_without_checksum_raises(self, temp_directory, basic_simple_protocol):
+        """Test that trusted loading rejects files without an embedded checksum."""
+        basic_simple_protocol.save(name="original", path=str(temp_directory))
+        with open(temp_directory / "original_model.json", 'r', encoding='utf-8') as f:
+            data: dict = json.load(f)
+        data.pop(CHECKSUM_FIELD)
+        with open(temp_directory / "unsigned_model.json", 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=4, ensure_ascii=False)
+
+        with pytest.raises(ProtocolError, match="checksum"):
+            ProtocolV1.load(str(temp_directory / "unsigned_model.json"), trusted=True)
+        with pytest.raises(ProtocolError, match="checksum"):
+            ProtocolV1.from_json(data, trusted=True)
+        assert ProtocolV1.load(str(temp_directory / "unsigned_model.json")).name == basic_simple_protocol.name
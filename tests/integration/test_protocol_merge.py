@@ -0,0 +1,131 @@
+"""
+Integration tests for merging partial protocols and pickling protocols.
+"""
+import json
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from model_train_protocol.errors import ProtocolError
+from model_train_protocol.v1 import ProtocolV1
+from tests.fixtures.round_trip_protocols import copy_protocol, read_saved_protocol
+
+
+def _get_partial(protocol: ProtocolV1, start: int, stop: int) -> ProtocolV1:
+    """Returns a copy of a protocol keeping only samples start to stop of each instruction."""
+    partial: ProtocolV1 = copy_protocol(protocol)
+    for instruction in partial.instructions:
+        instruction.samples = list(instruction.samples)[start:stop]
+    return partial
+
+
+def _get_partials(protocol: ProtocolV1) -> list:
+    """Splits a protocol into partial protocols of one or two samples per instruction."""
+    sample_count: int = max(len(instruction.samples) for instruction in protocol.instructions)
+    return [_get_partial(protocol, start, start + 2) for start in range(0, sample_count, 2)]
+
+
+class TestProtocolMerge:
+    """Integration tests for ProtocolV1.merge and pickling ProtocolV1."""
+
+    def test_pickle_round_trip(self, temp_directory, round_trip_protocol):
+        """Test that an unpickled protocol saves to the same file as the protocol that was pickled."""
+        protocol: ProtocolV1 = round_trip_protocol
+        protocol.save(name="original", path=str(temp_directory))
+
+        pickle.loads(pickle.dumps(protocol)).save(name="unpickled", path=str(temp_directory))
+        assert read_saved_protocol(temp_directory, "unpickled") == read_saved_protocol(temp_directory, "original")
+
+    def test_instruction_sets_are_saved_in_name_order(self, temp_directory, multi_instruction_protocol):
+        """Test that instruction sets are saved in name order, whatever order their instructions were added in."""
+        protocol: ProtocolV1 = multi_instruction_protocol
+        names: list = sorted(instruction.name for instruction in protocol.instructions)
+        for reverse in (False, True):
+            instructions: list = sorted(protocol.instructions, key=lambda i: i.name, reverse=reverse)
+            protocol.instructions = set()
+            for instruction in instructions:
+                protocol.instructions.add(instruction)
+            protocol.save(name=f"reverse_{reverse}", path=str(temp_directory))
+            with open(temp_directory / f"reverse_{reverse}_model.json", 'r', encoding='utf-8') as f:
+                assert [instruction_set["name"] for instruction_set in json.load(f)["instruction"]["sets"]] == names
+        assert read_saved_protocol(temp_directory, "reverse_True") == \
+               read_saved_protocol(temp_directory, "reverse_False")
+
+    def test_pickle_is_smaller_than_compact_file(self, temp_directory, numtoken_protocol):
+        """Test that a pickled protocol is smaller than its compact protocol file."""
+        numtoken_protocol.save(name="compact", path=str(temp_directory), compact=True)
+        assert len(pickle.dumps(numtoken_protocol)) < (temp_directory / "compact_model.json").stat().st_size
+
+    def test_merged_partials_match_full_protocol(self, temp_directory, round_trip_protocol):
+        """Test that merging partial protocols built from slices of the samples gives the full protocol."""
+        protocol: ProtocolV1 = round_trip_protocol
+        protocol.save(name="original", path=str(temp_directory))
+
+        merged: ProtocolV1 = ProtocolV1.merge(*_get_partials(protocol))
+        assert merged.validate_protocol() == (True, None)
+        merged.save(name="merged", path=str(temp_directory))
+        assert read_saved_protocol(temp_directory, "merged") == read_saved_protocol(temp_directory, "original")
+
+    def test_merge_partials_built_by_worker_processes(self, temp_directory, multi_instruction_protocol):
+        """Test that partial protocols built and pickled by worker processes merge into the full protocol."""
+        with ProcessPoolExecutor(max_workers=2) as executor:
+            partials: list = list(executor.map(_get_partial, [multi_instruction_protocol] * 3, [0, 1, 2], [1, 2, None]))
+
+        ProtocolV1.merge(*partials).save(name="merged", path=str(temp_directory))
+        multi_instruction_protocol.save(name="original", path=str(temp_directory))
+        assert read_saved_protocol(temp_directory, "merged") == read_saved_protocol(temp_directory, "original")
+
+    def test_merge_combines_context(self, temp_directory, basic_simple_protocol):
+        """Test that context lines are combined in order, without duplicates."""
+        first, second = _get_partials(basic_simple_protocol)[:2]
+        second.add_context("Only in the second partial.")
+        list(second.instructions)[0].add_context("Instruction context of the second partial.")
+
+        merged: ProtocolV1 = ProtocolV1.merge(first, second)
+        assert merged.context == basic_simple_protocol.context + ["Only in the second partial."]
+        assert list(merged.instructions)[0].context == ["Instruction context of the second partial."]
+
+    def test_merge_without_protocols_raises_error(self):
+        """Test that at least one protocol is required."""
+        with pytest.raises(ProtocolError, match="At least one protocol"):
+            ProtocolV1.merge()
+
+    def test_merge_different_settings_raises_error(self, basic_simple_protocol, encrypted_protocol):
+        """Test that protocols with different settings cannot be merged."""
+        with pytest.raises(ProtocolError, match="same inputs, encryption"):
+            ProtocolV1.merge(basic_simple_protocol, encrypted_protocol)
+
+    def test_merge_different_tokensets_raises_error(self, basic_simple_protocol):
+        """Test that same-named instructions must have the same TokenSets."""
+        first, second = _get_partials(basic_simple_protocol)[:2]
+        packed: dict = second._pack()
+        memory_set: list = packed["instructions"][0]["set"]
+        memory_set[0], memory_set[1] = memory_set[1], memory_set[0]
+        with pytest.raises(ProtocolError, match="different TokenSets"):
+            ProtocolV1.merge(first, ProtocolV1._unpack(packed))
+
+    def test_merge_different_token_keys_raises_error(self, basic_simple_protocol):
+        """Test that tokens with the same value must have the same key."""
+        first, second = _get_partials(basic_simple_protocol)[:2]
+        packed: dict = second._pack()
+        token_value, token_info = packed["tokens"][0]
+        packed["tokens"][0] = (token_value, dict(token_info, key="🧪"))
+        with pytest.raises(ProtocolError, match="different settings or keys"):
+            ProtocolV1.merge(first, ProtocolV1._unpack(packed))
+
+    def test_merge_different_guardrails_raises_error(self, basic_simple_protocol_with_guardrail):
+        """Test that guardrails of the same TokenSet must be the same."""
+        first, second = _get_partials(basic_simple_protocol_with_guardrail)[:2]
+        packed: dict = second._pack()
+        guardrail: dict = packed["instructions"][0]["guardrails"][0]
+        guardrail["bad_output"] = "A different bad output."
+        with pytest.raises(ProtocolError, match="different guardrails"):
+            ProtocolV1.merge(first, ProtocolV1._unpack(packed))
+
+    def test_unsupported_pack_format_raises_error(self, basic_simple_protocol):
+        """Test that a packed protocol of an unknown format version is rejected."""
+        packed: dict = basic_simple_protocol._pack()
+        packed["format"] = 0
+        with pytest.raises(ProtocolError, match="Unsupported packed protocol format"):
+            ProtocolV1._unpack(packed)
@@ -0,0 +1,142 @@
+"""
+Integration tests for offset indexes and random-access reads of saved protocol files.
+"""
+import json
+
+import pytest
+
+from model_train_protocol import ProtocolReader
+from model_train_protocol.errors import ProtocolError, ProtocolFileError
+from model_train_protocol.v1 import ProtocolV1
+from model_train_protocol.v1.protocol_file import offset_index
+from model_train_protocol.v1.protocol_file.offset_index import write_index
+from tests.fixtures.round_trip_protocols import copy_protocol
+
+
+class TestProtocolReader:
+    """Integration tests for save(index=True) and ProtocolReader."""
+
+    @pytest.mark.parametrize("compact", [False, True])
+    def test_reads_match_file(self, temp_directory, round_trip_protocol, compact):
+        """Test that every member, instruction set and sample read by offset matches the file."""
+        protocol: ProtocolV1 = round_trip_protocol
+        for instruction in protocol.instructions:
+            instruction.samples = list(instruction.samples) * 5
+        protocol.save(name="indexed", path=str(temp_directory), compact=compact, index=True, index_interval=4)
+        with open(temp_directory / "indexed_model.json", 'r', encoding='utf-8') as f:
+            document: dict = json.load(f)
+
+        with ProtocolReader(str(temp_directory / "indexed_model.json")) as reader:
+            for key in ("name", "context", "tokens", "special_tokens"):
+                assert reader.read_member(key) == document[key]
+            instruction_sets: list = document["instruction"]["sets"]
+            assert reader.names == [instruction_set["name"] for instruction_set in instruction_sets]
+            for set_index, instruction_set in enumerate(instruction_sets):
+                samples: list = instruction_set["samples"]
+                assert reader.read_instruction_set(instruction_set["name"], samples=True) == instruction_set
+                assert "samples" not in reader.read_instruction_set(set_index)
+                assert reader.get_sample_count(set_index) == len(samples)
+                assert [reader.read_sample(set_index, i) for i in range(len(samples))] == samples
+                assert reader.read_sample(set_index, -1) == samples[-1]
+                assert list(reader.iter_samples(set_index, start=3, stop=9)) == samples[3:9]
+                assert list(reader.iter_samples(set_index)) == samples
+
+    def test_reads_include_appended_samples(self, temp_directory, round_trip_protocol):
+        """Test that samples appended after the file was indexed are read after the samples of their instruction set."""
+        protocol: ProtocolV1 = round_trip_protocol
+        protocol.save(name="indexed", path=str(temp_directory), index=True, index_interval=2)
+        path: str = str(temp_directory / "indexed_model.json")
+        for _ in range(2):
+            for instruction in copy_protocol(protocol).instructions:
+                ProtocolV1.append_samples(path, instruction=instruction)
+        ProtocolV1.load(path, trusted=True).save(name="loaded", path=str(temp_directory))
+        with open(temp_directory / "loaded_model.json", 'r', encoding='utf-8') as f:
+            document: dict = json.load(f)
+
+        with ProtocolReader(path) as reader:
+            for key in ("tokens", "valid"):
+                assert reader.read_member(key) == document[key]
+            for set_index, instruction_set in enumerate(document["instruction"]["sets"]):
+                samples: list = instruction_set["samples"]
+                assert reader.get_sample_count(instruction_set["name"]) == len(samples)
+                assert reader.read_instruction_set(set_index, samples=True)["samples"] == samples
+                assert [reader.read_sample(set_index, i) for i in range(len(samples))] == samples
+                assert reader.read_sample(set_index, -1) == samples[-1]
+                assert list(reader.iter_samples(set_index, start=1, stop=len(samples) - 1)) == samples[1:-1]
+                assert list(reader.iter_samples(set_index)) == samples
+            with pytest.raises(ProtocolError, match="out of range"):
+                reader.read_sample(0, reader.get_sample_count(0))
+
+    def test_segment_of_another_version_raises_error(self, temp_directory, basic_simple_protocol):
+        """Test that a segment appended to an earlier version of the file is rejected."""
+        basic_simple_protocol.save(name="indexed", path=str(temp_directory), index=True)
+        path: str = str(temp_directory / "indexed_model.json")
+        segment_path: str = ProtocolV1.append_samples(
+            path, instruction=list(copy_protocol(basic_simple_protocol).instructions)[0])
+        segment_text: str = (temp_directory / segment_path).read_text(encoding='utf-8')
+        basic_simple_protocol.add_context("Added after the samples were appended.")
+        basic_simple_protocol.save(name="indexed", path=str(temp_directory), index=True)
+
+        (temp_directory / segment_path).write_text(segment_text, encoding='utf-8')
+        with pytest.raises(ProtocolFileError, match="was not appended"):
+            ProtocolReader(path)
+
+    def test_samples_larger_than_scan_window(self, temp_directory, basic_simple_protocol, monkeypatch):
+        """Test that samples spanning the windows the index is built in, including multibyte text, are indexed."""
+        monkeypatch.setattr(offset_index, "_WINDOW_SIZE", 64)
+        instruction = list(basic_simple_protocol.instructions)[0]
+        sample = instruction.samples[0]
+        instruction.add_sample(input_snippets=["Ünïcödé text — with 😀 emoji"] * len(sample.input),
+                               output_snippet="Réponse", final=sample.result)
+        basic_simple_protocol.save(name="indexed", path=str(temp_directory), index=True, index_interval=1)
+        with open(temp_directory / "indexed_model.json", 'r', encoding='utf-8') as f:
+            samples: list = json.load(f)["instruction"]["sets"][0]["samples"]
+
+        with ProtocolReader(str(temp_directory / "indexed_model.json")) as reader:
+            assert [reader.read_sample(0, i) for i in range(len(samples))] == samples
+
+    def test_interleaved_reads(self, temp_directory, multi_instruction_protocol):
+        """Test that sample iterators over different instruction sets can be consumed alternately."""
+        multi_instruction_protocol.save(name="indexed", path=str(temp_directory), index=True, index_interval=2)
+        with ProtocolReader(str(temp_directory / "indexed_model.json")) as reader:
+            first, second = reader.iter_samples(0), reader.iter_samples(1)
+            interleaved: list = [(next(first), next(second)) for _ in range(3)]
+            assert interleaved == list(zip(list(reader.iter_samples(0))[:3], list(reader.iter_samples(1))[:3]))
+
+    def test_stale_index_raises_error(self, temp_directory, basic_simple_protocol):
+        """Test that an index built from another version of the file is rejected."""
+        basic_simple_protocol.save(name="indexed", path=str(temp_directory), index=True)
+        path: str = str(temp_directory / "indexed_model.json")
+        index_text: str = (temp_directory / "indexed_model_index.json").read_text(encoding='utf-8')
+        basic_simple_protocol.add_context("Added after the file was indexed.")
+        basic_simple_protocol.save(name="indexed", path=str(temp_directory))
+        assert not (temp_directory / "indexed_model_index.json").exists()
+
+        (temp_directory / "indexed_model_index.json").write_text(index_text, encoding='utf-8')
+        with pytest.raises(ProtocolFileError, match="another version of the file"):
+            ProtocolReader(path)
+        write_index(path)
+        with ProtocolReader(path) as reader:
+            assert "Added after the file was indexed." in reader.read_member("context")
+
+    def test_missing_index_raises_error(self, temp_directory, basic_simple_protocol):
+        """Test that files saved without an index cannot be read by offset."""
+        basic_simple_protocol.save(name="unindexed", path=str(temp_directory))
+        with pytest.raises(ProtocolFileError, match="has no offset index"):
+            ProtocolReader(str(temp_directory / "unindexed_model.json"))
+
+    def test_compressed_file_cannot_be_indexed(self, temp_directory, basic_simple_protocol):
+        """Test that saving a compressed file with an index raises an error."""
+        with pytest.raises(ProtocolError, match="Only uncompressed protocol files can be indexed"):
+            basic_simple_protocol.save(name="compressed", path=str(temp_directory), compression="gzip", index=True)
+
+    def test_out_of_range_reads_raise_error(self, temp_directory, basic_simple_protocol):
+        """Test that unknown instruction sets and out of range samples raise errors."""
+        basic_simple_protocol.save(name="indexed", path=str(temp_directory), index=True)
+        with ProtocolReader(str(temp_directory / "indexed_model.json")) as reader:
+            with pytest.raises(ProtocolError, match="no instruction set named"):
+                reader.read_sample("unknown", 0)
+            with pytest.raises(ProtocolError, match="out of range"):
+                reader.read_sample(0, reader.get_sample_count(0))
+            with pytest.raises(ProtocolError, match="out of range"):
+                reader.read_instruction_set(1)
@@ -0,0 +1,121 @@
+"""
+Integration tests for saving protocols as manifest and shard files, and loading them back.
+"""
+import json
+
+import pytest
+
+from model_train_protocol.errors import ProtocolError, ProtocolFileError
+from model_train_protocol.v1 import ProtocolV1
+from model_train_protocol.v1.protocol_file.checksum import CHECKSUM_FIELD, verify_file_checksum
+from model_train_protocol.v1.protocol_file.shards import SHARDS_FIELD
+from tests.fixtures.round_trip_protocols import read_saved_protocol
+
+
+def _read_json(path) -> dict:
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+class TestShardedProtocol:
+    """Integration tests for ProtocolV1.save_sharded and ProtocolV1.load_sharded."""
+
+    def test_sharded_load_round_trip(self, temp_directory, round_trip_protocol):
+        """Test that a sharded protocol loads in both modes as its single file loads, and trusted to the original."""
+        protocol: ProtocolV1 = round_trip_protocol
+        protocol.save(name="original", path=str(temp_directory))
+        manifest_path: str = protocol.save_sharded(name="sharded", path=str(temp_directory), max_samples_per_shard=2,
+                                                   workers=1)
+
+        for trusted in (False, True):
+            ProtocolV1.load(str(temp_directory / "original_model.json"), trusted=trusted).save(
+                name="loaded", path=str(temp_directory))
+            ProtocolV1.load_sharded(manifest_path, trusted=trusted, workers=1).save(
+                name="reloaded", path=str(temp_directory))
+            assert read_saved_protocol(temp_directory, "reloaded") == read_saved_protocol(temp_directory, "loaded")
+        assert read_saved_protocol(temp_directory, "reloaded") == read_saved_protocol(temp_directory, "original")
+
+    def test_shards_hold_the_samples_of_the_file(self, temp_directory, numtoken_workflow_5context_protocol):
+        """Test that the manifest is the protocol file without samples, and its shards hold the samples in order."""
+        protocol: ProtocolV1 = numtoken_workflow_5context_protocol
+        protocol.save(name="original", path=str(temp_directory))
+        manifest_path: str = protocol.save_sharded(name="sharded", path=str(temp_directory), max_samples_per_shard=2,
+                                                   workers=1)
+
+        original: dict = _read_json(temp_directory / "original_model.json")
+        manifest: dict = _read_json(manifest_path)
+        shards: list = manifest.pop(SHARDS_FIELD)
+        assert [shard["file"] for shard in shards] == [f"sharded_shard_{i:05d}.json" for i in range(len(shards))]
+        assert all(shard["samples"] <= 2 for shard in shards)
+
+        for set_index, instruction_set in enumerate(original["instruction"]["sets"]):
+            shard_samples: list = [
+                sample for shard in shards if shard["set"] == set_index
+                for sample in _read_json(temp_directory / shard["file"])["samples"]
+            ]
+            assert shard_samples == instruction_set["samples"]
+            instruction_set["samples"] = []
+        original.pop(CHECKSUM_FIELD)
+        manifest.pop(CHECKSUM_FIELD)
+        assert manifest == original
+
+    def test_process_pool_writes_the_same_files(self, temp_directory, numtoken_workflow_5context_protocol):
+        """Test that shards written and read by a process pool match those written in this process."""
+        protocol: ProtocolV1 = numtoken_workflow_5context_protocol
+        serial_directory = temp_directory / "serial"
+        pool_directory = temp_directory / "pool"
+        protocol.save_sharded(name="sharded", path=str(serial_directory), max_samples_per_shard=2, workers=1)
+        manifest_path: str = protocol.save_sharded(name="sharded", path=str(pool_directory), max_samples_per_shard=2,
+                                                   workers=2)
+
+        serial_files: list = sorted(path.name for path in serial_directory.iterdir())
+        assert sorted(path.name for path in pool_directory.iterdir()) == serial_files
+        for filename in serial_files:
+            assert (pool_directory / filename).read_bytes() == (serial_directory / filename).read_bytes()
+
+        ProtocolV1.load_sharded(manifest_path, trusted=True, workers=2).save(name="pooled", path=str(temp_directory))
+        protocol.save(name="original", path=str(temp_directory))
+        assert read_saved_protocol(temp_directory, "pooled") == read_saved_protocol(temp_directory, "original")
+
+    def test_compressed_shards(self, temp_directory, basic_simple_protocol):
+        """Test that shard files can be compressed, while the manifest stays plain JSON."""
+        manifest_path: str = basic_simple_protocol.save_sharded(name="sharded", path=str(temp_directory),
+                                                                max_samples_per_shard=2, workers=1,
+                                                                compression="gzip")
+
+        shards: list = _read_json(manifest_path)[SHARDS_FIELD]
+        assert all(shard["file"].endswith(".json.gz") for shard in shards)
+        with open(manifest_path, 'rb') as f:
+            assert verify_file_checksum(f)
+        ProtocolV1.load_sharded(manifest_path, trusted=True, workers=1).save(name="reloaded", path=str(temp_directory))
+        basic_simple_protocol.save(name="original", path=str(temp_directory))
+        assert read_saved_protocol(temp_directory, "reloaded") == read_saved_protocol(temp_directory, "original")
+
+    def test_modified_shard_is_not_trusted(self, temp_directory, basic_simple_protocol):
+        """Test that a modified shard file is rejected in trusted mode."""
+        manifest_path: str = basic_simple_protocol.save_sharded(name="sharded", path=str(temp_directory),
+                                                                max_samples_per_shard=2, workers=1)
+        shard_file = temp_directory / "sharded_shard_00000.json"
+        shard_file.write_bytes(shard_file.read_bytes().replace(b'"prompt": null', b'"prompt": "changed"', 1))
+
+        with pytest.raises(ProtocolFileError, match="does not match the manifest"):
+            ProtocolV1.load_sharded(manifest_path, trusted=True, workers=1)
+
+    def test_modified_manifest_is_not_trusted(self, temp_directory, basic_simple_protocol):
+        """Test that a modified manifest is rejected in trusted mode."""
+        manifest_path: str = basic_simple_protocol.save_sharded(name="sharded", path=str(temp_directory), workers=1)
+        manifest: dict = _read_json(manifest_path)
+        manifest["context"].append("Added after saving.")
+        with open(manifest_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=4)
+
+        with pytest.raises(ProtocolError, match="checksum"):
+            ProtocolV1.load_sharded(manifest_path, trusted=True, workers=1)
+
+    @pytest.mark.parametrize("max_samples_per_shard, workers", [(0, 1), (10, 0)])
+    def test_invalid_arguments_raise_error(self, temp_directory, basic_simple_protocol, max_samples_per_shard,
+                                           workers):
+        """Test that shard sizes and worker counts below one are rejected."""
+        with pytest.raises(ProtocolFileError, match="must be at least 1"):
+            basic_simple_protocol.save_sharded(name="sharded", path=str(temp_directory),
+                                               max_samples_per_shard=max_samples_per_shard, workers=workers)
@@ -363,27 +363,27 @@ class TestCSVConversionEdgeCases:
 class TestCSVConversionValidation:
     """Test CSV conversion protocol validation requirements."""
 
-    def test_valid_csv_protocol_save_success(self, valid_csv_data):
+    def test_valid_csv_protocol_save_success(self, temp_directory, valid_csv_data):
         """Test that valid CSV with sufficient context lines passes validation."""
         conversion = CSVConversion(valid_csv_data)
         protocol = conversion.to_mtp()
         
         # Should succeed - we have 12 context lines which is > 10
         try:
-            protocol.save()
+            protocol.save(path=str(temp_directory))
             # If we get here, save succeeded
             assert True
         except Exception as e:
             pytest.fail(f"Protocol save should have succeeded but failed with: {e}")
     
-    def test_insufficient_context_lines_validation_fails(self, csv_insufficient_context_lines):
+    def test_insufficient_context_lines_validation_fails(self, temp_directory, csv_insufficient_context_lines):
         """Test that CSV with insufficient context lines fails validation."""
         conversion = CSVConversion(csv_insufficient_context_lines)
         protocol = conversion.to_mtp()
         
         # Should fail validation due to insufficient context lines (4 < 10)
         try:
-            protocol.save()
+            protocol.save(path=str(temp_directory))
             pytest.fail("Protocol save should have failed due to insufficient context lines")
         except Exception as e:
             # Expect validation error mentioning context lines
@@ -391,14 +391,14 @@ class TestCSVConversionValidation:
             assert "context lines" in error_message.lower()
             assert "minimum required of 10" in error_message
     
-    def test_valid_csv_with_guardrails_save_success(self, valid_csv_with_guardrails):
+    def test_valid_csv_with_guardrails_save_success(self, temp_directory, valid_csv_with_guardrails):
         """Test that valid CSV with guardrails and sufficient context passes validation."""
         conversion = CSVConversion(valid_csv_with_guardrails)
         protocol = conversion.to_mtp()
         
         # Should succeed - we have 14 context lines which is > 10
         try:
-            protocol.save()
+            protocol.save(path=str(temp_directory))
             # If we get here, save succeeded
             assert True
         except Exception as e:
@@ -473,4 +473,30 @@ class TestCSVConversionInstructionNaming:
         assert instruction.name == "StateMachineInstruction"
         
         # Verify it's a state machine protocol
-        assert protocol.state_machine is True
\ No newline at end of file
+        assert protocol.state_machine is True
+
+class TestCSVConversionColumns:
+    """Test cases for the column-oriented conversion pipeline."""
+
+    def test_to_mtp_matches_row_by_row_conversion(self):
+        """Test that the converted instruction matches adding each CSV line one at a time."""
+        data = pd.DataFrame({
+            'Input': ['Hi', 'Hello', pd.NA, 'Off topic 1', 'Hey', 'Off topic 2', 'Bye', 'Later', 'Off topic 3'],
+            'Output': ['greeting', '', 'ignored', 'GUARDRAIL', pd.NA, 'GUARDRAIL', 'farewell', 'nan', 'GUARDRAIL'],
+            'Reference': ['Ctx A', 'Ctx A', 'Ctx X', 'Ctx G', '', 'Ctx G', pd.NA, 'Ctx B', 'Ctx G']
+        })
+        conversion = CSVConversion(data)
+        instruction = list(conversion.to_mtp().instructions)[0]
+
+        expected = StateMachineInstruction(input=conversion.standard_input, states=["greeting", "farewell"])
+        for input_str, state in [('Hi', 'greeting'), ('Hello', 'greeting'), ('Bye', 'farewell'), ('Later', 'farewell')]:
+            expected.add_sample(input_snippets=[input_str], state=state)
+
+        assert [sample.to_dict() for sample in instruction.samples] == \
+               [sample.to_dict() for sample in expected.samples]
+        assert instruction.context == ['Ctx A', 'Ctx B']
+        # Empty outputs inherit the previous output, including GUARDRAIL
+        assert instruction.get_guardrails()[0].samples == ['Off topic 1', 'Hey', 'Off topic 2', 'Off topic 3']
+        assert conversion.unique_states == {"greeting", "farewell"}
+        assert [line.output_str for line in conversion.ordered_lines] == \
+               ['greeting', 'greeting', 'GUARDRAIL', 'GUARDRAIL', 'GUARDRAIL', 'farewell', 'farewell', 'GUARDRAIL']
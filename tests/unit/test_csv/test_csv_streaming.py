@@ -0,0 +1,67 @@
+"""
+Unit tests for chunked CSV conversion.
+"""
+
+from model_train_protocol.common.instructions import SampleStore
+from model_train_protocol.csv import CSVConversion, CSVStreamConversion
+from model_train_protocol.errors.conversion import ConversionError
+from tests.fixtures.csv_fixtures import *
+
+
+class TestCSVStreamConversion:
+    """Test cases for the CSVStreamConversion class."""
+
+    @pytest.fixture
+    def chat_csv_data(self, valid_csv_with_guardrails) -> pd.DataFrame:
+        """CSV data with missing inputs, empty outputs to forward-fill, and guardrails."""
+        data = valid_csv_with_guardrails.copy()
+        data.loc[1, 'Output'] = ''
+        data.loc[4, 'Output'] = pd.NA
+        data.loc[5, 'Input'] = pd.NA
+        return data
+
+    @pytest.mark.parametrize("chunk_size", [1, 2, 5, 1000])
+    def test_stream_conversion_matches_conversion(self, temp_directory, chat_csv_data, chunk_size):
+        """Test that converting in chunks saves the same file as converting the whole DataFrame."""
+        csv_path = temp_directory / "chat.csv"
+        chat_csv_data.to_csv(csv_path, index=False)
+
+        expected = CSVConversion(pd.read_csv(csv_path, dtype=str), "Chat").to_mtp()
+        expected.save(name="expected", path=str(temp_directory))
+        streamed = CSVStreamConversion(csv_path, "Chat", chunk_size=chunk_size).to_mtp()
+        streamed.save(name="streamed", path=str(temp_directory))
+
+        instruction = list(streamed.instructions)[0]
+        assert isinstance(instruction.samples, SampleStore)
+        assert instruction.has_guardrails
+        assert (temp_directory / "streamed_model.json").read_bytes() == \
+               (temp_directory / "expected_model.json").read_bytes()
+
+    def test_stream_conversion_forward_fills_across_chunks(self, temp_directory):
+        """Test that an empty output at the start of a chunk inherits the last output of the previous chunk."""
+        csv_path = temp_directory / "fill.csv"
+        pd.DataFrame({
+            'Input': ['One', 'Two', 'Three', 'Four'],
+            'Output': ['first', 'second', '', 'third'],
+            'Reference': ['', '', '', '']
+        }).to_csv(csv_path, index=False)
+
+        conversion = CSVStreamConversion(csv_path, chunk_size=2)
+        instruction = list(conversion.to_mtp().instructions)[0]
+
+        assert conversion.get_unique_states() == {"first", "second", "third"}
+        assert [sample.output for sample in instruction.samples] == ["first", "second", "second", "third"]
+
+    def test_stream_conversion_first_row_empty_output_raises_error(self, temp_directory, csv_empty_output_first_row):
+        """Test that an empty output in the first row raises ConversionError."""
+        csv_path = temp_directory / "empty.csv"
+        csv_empty_output_first_row.to_csv(csv_path, index=False)
+
+        with pytest.raises(ConversionError, match="The first line of the CSV cannot have an empty output"):
+            CSVStreamConversion(csv_path, chunk_size=1).to_mtp()
+
+    @pytest.mark.parametrize("path, chunk_size", [("data.xlsx", 10), ("data.csv", 0)])
+    def test_stream_conversion_invalid_arguments(self, path, chunk_size):
+        """Test that XLSX files and chunk sizes below one are rejected."""
+        with pytest.raises(ConversionError):
+            CSVStreamConversion(path, chunk_size=chunk_size)
@@ -0,0 +1,154 @@
+"""
+Unit tests for adding column-oriented samples to an Instruction with add_samples.
+"""
+import pytest
+
+from model_train_protocol import StateMachineInstruction
+from model_train_protocol.common.instructions import Instruction, SampleStore
+from model_train_protocol.common.instructions.input.InstructionInput import InstructionInput
+from model_train_protocol.common.instructions.input.StateMachineInput import StateMachineInput
+from model_train_protocol.common.instructions.output.InstructionOutput import InstructionOutput
+from model_train_protocol.common.tokens import Token, NumToken, NumListToken, FinalToken, FinalNumToken, TokenSet
+
+SAMPLE_COUNT = 5
+
+
+class TestAddSamples:
+    """Test cases for Instruction.add_samples."""
+
+    @pytest.fixture
+    def final_done(self) -> FinalToken:
+        return FinalToken("Done")
+
+    @pytest.fixture
+    def final_score(self) -> FinalNumToken:
+        return FinalNumToken("Score", min_value=0, max_value=10)
+
+    @pytest.fixture
+    def numeric_tokenset(self) -> TokenSet:
+        return TokenSet(tokens=[Token("Measure"), NumToken("Length", min_value=0, max_value=100),
+                                NumListToken("Point", min_value=-10, max_value=10, length=2)])
+
+    @pytest.fixture
+    def text_tokenset(self) -> TokenSet:
+        return TokenSet(tokens=[Token("Talk")])
+
+    @pytest.fixture
+    def output_tokenset(self) -> TokenSet:
+        return TokenSet(tokens=[Token("Reply")])
+
+    def _create_instruction(self, numeric_tokenset, text_tokenset, output_tokenset, finals) -> Instruction:
+        return Instruction(name="bulk", input=InstructionInput(tokensets=[numeric_tokenset, text_tokenset]),
+                           output=InstructionOutput(tokenset=output_tokenset, final=finals))
+
+    @pytest.mark.parametrize("use_sample_store", [False, True])
+    def test_add_samples_matches_add_sample(self, numeric_tokenset, text_tokenset, output_tokenset, final_done,
+                                            final_score, use_sample_store):
+        """Test that add_samples creates the same samples as calling add_sample for each row."""
+        numeric_snippets = [numeric_tokenset.create_snippet(f"measure {i}", numbers=[i], number_lists=[[i, -i]])
+                            for i in range(SAMPLE_COUNT)]
+        texts = [f"talk {i}" for i in range(SAMPLE_COUNT)]
+        outputs = [f"reply {i}" for i in range(SAMPLE_COUNT)]
+        finals = [final_done if i % 2 else final_score for i in range(SAMPLE_COUNT)]
+        values = [None if i % 2 else i for i in range(SAMPLE_COUNT)]
+
+        expected = self._create_instruction(numeric_tokenset, text_tokenset, output_tokenset, [final_done, final_score])
+        for row in zip(numeric_snippets, texts, outputs, finals, values):
+            expected.add_sample(input_snippets=[row[0], row[1]], output_snippet=row[2], final=row[3],
+                                output_value=row[4])
+
+        instruction = self._create_instruction(numeric_tokenset, text_tokenset, output_tokenset,
+                                               [final_done, final_score])
+        if use_sample_store:
+            instruction.use_sample_store()
+        instruction.add_samples(inputs_columns=[numeric_snippets, tuple(texts)], outputs=outputs, finals=finals,
+                                values=values)
+
+        assert isinstance(instruction.samples, SampleStore) == use_sample_store
+        assert [sample.to_dict() for sample in instruction.samples] == \
+               [sample.to_dict() for sample in expected.samples]
+
+    def test_add_samples_single_final(self, numeric_tokenset, text_tokenset, output_tokenset, final_done):
+        """Test that a single final token, or the Output's only final token, is used for every sample."""
+        instruction = self._create_instruction(numeric_tokenset, text_tokenset, output_tokenset, final_done)
+        numeric_snippets = [numeric_tokenset.create_snippet("m", numbers=[1], number_lists=[[1, 2]])] * 2
+
+        instruction.add_samples(inputs_columns=[numeric_snippets, ["a", "b"]], outputs=["x", "y"])
+        instruction.add_samples(inputs_columns=[numeric_snippets, ["c", "d"]], outputs=["z", "w"], finals=final_done)
+
+        assert [sample.result for sample in instruction.samples] == [final_done] * 4
+
+    @pytest.mark.parametrize("case, error", [
+        ("column_length", "Column 1 has"),
+        ("column_count", "Number of input columns"),
+        ("string_for_numbers", "Failed to create Snippet"),
+        ("wrong_tokenset", "does not match expected token set"),
+        ("too_long", "exceeds maximum allowed length"),
+        ("missing_value", "requires a numeric value"),
+        ("value_out_of_bounds", "out of bounds"),
+        ("unknown_final", "is not added to the Output final tokens"),
+    ])
+    def test_add_samples_invalid_adds_nothing(self, numeric_tokenset, text_tokenset, output_tokenset, final_done,
+                                             final_score, case, error):
+        """Test that an invalid sample raises and no samples are added."""
+        instruction = self._create_instruction(numeric_tokenset, text_tokenset, output_tokenset,
+                                               [final_done, final_score])
+        numeric_column = [numeric_tokenset.create_snippet("m", numbers=[1], number_lists=[[1, 2]])] * 2
+        inputs_columns = [numeric_column, ["a", "b"]]
+        outputs = ["x", "y"]
+        finals = [final_done, final_score]
+        values = [None, 5]
+
+        if case == "column_length":
+            inputs_columns[1] = ["a"]
+        elif case == "column_count":
+            inputs_columns = inputs_columns[:1]
+        elif case == "string_for_numbers":
+            inputs_columns[0] = ["m", "n"]
+        elif case == "wrong_tokenset":
+            inputs_columns[1] = [text_tokenset.create_snippet("a"), output_tokenset.create_snippet("b")]
+        elif case == "too_long":
+            outputs = ["x", "y" * 1000]
+        elif case == "missing_value":
+            values = None
+        elif case == "value_out_of_bounds":
+            values = [None, 50]
+        elif case == "unknown_final":
+            finals = [final_done, FinalToken("Other")]
+
+        with pytest.raises(ValueError, match=error):
+            instruction.add_samples(inputs_columns=inputs_columns, outputs=outputs, finals=finals, values=values)
+        assert len(instruction.samples) == 0
+
+
+class TestStateMachineAddSamples:
+    """Test cases for StateMachineInstruction.add_samples."""
+
+    @pytest.fixture
+    def state_machine_instruction(self) -> StateMachineInstruction:
+        return StateMachineInstruction(input=StateMachineInput(tokensets=[TokenSet(tokens=[Token("Ask")])]),
+                                       states=["yes", "no"])
+
+    @pytest.mark.parametrize("use_sample_store", [False, True])
+    def test_add_samples_matches_add_sample(self, state_machine_instruction, use_sample_store):
+        """Test that add_samples creates the same samples as calling add_sample for each row."""
+        inputs = [f"question {i}" for i in range(SAMPLE_COUNT)]
+        states = ["yes" if i % 2 else "no" for i in range(SAMPLE_COUNT)]
+        expected = StateMachineInstruction(input=state_machine_instruction.input, states=["yes", "no"])
+        for input_str, state in zip(inputs, states):
+            expected.add_sample(input_snippets=[input_str], state=state)
+
+        if use_sample_store:
+            state_machine_instruction.use_sample_store()
+        state_machine_instruction.add_samples(inputs_columns=[tuple(inputs)], states=states)
+
+        assert [sample.to_dict() for sample in state_machine_instruction.samples] == \
+               [sample.to_dict() for sample in expected.samples]
+
+    def test_add_samples_invalid_adds_nothing(self, state_machine_instruction):
+        """Test that an invalid sample raises and no samples are added."""
+        with pytest.raises(ValueError, match="exceeds maximum allowed length"):
+            state_machine_instruction.add_samples(inputs_columns=[["a", "b"]], states=["yes", "no" * 1000])
+        with pytest.raises(ValueError, match="Column 0 has"):
+            state_machine_instruction.add_samples(inputs_columns=[["a"]], states=["yes", "no"])
+        assert len(state_machine_instruction.samples) == 0
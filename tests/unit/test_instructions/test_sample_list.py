@@ -0,0 +1,66 @@
+"""
+Unit tests for the SampleList that counts changes to the samples of an Instruction.
+"""
+import pickle
+
+import pytest
+
+from model_train_protocol.common.instructions import SampleList
+from model_train_protocol.common.instructions.Sample import Sample
+from model_train_protocol.common.tokens import FinalToken
+
+
+def _create_sample(output: str) -> Sample:
+    """Creates a sample with a single input line."""
+    return Sample(input=["a"], output=output, prompt=None, numbers=[[], []], number_lists=[[], []],
+                  result=FinalToken("End"), value=None)
+
+
+class TestSampleList:
+    """Test cases for the SampleList class."""
+
+    def test_appending_samples_is_not_counted(self):
+        """Test that samples appended with append(), extend() and += leave the changes count as it is."""
+        samples = SampleList([_create_sample("first")])
+        samples.append(_create_sample("second"))
+        samples.extend([_create_sample("third")])
+        samples += [_create_sample("fourth")]
+        assert isinstance(samples, SampleList)
+        assert [sample.output for sample in samples] == ["first", "second", "third", "fourth"]
+        assert samples.changes == 0
+
+    @pytest.mark.parametrize("change", [
+        lambda samples: samples.__setitem__(0, _create_sample("replaced")),
+        lambda samples: samples.__setitem__(slice(0, 1), []),
+        lambda samples: samples.__delitem__(0),
+        lambda samples: samples.__imul__(2),
+        lambda samples: samples.insert(0, _create_sample("inserted")),
+        lambda samples: samples.pop(),
+        lambda samples: samples.remove(samples[0]),
+        lambda samples: samples.clear(),
+        lambda samples: samples.sort(key=lambda sample: sample.output),
+        lambda samples: samples.reverse(),
+    ])
+    def test_other_changes_are_counted(self, change):
+        """Test that every change other than appending samples increments the changes count."""
+        samples = SampleList([_create_sample("first"), _create_sample("second")])
+        change(samples)
+        assert samples.changes == 1
+
+    def test_instruction_samples_are_sample_lists(self, basic_simple_protocol):
+        """Test that lists assigned as the samples of an Instruction are copied into a SampleList."""
+        instruction = list(basic_simple_protocol.instructions)[0]
+        assert isinstance(instruction.samples, SampleList)
+        samples: list = list(instruction.samples)
+        instruction.samples = samples
+        assert isinstance(instruction.samples, SampleList)
+        assert instruction.samples == samples and instruction.samples is not samples
+
+    def test_pickled_sample_list_starts_counting_again(self):
+        """Test that a pickled SampleList keeps its samples and counts changes from 0."""
+        samples = SampleList([_create_sample("first"), _create_sample("second")])
+        samples.pop()
+        copied: SampleList = pickle.loads(pickle.dumps(samples))
+        assert isinstance(copied, SampleList)
+        assert [sample.output for sample in copied] == ["first"]
+        assert copied.changes == 0
@@ -0,0 +1,182 @@
+"""
+Unit tests for the columnar SampleStore.
+"""
+import pytest
+
+from model_train_protocol.common.instructions import SampleStore
+from model_train_protocol.common.instructions.Sample import Sample
+from model_train_protocol.common.tokens import FinalToken
+from model_train_protocol.errors import InstructionError
+from model_train_protocol.v1 import ProtocolV1
+
+PROTOCOL_FIXTURES = [
+    "basic_simple_protocol",
+    "numtoken_protocol",
+    "numlisttoken_protocol",
+    "multi_instruction_protocol",
+    "comprehensive_protocol",
+    "state_machine_protocol",
+]
+
+
+def _create_samples() -> list[Sample]:
+    """Creates samples with mixed integer and float numbers, number lists and prompts."""
+    first_final = FinalToken("First")
+    second_final = FinalToken("Second")
+    return [
+        Sample(input=["a", "b"], output="c", prompt=None, numbers=[[1, 2.5], [], [3]],
+               number_lists=[[[1, 2], [0.5, 4]], [], []], result=first_final, value=None),
+        Sample(input=["d", "e"], output="f", prompt="prompt", numbers=[[-7, 0.0], [], [8]],
+               number_lists=[[[5, 6], [7.25, -8]], [], []], result=second_final, value=3),
+        Sample(input=["g", "h"], output="i", prompt=None, numbers=[[0, 1.0], [], [2]],
+               number_lists=[[[9, 10], [11, 12]], [], []], result=first_final, value=1.5),
+    ]
+
+
+def _extend_columns(store: SampleStore, samples: list[Sample]):
+    """Adds samples to a store through extend_columns()."""
+    store.extend_columns(inputs=[list(line) for line in zip(*(sample.input for sample in samples))],
+                         outputs=[sample.output for sample in samples],
+                         prompts=[sample.prompt for sample in samples],
+                         numbers=[list(line) for line in zip(*(sample.numbers for sample in samples))],
+                         number_lists=[list(line) for line in zip(*(sample.number_lists for sample in samples))],
+                         results=[sample.result for sample in samples],
+                         values=[sample.value for sample in samples])
+
+
+class TestSampleStore:
+    """Test cases for the SampleStore class."""
+
+    def test_sample_store_views_match_samples(self):
+        """Test that Sample views read from the store match the samples added, including number types."""
+        samples = _create_samples()
+        store = SampleStore(samples)
+
+        assert len(store) == len(samples)
+        for sample, view in zip(samples, store):
+            assert view.to_dict() == sample.to_dict()
+            assert [[type(n) for n in line] for line in view.numbers] == \
+                   [[type(n) for n in line] for line in sample.numbers]
+            assert view.result is sample.result
+        assert store == samples
+        assert store.result_tokens == [samples[0].result, samples[1].result]
+
+    def test_sample_store_indexing(self):
+        """Test negative indexes, slices and out of range indexes."""
+        samples = _create_samples()
+        store = SampleStore(samples)
+
+        assert store[-1].to_dict() == samples[-1].to_dict()
+        assert [view.output for view in store[1:]] == ["f", "i"]
+        with pytest.raises(IndexError):
+            _ = store[len(samples)]
+
+    def test_sample_store_iter_by_result(self):
+        """Test that samples are yielded in the order of a stable sort by result value."""
+        samples = _create_samples()
+        samples.insert(0, Sample(input=["j", "k"], output="l", prompt=None, numbers=[[0, 0], [], [0]],
+                                 number_lists=[[[0, 0], [0, 0]], [], []], result=FinalToken("Second"), value=None))
+        store = SampleStore(samples)
+
+        assert [view.to_dict() for view in store.iter_by_result()] == \
+               [sample.to_dict() for sample in sorted(samples, key=lambda sample: sample.result.value)]
+
+    def test_sample_store_mismatched_lines_raises(self):
+        """Test that samples with a different number of lines are rejected."""
+        store = SampleStore(_create_samples())
+        sample = Sample(input=["a"], output="b", prompt=None, numbers=[[], []], number_lists=[[], []],
+                        result=FinalToken("First"), value=None)
+
+        with pytest.raises(InstructionError, match="same number of lines"):
+            store.append(sample)
+        assert len(store) == 3
+
+    @pytest.mark.parametrize("add", ["append", "extend_columns"])
+    def test_sample_store_keeps_integers_exact(self, add):
+        """Test that integers too large for a float, bools and ints outside the 64-bit range are kept as they are."""
+        samples = _create_samples()
+        samples[0].numbers[0] = [(1 << 53) + 1, True, 2.5]
+        samples[1].number_lists[0][0] = [-(1 << 63), (1 << 63) - 1, 1 << 70, -(1 << 70)]
+        samples[2].numbers[2] = [False, 1.0]
+        store = SampleStore()
+        if add == "append":
+            store.extend(samples)
+        else:
+            _extend_columns(store, samples)
+
+        assert store == samples
+        for sample, view in zip(samples, store):
+            assert [[type(n) for n in line] for line in view.numbers] == \
+                   [[type(n) for n in line] for line in sample.numbers]
+            assert [[[type(n) for n in numbers] for numbers in line] for line in view.number_lists] == \
+                   [[[type(n) for n in numbers] for numbers in line] for line in sample.number_lists]
+
+    def test_extend_columns_int_outside_64_bits(self):
+        """Test that ints and floats added after other samples stay exact when one int is outside the 64-bit range."""
+        store = SampleStore(_create_samples())
+        samples = _create_samples()
+        samples[1].numbers[0] = [1 << 64, (1 << 53) + 1, 0.5]
+        _extend_columns(store, samples)
+        _extend_columns(store, _create_samples())
+
+        assert store == _create_samples() + samples + _create_samples()
+        assert [type(n) for n in store[4].numbers[0]] == [int, int, float]
+
+    @pytest.mark.parametrize("add", ["append", "extend_columns"])
+    def test_sample_store_numpy_integers_are_ints(self, add):
+        """Test that NumPy integers are stored and read back as ints, and NumPy floats as floats."""
+        np = pytest.importorskip("numpy")
+        samples = _create_samples()
+        samples[0].numbers[0] = [np.int64(5), np.float64(2.5)]
+        samples[1].number_lists[0][0] = [np.uint64((1 << 64) - 1), np.int32(-3)]
+        store = SampleStore()
+        if add == "append":
+            store.extend(samples)
+        else:
+            _extend_columns(store, samples)
+
+        assert store[0].numbers[0] == [5, 2.5]
+        assert [type(n) for n in store[0].numbers[0]] == [int, float]
+        assert store[1].number_lists[0][0] == [(1 << 64) - 1, -3]
+        assert [type(n) for n in store[1].number_lists[0][0]] == [int, int]
+
+    @pytest.mark.parametrize("protocol_fixture", PROTOCOL_FIXTURES)
+    def test_use_sample_store_saves_identical_file(self, temp_directory, protocol_fixture, request):
+        """Test that switching every instruction to a SampleStore does not change the saved file."""
+        protocol: ProtocolV1 = request.getfixturevalue(protocol_fixture)
+        protocol.save(name="list", path=str(temp_directory))
+
+        for instruction in protocol.instructions:
+            instruction.use_sample_store()
+            assert isinstance(instruction.samples, SampleStore)
+        protocol.save(name="store", path=str(temp_directory))
+
+        assert (temp_directory / "store_model.json").read_bytes() == (temp_directory / "list_model.json").read_bytes()
+
+    def test_use_sample_store_saves_large_integers_identically(self, temp_directory, numtoken_protocol):
+        """Test that integers too large for a float are saved the same from a list and from a SampleStore."""
+        instruction = list(numtoken_protocol.instructions)[0]
+        for sample in instruction.samples:
+            for line in sample.numbers:
+                line[:] = [(1 << 60) + 1 + index for index in range(len(line))]
+        numtoken_protocol.save(name="list", path=str(temp_directory))
+
+        instruction.use_sample_store()
+        numtoken_protocol.save(name="store", path=str(temp_directory))
+
+        saved: bytes = (temp_directory / "list_model.json").read_bytes()
+        assert str((1 << 60) + 1).encode() in saved
+        assert (temp_directory / "store_model.json").read_bytes() == saved
+
+    def test_add_sample_after_use_sample_store(self, simple_basic_instruction_with_samples,
+                                               simple_context_sample, simple_response_sample):
+        """Test that samples added after switching are appended to the store."""
+        instruction = simple_basic_instruction_with_samples
+        instruction.use_sample_store()
+        existing = instruction.samples[0]
+
+        instruction.add_sample(input_snippets=[simple_context_sample], output_snippet=simple_response_sample)
+
+        assert isinstance(instruction.samples, SampleStore)
+        assert len(instruction.samples) == 2
+        assert instruction.samples[-1].to_dict() == existing.to_dict()
@@ -223,6 +223,70 @@ class TestProtocol:
         assert token.key == "🔑"
         assert token.key in protocol.used_keys
 
+    def test_protocol_add_token_substring_value_raises(self):
+        """Test that adding a token whose value conflicts with an existing token raises immediately."""
+        protocol = ProtocolV1("test_protocol", inputs=3)
+        protocol._add_token(Token("Testing"))
+
+        with pytest.raises(ValueError, match="'Test_' is a substring of 'Testing_'"):
+            protocol._add_token(Token("Test"))
+        assert {token.value for token in protocol.tokens} == {"Testing_"}
+
+    def test_protocol_add_token_substring_key_raises(self):
+        """Test that adding a token whose key conflicts with an existing key raises immediately."""
+        protocol = ProtocolV1("test_protocol", inputs=3)
+        protocol._add_token(Token("Apple", key="KeyLong"))
+
+        with pytest.raises(ValueError, match="'Key' is a substring of 'KeyLong'"):
+            protocol._add_token(Token("Banana", key="Key"))
+        assert protocol.used_keys == {"KeyLong"}
+
+    def test_protocol_add_instruction_with_conflicting_token_adds_no_tokens(self):
+        """Test that an Instruction rejected for a token conflict leaves the tokens of the protocol unchanged."""
+        protocol = ProtocolV1("test_protocol", inputs=1, encrypt=False)
+        protocol._add_token(Token("Alpha"))
+        input_set = TokenSet(tokens=(Token("Newone"), Token("Alph")))
+        output_set = TokenSet(tokens=(Token("Reply"),))
+        instruction = Instruction(name="conflicting", input=InstructionInput(tokensets=[input_set]),
+                                  output=InstructionOutput(tokenset=output_set, final=FinalToken("Result")))
+        for i in range(3):
+            instruction.add_sample(input_snippets=[f"Input {i}"], output_snippet=f"Output {i}")
+
+        with pytest.raises(ValueError, match="'Alph_' is a substring of 'Alpha_'") as error:
+            protocol.add_instruction(instruction)
+        assert str(error.value).count("'Alph_' is a substring of 'Alpha_'") == 1
+        assert {token.value for token in protocol.tokens} == {"Alpha_"}
+        assert protocol.used_keys == {"Alpha_"}
+        assert protocol._value_index.find_conflicts("Newone_") == []
+        assert protocol._key_index.find_conflicts("Newone_") == []
+        assert protocol.instructions == set()
+
+    def test_protocol_add_instruction_with_conflicting_new_tokens_raises(self):
+        """Test that the new tokens of an Instruction are checked against each other before any is added."""
+        protocol = ProtocolV1("test_protocol", inputs=1, encrypt=False)
+        input_set = TokenSet(tokens=(Token("Beta"), Token("Betamax")))
+        output_set = TokenSet(tokens=(Token("Reply"),))
+        instruction = Instruction(name="conflicting", input=InstructionInput(tokensets=[input_set]),
+                                  output=InstructionOutput(tokenset=output_set, final=FinalToken("Result")))
+        for i in range(3):
+            instruction.add_sample(input_snippets=[f"Input {i}"], output_snippet=f"Output {i}")
+
+        with pytest.raises(ValueError, match="'Beta_' is a substring of 'Betamax_'"):
+            protocol.add_instruction(instruction)
+        assert protocol.tokens == set()
+
+    def test_protocol_validate_token_conflicts_after_direct_modification(self):
+        """Test that validation still finds conflicts in tokens added without _add_token."""
+        protocol = ProtocolV1("test_protocol", inputs=3, encrypt=False)
+        protocol._add_token(Token("Testing"))
+        protocol._validate_token_conflicts()
+
+        token = Token("Test")
+        protocol._assign_key(token)
+        protocol.tokens.add(token)
+        with pytest.raises(ValueError, match="is a substring of"):
+            protocol._validate_token_conflicts()
+
     def test_protocol_add_instruction_basic(self):
         """Test adding basic instruction to protocol."""
         protocol = ProtocolV1("test_protocol", inputs=2)
@@ -1227,3 +1291,125 @@ class TestProtocol:
 
         with pytest.raises(ProtocolError, match="Missing required field 'name'"):
             ProtocolV1.from_json(protocol_json)
+
+
+class TestProtocolInstructionLookup:
+    """Test cases for the name and duplicate checks of Protocol.add_instruction."""
+
+    INSTRUCTION_COUNT = 20
+
+    class _UncomparableSamples(list):
+        """A sample list that fails the test if the samples are compared."""
+
+        def __eq__(self, other):
+            raise AssertionError("Samples were compared")
+
+        __hash__ = None
+
+    @pytest.fixture
+    def token_sets(self) -> tuple[TokenSet, TokenSet]:
+        return TokenSet(tokens=[Token("Ask")]), TokenSet(tokens=[Token("Answer")])
+
+    def _create_instruction(self, token_sets: tuple[TokenSet, TokenSet], name: str) -> Instruction:
+        input_set, output_set = token_sets
+        instruction = Instruction(name=name, input=InstructionInput(tokensets=[input_set]),
+                                  output=InstructionOutput(tokenset=output_set, final=FinalToken("End")))
+        for i in range(3):
+            instruction.add_sample(input_snippets=[f"ask {i}"], output_snippet=f"answer {i}")
+        return instruction
+
+    def test_add_instruction_does_not_compare_samples(self, token_sets):
+        """Test that instructions with the same TokenSets and different names are added without comparing samples."""
+        protocol = ProtocolV1("lookup", inputs=1)
+        for i in range(self.INSTRUCTION_COUNT):
+            instruction = self._create_instruction(token_sets, name=f"instruction_{i}")
+            instruction.samples = self._UncomparableSamples(instruction.samples)
+            protocol.add_instruction(instruction)
+
+        assert len(protocol.instructions) == self.INSTRUCTION_COUNT
+        assert len({instruction.fingerprint for instruction in protocol.instructions}) == 1
+
+    def test_add_instruction_equal_copy_raises_error(self, token_sets):
+        """Test that a distinct but equal instruction is rejected as already added."""
+        protocol = ProtocolV1("lookup", inputs=1)
+        instruction = self._create_instruction(token_sets, name="instruction")
+        protocol.add_instruction(instruction)
+
+        copy = self._create_instruction(token_sets, name="instruction")
+        copy.samples = instruction.samples
+
+        with pytest.raises(ProtocolError, match="already added"):
+            protocol.add_instruction(copy)
+        with pytest.raises(ProtocolError, match="An instruction with name 'instruction' already exists"):
+            protocol.add_instruction(self._create_instruction(token_sets, name="instruction"))
+        assert protocol.instructions == {instruction}
+
+    def test_fingerprint_ignores_samples(self, token_sets):
+        """Test that the fingerprint depends on the TokenSets only and is computed once."""
+        instruction = self._create_instruction(token_sets, name="instruction")
+        fingerprint = instruction.fingerprint
+        instruction.add_sample(input_snippets=["ask again"], output_snippet="answer again")
+
+        assert instruction.fingerprint is fingerprint
+        assert fingerprint == str(instruction.get_token_sets())
+        assert hash(instruction) == hash(self._create_instruction(token_sets, name="other"))
+
+
+class TestProtocolIncrementalValidation:
+    """Test cases for reusing validation results across validate_protocol calls."""
+
+    @pytest.fixture
+    def validation_calls(self, monkeypatch) -> dict[str, int]:
+        """Counts instruction validations and token conflict sweeps."""
+        calls: dict[str, int] = {"instruction": 0, "tokens": 0}
+        validate_instruction = Instruction.validate_instruction
+        validate_token_conflicts = ProtocolV1._validate_token_conflicts
+
+        def count_instruction(instruction):
+            calls["instruction"] += 1
+            validate_instruction(instruction)
+
+        def count_tokens(protocol):
+            calls["tokens"] += 1
+            validate_token_conflicts(protocol)
+
+        monkeypatch.setattr(Instruction, "validate_instruction", count_instruction)
+        monkeypatch.setattr(ProtocolV1, "_validate_token_conflicts", count_tokens)
+        return calls
+
+    def test_save_and_template_validate_once(self, basic_simple_protocol, validation_calls, temp_directory):
+        """Test that template() reuses the validation done by save()."""
+        basic_simple_protocol.save(path=str(temp_directory))
+        basic_simple_protocol.template(path=str(temp_directory))
+
+        assert basic_simple_protocol.validate_protocol() == (True, None)
+        assert validation_calls == {"instruction": 1, "tokens": 1}
+
+    def test_only_changes_are_revalidated(self, basic_simple_protocol, validation_calls):
+        """Test that adding samples revalidates the instruction, and adding tokens rechecks token conflicts."""
+        instruction: Instruction = list(basic_simple_protocol.instructions)[0]
+        basic_simple_protocol.validate_protocol()
+
+        instruction.add_sample(input_snippets=["context", "user"], output_snippet="response")
+        assert basic_simple_protocol.validate_protocol() == (True, None)
+        assert validation_calls == {"instruction": 2, "tokens": 1}
+
+        basic_simple_protocol._add_token(Token("Unrelated"))
+        assert basic_simple_protocol.validate_protocol() == (True, None)
+        assert validation_calls == {"instruction": 2, "tokens": 2}
+
+    def test_direct_changes_are_revalidated(self, basic_simple_protocol):
+        """Test that changes made directly to the context lists invalidate the cached result."""
+        instruction: Instruction = list(basic_simple_protocol.instructions)[0]
+        assert basic_simple_protocol.validate_protocol() == (True, None)
+
+        instruction.context.append("x" * 10_000)
+        valid, error_msg = basic_simple_protocol.validate_protocol()
+        assert not valid
+        assert "Context line 0 exceeds maximum allowed length" in error_msg
+
+        instruction.context.clear()
+        basic_simple_protocol.context = basic_simple_protocol.context[:1]
+        valid, error_msg = basic_simple_protocol.validate_protocol()
+        assert not valid
+        assert "less than the minimum required" in error_msg
@@ -0,0 +1,85 @@
+"""
+Unit tests for the JSON encoder of protocol and template files.
+"""
+import importlib
+import json
+import re
+
+import pytest
+
+from model_train_protocol import NumToken
+from model_train_protocol.errors import ProtocolFileError
+from model_train_protocol.v1 import ProtocolV1
+from model_train_protocol.v1.protocol_file.json_encoder import JSON_BACKEND, ORJSON_BACKEND, JSONEncoder
+
+DOCUMENT: dict = {
+    "name": "encoder ✓ 😀",
+    "empty": {"list": [], "object": {}},
+    "samples": [
+        {"numbers": [[1, -2.5], []], "prompt": None, "strings": ["a \"quoted\" \\ line", "\u007f\t"], "value": True},
+        {"numbers": [[0.1, 1e-07], [1e+16]], "prompt": "p", "strings": ["b"], "value": 1.7976931348623157e+308},
+    ],
+}
+
+
+class TestJSONEncoder:
+    """Test cases for the JSONEncoder class."""
+
+    @pytest.mark.parametrize("indent", [4, 2, 3, None])
+    def test_backends_are_semantically_identical(self, indent):
+        """Test that both backends encode the same values with the same layout and key order."""
+        pytest.importorskip("orjson")
+        orjson_text: str = JSONEncoder(indent=indent, backend=ORJSON_BACKEND).dumps(DOCUMENT)
+        json_text: str = JSONEncoder(indent=indent, backend=JSON_BACKEND).dumps(DOCUMENT)
+
+        assert json.loads(orjson_text) == json.loads(json_text) == DOCUMENT
+        # orjson writes exponents without a plus sign or leading zeros
+        assert orjson_text == re.sub(r"e\+?(-?)0*(\d)", r"e\1\2", json_text)
+
+    def test_standard_library_layout(self):
+        """Test that the standard library backend matches json.dumps."""
+        assert JSONEncoder(backend=JSON_BACKEND).dumps(DOCUMENT) == \
+               json.dumps(DOCUMENT, indent=4, ensure_ascii=False)
+        assert JSONEncoder(indent=None, backend=JSON_BACKEND).dumps(DOCUMENT) == \
+               json.dumps(DOCUMENT, separators=(",", ":"), ensure_ascii=False)
+
+    def test_orjson_falls_back_for_unsupported_values(self):
+        """Test that values orjson cannot encode are encoded with the standard library."""
+        pytest.importorskip("orjson")
+        document: dict = {"big": 2 ** 70, 1: "integer key"}
+        assert JSONEncoder(backend=ORJSON_BACKEND).dumps(document) == json.dumps(document, indent=4)
+
+    def test_default_backend_without_orjson(self, monkeypatch):
+        """Test that the standard library is used when orjson is not installed."""
+        encoder_module = importlib.import_module("model_train_protocol.v1.protocol_file.json_encoder")
+        monkeypatch.setattr(encoder_module, "_orjson_module", None)
+
+        assert JSONEncoder().backend == JSON_BACKEND
+        with pytest.raises(ProtocolFileError, match="orjson is not installed"):
+            JSONEncoder(backend=ORJSON_BACKEND)
+
+    @pytest.mark.parametrize("indent, backend", [(0, None), (4, "simdjson")])
+    def test_invalid_arguments_raise_error(self, indent, backend):
+        """Test that invalid indents and unknown backends are rejected."""
+        with pytest.raises(ProtocolFileError):
+            JSONEncoder(indent=indent, backend=backend)
+
+    def test_non_finite_token_bounds_use_standard_library(self, temp_directory, basic_simple_protocol):
+        """Test that protocols with non-finite token bounds are not encoded with orjson, which writes them as null."""
+        pytest.importorskip("orjson")
+        assert basic_simple_protocol._get_json_encoder(compact=False).backend == ORJSON_BACKEND
+
+        basic_simple_protocol._add_token(NumToken("Unbounded", min_value=0, max_value=float("inf")))
+        assert basic_simple_protocol._get_json_encoder(compact=True).backend == JSON_BACKEND
+        basic_simple_protocol.save(path=str(temp_directory), compact=True)
+        assert b'"max_value":Infinity' in (temp_directory / "basic_simple_model.json").read_bytes()
+
+    def test_compact_template(self, temp_directory, basic_simple_protocol: ProtocolV1):
+        """Test that compact templates hold the same document as indented templates."""
+        basic_simple_protocol.template(path=str(temp_directory))
+        indented: bytes = (temp_directory / "basic_simple_template.json").read_bytes()
+        basic_simple_protocol.template(path=str(temp_directory), compact=True)
+        compact: bytes = (temp_directory / "basic_simple_template.json").read_bytes()
+
+        assert b"\n" not in compact
+        assert json.loads(compact) == json.loads(indented)
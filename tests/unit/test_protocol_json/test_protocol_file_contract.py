@@ -0,0 +1,79 @@
+"""
+Contract tests between the direct protocol file serializer and the Pydantic models of model_train_protocol_schemas.
+"""
+import json
+
+import pytest
+from model_train_protocol_schemas.structures.protocol import Protocol
+
+from model_train_protocol import FinalToken, Instruction, InstructionInput, InstructionOutput, Token, TokenSet
+from model_train_protocol.v1 import ProtocolV1
+from tests.unit.test_protocol_json.test_stream_protocol_json import PROTOCOL_FIXTURES
+
+
+class TestProtocolFileContract:
+    """Test cases for the schema conformance of ProtocolFileV1.to_json."""
+
+    @pytest.mark.parametrize("protocol_fixture", PROTOCOL_FIXTURES)
+    def test_to_json_matches_strict(self, protocol_fixture, request):
+        """Test that the direct serializer produces exactly the JSON of the Pydantic models."""
+        protocol: ProtocolV1 = request.getfixturevalue(protocol_fixture)
+        protocol._prep_protocol()
+        protocol_file = protocol.get_protocol_file(valid=True)
+
+        direct: str = json.dumps(protocol_file.to_json(), indent=4, ensure_ascii=False)
+        strict: str = json.dumps(protocol_file.to_json(strict=True), indent=4, ensure_ascii=False)
+
+        assert direct == strict
+
+    @pytest.mark.parametrize("protocol_fixture", PROTOCOL_FIXTURES)
+    def test_to_json_validates_against_schema(self, protocol_fixture, request):
+        """Test that the direct serializer's output is accepted by the Protocol model unchanged."""
+        protocol: ProtocolV1 = request.getfixturevalue(protocol_fixture)
+        protocol._prep_protocol()
+        protocol_json: dict = protocol.get_protocol_file(valid=True).to_json()
+        protocol_json.pop("$schema")
+
+        assert Protocol.model_validate(protocol_json).model_dump(by_alias=True) == protocol_json
+
+    def test_strict_save_matches_default_save(self, temp_directory, basic_user_protocol_with_guardrail):
+        """Test that saving in strict mode writes the same file as the default save."""
+        basic_user_protocol_with_guardrail.save(name="default", path=str(temp_directory))
+        basic_user_protocol_with_guardrail.save(name="strict", path=str(temp_directory), strict=True)
+        basic_user_protocol_with_guardrail.save(name="streamed", path=str(temp_directory), stream=True, strict=True)
+
+        default: bytes = (temp_directory / "default_model.json").read_bytes()
+        assert (temp_directory / "strict_model.json").read_bytes() == default
+        assert (temp_directory / "streamed_model.json").read_bytes() == default
+
+    def test_to_json_does_not_share_context(self, basic_simple_protocol):
+        """Test that modifying the returned context does not modify the protocol."""
+        basic_simple_protocol._prep_protocol()
+        protocol_json: dict = basic_simple_protocol.get_protocol_file(valid=True).to_json()
+        protocol_json["context"].append("Added")
+        protocol_json["instruction"]["sets"][0]["context"].append("Added")
+
+        assert "Added" not in basic_simple_protocol.context
+        assert all("Added" not in instruction.context for instruction in basic_simple_protocol.instructions)
+
+    @pytest.mark.parametrize("use_sample_store", [False, True])
+    def test_to_json_orders_samples_by_result(self, use_sample_store):
+        """Test that samples with interleaved result tokens are written in the order of the strict serializer."""
+        finals = [FinalToken("Zulu"), FinalToken("Alpha"), FinalToken("Mike")]
+        instruction = Instruction(name="ordered", input=InstructionInput(tokensets=[TokenSet(tokens=[Token("Ask")])]),
+                                  output=InstructionOutput(tokenset=TokenSet(tokens=[Token("Reply")]), final=finals))
+        if use_sample_store:
+            instruction.use_sample_store()
+        instruction.add_samples(inputs_columns=[[f"ask {i}" for i in range(12)]],
+                                outputs=[f"reply {i}" for i in range(12)],
+                                finals=[finals[i % 3] for i in range(12)])
+        protocol = ProtocolV1("ordered", inputs=1)
+        protocol.add_instruction(instruction)
+        protocol._prep_protocol()
+        protocol_file = protocol.get_protocol_file(valid=True)
+
+        samples: list[dict] = protocol_file.to_json()["instruction"]["sets"][0]["samples"]
+        assert samples == protocol_file.to_json(strict=True)["instruction"]["sets"][0]["samples"]
+        assert [sample["result"] for sample in samples] == ["Alpha_"] * 4 + ["Mike_"] * 4 + ["Zulu_"] * 4
+        assert [sample["strings"][0] for sample in samples[:4]] == ["ask 1", "ask 4", "ask 7", "ask 10"]
+        assert all(list(sample.keys()) == sorted(sample.keys()) for sample in samples)
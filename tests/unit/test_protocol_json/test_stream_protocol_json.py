@@ -0,0 +1,138 @@
+"""
+Test streaming protocol JSON output and the incremental JSON reader.
+"""
+import io
+import json
+
+import pytest
+
+from model_train_protocol.errors import ProtocolFileError
+from model_train_protocol.v1 import ProtocolV1
+from model_train_protocol.v1.protocol_file.stream_reader import JSONStreamReader
+from model_train_protocol.v1.protocol_file.stream_writer import ProtocolStreamWriter, StreamedArray, StreamedObject
+
+PROTOCOL_FIXTURES = [
+    "basic_simple_protocol",
+    "basic_simple_protocol_with_guardrail",
+    "basic_user_protocol_with_guardrail",
+    "numtoken_protocol",
+    "numlisttoken_protocol",
+    "numtoken_workflow_2context_protocol",
+    "multi_instruction_protocol",
+    "encrypted_protocol",
+    "comprehensive_protocol",
+    "workflow_5context_protocol",
+    "state_machine_protocol",
+]
+
+
+class TestStreamProtocolJSON:
+    """Test cases for the streaming protocol writer."""
+
+    @pytest.mark.parametrize("protocol_fixture", PROTOCOL_FIXTURES)
+    def test_stream_output_matches_json_dump(self, protocol_fixture, request):
+        """Test that the streamed file is byte-for-byte identical to json.dump of to_json()."""
+        protocol: ProtocolV1 = request.getfixturevalue(protocol_fixture)
+        protocol._prep_protocol()
+        protocol_file = protocol.get_protocol_file(valid=True)
+
+        expected = io.StringIO()
+        json.dump(protocol_file.to_json(), expected, indent=4, ensure_ascii=False)
+        streamed = io.StringIO()
+        protocol_file._stream(streamed)
+
+        assert streamed.getvalue() == expected.getvalue()
+
+    @pytest.mark.parametrize("protocol_fixture", PROTOCOL_FIXTURES)
+    def test_stream_write_matches_default_write(self, protocol_fixture, request):
+        """Test that write(stream=True) produces the same file, checksum included, as write()."""
+        protocol: ProtocolV1 = request.getfixturevalue(protocol_fixture)
+        protocol._prep_protocol()
+        protocol_file = protocol.get_protocol_file(valid=True)
+
+        default = io.StringIO()
+        protocol_file.write(default)
+        streamed = io.StringIO()
+        protocol_file.write(streamed, stream=True)
+
+        assert streamed.getvalue() == default.getvalue()
+
+    def test_stream_save_matches_default_save(self, temp_directory, basic_user_protocol_with_guardrail):
+        """Test that save(stream=True) writes the same file as the default save."""
+        basic_user_protocol_with_guardrail.save(name="default", path=str(temp_directory))
+        basic_user_protocol_with_guardrail.save(name="streamed", path=str(temp_directory), stream=True)
+
+        default_bytes: bytes = (temp_directory / "default_model.json").read_bytes()
+        streamed_bytes: bytes = (temp_directory / "streamed_model.json").read_bytes()
+        assert streamed_bytes == default_bytes
+
+    @pytest.mark.parametrize("document", [
+        {},
+        [],
+        {"a": [], "b": {}, "c": [1, [2, 3]], "d": "ünïcödé 😀"},
+        [{"x": None}, [], "s", 1.5, True],
+    ])
+    def test_stream_writer_matches_json_dump_for_plain_documents(self, document):
+        """Test that streamed nodes produce the same layout as their materialized equivalents."""
+        expected: str = json.dumps(document, indent=4, ensure_ascii=False)
+
+        if isinstance(document, dict):
+            streamed_document = StreamedObject(iter(document.items()))
+        else:
+            streamed_document = StreamedArray(iter(document))
+        streamed = io.StringIO()
+        ProtocolStreamWriter(streamed).write(streamed_document)
+
+        assert streamed.getvalue() == expected
+
+
+class TestJSONStreamReader:
+    """Test cases for the incremental JSON reader."""
+
+    DOCUMENT: dict = {
+        "name": "stream \"quoted\" \\ ünïcödé 😀",
+        "numbers": [1, -2.5e3, 0, True, False, None],
+        "nested": {"empty_list": [], "empty_dict": {}, "items": [{"a": "}]"}, {"b": "[{"}]},
+    }
+
+    def _walk(self, reader: JSONStreamReader):
+        """Rebuilds a document by walking it with the pull API."""
+        char = reader.peek()
+        if char == "{":
+            return {key: self._walk(reader) for key in reader.iter_object()}
+        if char == "[":
+            return [self._walk(reader) for _ in reader.iter_array()]
+        return reader.read_value()
+
+    @pytest.mark.parametrize("chunk_size", [1, 2, 7, 1 << 16])
+    @pytest.mark.parametrize("indent", [None, 4])
+    def test_reader_walk_matches_json_load(self, chunk_size, indent):
+        """Test that walking a document reproduces json.loads regardless of chunk boundaries."""
+        data: bytes = json.dumps(self.DOCUMENT, indent=indent, ensure_ascii=False).encode("utf-8")
+        reader = JSONStreamReader(io.BytesIO(data), chunk_size=chunk_size)
+
+        assert self._walk(reader) == self.DOCUMENT
+
+    @pytest.mark.parametrize("chunk_size", [1, 3, 1 << 16])
+    def test_reader_skip_and_seek(self, chunk_size):
+        """Test that a skipped value can be revisited through tell() and seek()."""
+        data: bytes = json.dumps(self.DOCUMENT, indent=4, ensure_ascii=False).encode("utf-8")
+        reader = JSONStreamReader(io.BytesIO(data), chunk_size=chunk_size)
+
+        offsets: dict = {}
+        for key in reader.iter_object():
+            offsets[key] = reader.tell()
+            reader.skip_value()
+
+        reader.seek(offsets["nested"])
+        assert reader.read_value() == self.DOCUMENT["nested"]
+        reader.seek(offsets["name"])
+        assert reader.read_value() == self.DOCUMENT["name"]
+
+    def test_reader_truncated_document_raises(self):
+        """Test that a truncated document raises a ProtocolFileError."""
+        reader = JSONStreamReader(io.BytesIO(b'{"a": [1, 2'))
+
+        with pytest.raises(ProtocolFileError):
+            for _ in reader.iter_object():
+                reader.read_value()
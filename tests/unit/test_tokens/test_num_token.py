@@ -1,8 +1,15 @@
 """
 Unit tests for the NumToken class.
 """
+import importlib
+
 import pytest
+from model_train_protocol.common.tokens.NumListToken import NumListToken
 from model_train_protocol.common.tokens.NumToken import NumToken
+from model_train_protocol.common.tokens.NumberBounds import NumberBounds
+
+# The package exports the NumberBounds class under the same name as its module
+number_bounds_module = importlib.import_module("model_train_protocol.common.tokens.NumberBounds")
 
 
 class TestNumToken:
@@ -295,3 +302,47 @@ class TestNumToken:
         assert token.num == 1
         assert token.template_representation == f"<num_{min_val}_{max_val}>"
 
+
+
+@pytest.fixture(params=["numpy", "array"])
+def number_bounds_backend(request, monkeypatch):
+    """Runs a test with NumPy and with the standard library fallback."""
+    if request.param == "array":
+        monkeypatch.setattr(number_bounds_module, "np", None)
+    else:
+        pytest.importorskip("numpy")
+    return request.param
+
+
+class TestNumberBounds:
+    """Test cases for batched number validation."""
+
+    def test_find_invalid_rows(self, number_bounds_backend):
+        """Test that out of bounds rows are found in a single call."""
+        bounds = NumberBounds(min_values=[0, -1.5], max_values=[10, 1.5])
+        rows = [[0, 0], [10, 1.5], [11, 0], [5, -2], [5, 1]]
+
+        assert bounds.find_invalid_rows(rows) == [2, 3]
+
+    def test_find_invalid_rows_wrong_width_and_nan(self, number_bounds_backend):
+        """Test that rows with the wrong number of numbers or NaN values are invalid."""
+        bounds = NumberBounds(min_values=[0, 0], max_values=[10, 10])
+
+        assert bounds.find_invalid_rows([[1, 2], [1], [1, 2, 3], [float("nan"), 1]]) == [1, 2, 3]
+
+    def test_find_invalid_rows_numpy_matrix(self):
+        """Test validation of a NumPy matrix."""
+        np = pytest.importorskip("numpy")
+        bounds = NumberBounds.from_tokens([NumToken("Count", min_value=1, max_value=10),
+                                           NumListToken("Point", min_value=-1, max_value=1, length=2)])
+        matrix = np.array([[1, 0, 0], [10, 1, -1], [0, 0, 0], [5, 0.5, 2]])
+
+        assert bounds.width == 3
+        assert bounds.find_invalid_rows(matrix) == [2, 3]
+
+    def test_find_invalid_numbers(self, number_bounds_backend):
+        """Test that NumToken finds all out of bounds numbers of a flat sequence."""
+        token = NumToken("Count", min_value=1, max_value=10)
+
+        assert token.find_invalid_numbers([1, 0, 10, 10.5, 5]) == [1, 3]
+        assert token.find_invalid_numbers([]) == []
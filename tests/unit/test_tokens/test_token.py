@@ -1,9 +1,19 @@
 """
 Unit tests for the Token class.
 """
+import random
+
 import pytest
+from model_train_protocol.common.tokens import FinalToken, FinalNumToken, NumListToken, NumToken
 from model_train_protocol.common.tokens.Token import Token
-from model_train_protocol.utils._protected import validate_string_subset
+from model_train_protocol.utils import _protected as protected_module
+from model_train_protocol.utils._protected import (
+    StringConflictIndex,
+    find_invalid_token_char,
+    find_string_subset_conflicts,
+    normalize_comparison_string,
+    validate_string_subset,
+)
 
 
 class TestToken:
@@ -289,6 +299,87 @@ class TestToken:
             Token("Test", key=invalid_key)
 
 
+class TestTokenHashing:
+    """Test cases for cached token hashes, slots and interning."""
+
+    def test_hash_is_cached_until_key_changes(self, monkeypatch):
+        """Test that the hash is computed once and recomputed after the key is assigned."""
+        token = Token("Cached")
+        calls = []
+        original_compute_hash = Token._compute_hash
+        monkeypatch.setattr(Token, "_compute_hash", lambda self: calls.append(self) or original_compute_hash(self))
+
+        first_hash = hash(token)
+        assert hash(token) == first_hash
+        assert len(calls) == 1
+
+        token.key = "CachedKey"
+        assert hash(token) == hash(Token("Cached", key="CachedKey"))
+        assert hash(token) != first_hash
+        assert len(calls) == 3
+
+    def test_tokens_have_no_instance_dict(self):
+        """Test that tokens only have their declared slots."""
+        for token in [Token("A"), NumToken("B", min_value=0, max_value=1), FinalNumToken("C", min_value=0, max_value=1),
+                      NumListToken("D", min_value=0, max_value=1, length=2)]:
+            with pytest.raises(AttributeError):
+                token.unknown_attribute = True
+
+    def test_intern_returns_shared_instance(self):
+        """Test that equal tokens share one object once interned, and different tokens do not."""
+        first = Token("Interned", key="I1", desc="shared").intern()
+
+        assert Token("Interned", key="I1", desc="shared").intern() is first
+        assert Token("Interned", key="I2", desc="shared").intern() is not first
+        assert FinalToken("Interned", key="I1", desc="shared").intern() is not first
+
+    def test_intern_after_key_change(self):
+        """Test that a shared instance whose key changed is not returned for its old identity."""
+        first = Token("Rekeyed").intern()
+        first.key = "NewKey"
+
+        second = Token("Rekeyed").intern()
+        assert second is not first
+        assert second.key is None
+
+
+class TestTokenCharacterValidation:
+    """Test cases for the cached token character validator."""
+
+    def test_find_invalid_token_char_matches_emoji_library(self):
+        """Test that the validator accepts exactly the characters accepted by a per-character emoji check."""
+        import emoji
+
+        rng = random.Random(0)
+        # Single code point emojis and their neighbours, which may or may not be emojis
+        code_points = [ord(c) for c in emoji.EMOJI_DATA if len(c) == 1]
+        alphabet = "aZ9_ -!é漢\ufe0f\u200d" + "".join(
+            chr(code_point + offset) for code_point in rng.sample(code_points, 100) for offset in (-1, 0, 1))
+        for _ in range(500):
+            string = "".join(rng.choice(alphabet) for _ in range(rng.randint(1, 6)))
+            expected = next((c for c in string if not (c == "_" or c.isalnum() or emoji.is_emoji(c))), None)
+            assert find_invalid_token_char(string) == expected
+
+    def test_find_invalid_token_char_memoizes_valid_strings(self, monkeypatch):
+        """Test that valid strings with emojis are memoized and invalid strings are not."""
+        monkeypatch.setattr(protected_module, "_VALID_TOKEN_STRINGS", set())
+        Token("Memo😀", key="Key😀")
+        Token("Plain", key="Key_1")
+        with pytest.raises(ValueError):
+            Token("Memo-😀")
+
+        assert protected_module._VALID_TOKEN_STRINGS == {"Memo😀_", "Key😀"}
+
+    @pytest.mark.parametrize("value, key, error", [
+        ("Bad-Value", None, "Invalid character '-' found in value"),
+        ("Good", "bad key", "Invalid character ' ' found in key"),
+    ])
+    def test_invalid_characters_raise(self, value, key, error):
+        """Test that the first invalid character is reported."""
+        with pytest.raises(ValueError, match=error):
+            Token(value, key=key)
+
+
 class TestTokenSubstringValidation:
     """Test cases for token substring validation."""
 
@@ -442,3 +533,44 @@ class TestTokenSubstringValidation:
         with pytest.raises(ValueError, match=" substring of "):
             validate_string_subset(string_set)
 
+
+    def test_validate_string_set_reports_all_conflicts(self):
+        """Test validate_string_set reports every substring relationship, not only the first."""
+        string_set = {"Cat", "Cat_", "Dog", "Dog_", "Bird"}
+        with pytest.raises(ValueError) as exc_info:
+            validate_string_subset(string_set)
+        assert "'Cat' is a substring of 'Cat_'" in str(exc_info.value)
+        assert "'Dog' is a substring of 'Dog_'" in str(exc_info.value)
+        assert "Bird" not in str(exc_info.value)
+
+    def test_find_string_subset_conflicts_uses_normalized_length(self):
+        """Test that a longer raw string is reported when its normalized form is contained in a shorter one."""
+        assert find_string_subset_conflicts({"a__", "ab", "c"}) == [("a__", "ab")]
+
+    def test_find_string_subset_conflicts_matches_pairwise_check(self):
+        """Test that the automaton finds the same conflicts as comparing every pair of strings."""
+        rng = random.Random(0)
+        string_set = {"".join(rng.choice("abAB_ 1😀") for _ in range(rng.randint(1, 5))) for _ in range(200)}
+
+        expected = {
+            (first, second) for first in string_set for second in string_set
+            if first != second and normalize_comparison_string(first) in normalize_comparison_string(second)
+            and (len(normalize_comparison_string(first)), len(first), first) <
+            (len(normalize_comparison_string(second)), len(second), second)
+        }
+        assert set(find_string_subset_conflicts(string_set)) == expected
+
+    def test_string_conflict_index_matches_pairwise_check(self):
+        """Test that the incremental index finds the same conflicts as a full check as strings are added."""
+        rng = random.Random(0)
+        index = StringConflictIndex()
+        added: set = set()
+        for _ in range(300):
+            candidate = "".join(rng.choice("abAB_ 😀") for _ in range(rng.randint(0, 6)))
+            expected = [] if candidate in added else [
+                pair for pair in find_string_subset_conflicts(added | {candidate}) if candidate in pair
+            ]
+            assert index.find_conflicts(candidate) == expected
+            if not expected or rng.random() < 0.5:
+                index.add(candidate)
+                added.add(candidate)
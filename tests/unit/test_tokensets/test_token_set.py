@@ -344,3 +344,46 @@ class TestTokenSet:
         # Should be equal
         assert token_set1 == token_set2
 
+
+
+class TestTokenSetCreateSnippets:
+    """Test cases for creating many Snippets at once."""
+
+    @pytest.fixture
+    def numeric_token_set(self) -> TokenSet:
+        return TokenSet(tokens=(Token("Move"), NumToken("Speed", min_value=0, max_value=10),
+                                NumListToken("Point", min_value=-5, max_value=5, length=2)))
+
+    def test_create_snippets_matches_create_snippet(self, numeric_token_set):
+        """Test that create_snippets builds the same Snippets as create_snippet."""
+        strings = ["a", "b"]
+        numbers = [[1], [2.5]]
+        number_lists = [[[1, 2]], [[-5, 5]]]
+
+        snippets = numeric_token_set.create_snippets(strings, numbers=numbers, number_lists=number_lists)
+
+        assert snippets == [numeric_token_set.create_snippet(string, numbers=row, number_lists=lists)
+                            for string, row, lists in zip(strings, numbers, number_lists)]
+
+    def test_create_snippets_numpy(self, numeric_token_set):
+        """Test that create_snippets accepts NumPy matrices."""
+        np = pytest.importorskip("numpy")
+
+        snippets = numeric_token_set.create_snippets(
+            ["a", "b"], numbers=np.array([[1], [2]]), number_lists=np.array([[[1, 2]], [[3, 4]]]))
+
+        assert snippets[1].numbers == [2]
+        assert snippets[1].number_lists == [[3, 4]]
+
+    def test_create_snippets_reports_all_invalid_rows(self, numeric_token_set):
+        """Test that every out of bounds row is reported."""
+        with pytest.raises(ValueError, match=r"rows \[1, 3\]"):
+            numeric_token_set.create_snippets(["a", "b", "c", "d"], numbers=[[1], [11], [2], [-1]],
+                                              number_lists=[[[0, 0]]] * 4)
+        with pytest.raises(ValueError, match=r"rows \[0\]"):
+            numeric_token_set.create_snippets(["a"], numbers=[[1]], number_lists=[[[0, 0, 0]]])
+
+    def test_create_snippets_missing_numbers(self, numeric_token_set):
+        """Test that numbers are required when the TokenSet has NumTokens."""
+        with pytest.raises(ValueError, match="requires numbers"):
+            numeric_token_set.create_snippets(["a"], number_lists=[[[0, 0]]])